@@ -1,14 +1,24 @@
-from flask import Flask, render_template, jsonify 
+import queue
+from flask import Flask, render_template, jsonify, request, abort, make_response, Response, stream_with_context
+from werkzeug.serving import is_running_from_reloader
 from transcriber_app.main import (
-    start_transcription_pipeline,
-    stop_transcription_pipeline,
-    pause_transcription_pipeline, 
-    resume_transcription_pipeline,
-    get_current_transcript,
-    get_final_transcript,
-    get_current_metrics,
-    get_average_metrics
+    session_manager,
+    DEFAULT_SESSION_ID,
+    start_model_warmup,
+    get_model_readiness,
+    wait_until_ready,
+    get_scheduler_stats
 )
+from transcriber_app.session_events import format_sse
+
+# How long /start_recording waits for the model to finish warming up by default
+READY_WAIT_SECONDS = 60
+
+# Seconds between keep-alive comments on an idle /events stream (proxies close silent connections)
+EVENTS_KEEPALIVE_SECONDS = 15
+
+# Flask debug mode (and its auto-reloader) when run with python server.py
+DEBUG = True
 
 # The Flask App 
 # - it provides data and handles actions via API endpoints (seen below)
@@ -21,9 +31,31 @@ from transcriber_app.main import (
 # - (2) Backend (Flask) processes the request and returns JSON data
 # - (3) Frontend (JavaScript) uses this data to update the UI 
 
+# Sessions
+# - every recording route exists twice: /<route> acts on the default session (one recording per server,
+#   as before) and /sessions/<session_id>/<route> on that session, so one server can run many rooms at once
+# - POST /sessions creates a session, GET /sessions lists them, DELETE /sessions/<session_id> removes one
+
 # Creates an instance of the Flask class (aka application)
 app = Flask(__name__)
 
+def session_route(rule, **options):
+    """Register a view taking session_id at rule (default session) and at /sessions/<session_id>rule"""
+    def decorator(view):
+        app.route(rule, defaults={'session_id': DEFAULT_SESSION_ID}, **options)(view)
+        app.route(f"/sessions/<session_id>{rule}", **options)(view)
+        return view
+    return decorator
+
+def find_session(session_id):
+    """The session, or a 404 response; the default session always exists"""
+    if session_id == DEFAULT_SESSION_ID:
+        return session_manager.get_or_create_session(session_id)
+    session = session_manager.get_session(session_id)
+    if session is None:
+        abort(make_response(jsonify({'error': f"Unknown session '{session_id}'"}), 404))
+    return session
+
 # Defines a route for the route URL "/"
 # - when a user visits the "/" URL, call the home() function 
 # - under the hood Flask keeps a mapping or URLs to Python functions 
@@ -36,61 +68,163 @@ def test():
 def home():
     return render_template("index.html") # Serves the html page 
 
+# Model Readiness
+# - 200 once the model is loaded and warmed up, 503 while it is still loading/warming
+@app.route("/ready")
+def ready():
+    readiness = get_model_readiness()
+    return jsonify(readiness), (200 if readiness['ready'] else 503)
+
+# Create Session
+# - optional JSON body {"session_id": ...} to choose the id (e.g. the room name), otherwise a random one
+# - optional "weight" (default 1): the session's share of the inference time relative to other sessions
+@app.route("/sessions", methods=['POST'])
+def create_session():
+    body = request.get_json(silent=True) or {}
+    try:
+        weight = float(body.get('weight', 1.0))
+    except (TypeError, ValueError):
+        weight = 0
+    if weight <= 0:
+        return jsonify({'error': "weight must be a positive number"}), 400
+    try:
+        session = session_manager.create_session(body.get('session_id'), weight)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+    return jsonify(session.get_status()), 201
+
+# List Sessions
+@app.route("/sessions")
+def list_sessions():
+    return jsonify({'sessions': session_manager.list_sessions()})
+
+# Remove Session (stops it if it is still recording)
+@app.route("/sessions/<session_id>", methods=['DELETE'])
+def remove_session(session_id):
+    if not session_manager.remove_session(session_id):
+        return jsonify({'error': f"Unknown session '{session_id}'"}), 404
+    return jsonify({'status': 'Session removed'})
+
 # Start Recording
-@app.route("/start_recording", methods=['POST'])
-def start_recording():
-    start_transcription_pipeline()
+# - waits up to READY_WAIT_SECONDS for the model to be warm
+# - ?wait=<seconds> overrides the wait, ?wait=0 fails fast with 503 if the model isn't ready
+@session_route("/start_recording", methods=['POST'])
+def start_recording(session_id):
+    session = find_session(session_id)
+    timeout = request.args.get('wait', default=READY_WAIT_SECONDS, type=float)
+    if not wait_until_ready(timeout=timeout):
+        return jsonify({'status': 'Model is still warming up, try again shortly', 
+                        'readiness': get_model_readiness()}), 503
+
+    session.start()
     return jsonify({'status': 'Recording started...'})
 
 # Stop Recording
-@app.route("/stop_recording", methods=['POST'])
-def stop_recording():
-    stop_transcription_pipeline()
+@session_route("/stop_recording", methods=['POST'])
+def stop_recording(session_id):
+    find_session(session_id).stop()
     return jsonify({'status': 'Recording stopped...'})
 
 # Pause Recording
-@app.route("/pause_recording", methods=['POST'])
-def pause_recording():
+@session_route("/pause_recording", methods=['POST'])
+def pause_recording(session_id):
+    session = find_session(session_id)
     try:
-        pause_transcription_pipeline()
+        session.pause()
         return jsonify({"status": "paused"}), 200
     except Exception as e: 
         return jsonify({"error": str(e)}), 500
 
 # Resume Recording
-@app.route("/resume_recording", methods=['POST'])
-def resume_recording():
+@session_route("/resume_recording", methods=['POST'])
+def resume_recording(session_id):
+    session = find_session(session_id)
     try:
-        resume_transcription_pipeline()
+        session.resume()
         return jsonify({"status": "resumed"}), 200
     except Exception as e: 
         return jsonify({"error": str(e)}), 500
 
 # Live Transcript
-@app.route("/get_live_transcript")
-def get_transcript():
-    transcript = get_current_transcript()
-    return jsonify(({'transcript': transcript }))
+# - transcript: latest finalized segment
+# - committed / partial: stable and unstable text of the segment still being spoken
+@session_route("/get_live_transcript")
+def get_transcript(session_id):
+    return jsonify(find_session(session_id).get_live_transcript())
 
 # Live Metrics
-@app.route("/get_live_metrics")
-def get_metrics():
-    metrics = get_current_metrics()
+@session_route("/get_live_metrics")
+def get_metrics(session_id):
+    metrics = find_session(session_id).get_current_metrics()
     return jsonify(metrics)
 
+# Live Updates (Server-Sent Events)
+# - pushes 'transcript' (same JSON as /get_live_transcript), 'metrics' (as /get_live_metrics) and
+#   'status' events as the pipeline produces them, instead of the page polling both routes
+# - starts with the current transcript, metrics and status, so a tab that (re)connects is up to date
+@session_route("/events")
+def events(session_id):
+    session = find_session(session_id)
+    subscriber = session.events.subscribe()
+
+    def stream():
+        try:
+            yield format_sse('status', session.get_status())
+            yield format_sse('transcript', session.get_live_transcript())
+            yield format_sse('metrics', session.get_current_metrics())
+            while True:
+                try:
+                    event, data = subscriber.get(timeout=EVENTS_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event, data)
+        finally:
+            # Runs when the client disconnects
+            session.events.unsubscribe(subscriber)
+
+    response = Response(stream_with_context(stream()), mimetype="text/event-stream")
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'     # Don't let a reverse proxy buffer the stream
+    return response
+
 # Final Transcript
-@app.route("/get_final_transcript")
-def get_final_transcript_route():
-    final_transcript = get_final_transcript()
+@session_route("/get_final_transcript")
+def get_final_transcript_route(session_id):
+    final_transcript = find_session(session_id).get_final_transcript()
     return jsonify({'transcript': final_transcript})
 
 # Average Metrics
-@app.route("/get_average_metrics")
-def get_average_metrics_route():
-    average_metrics = get_average_metrics()
+@session_route("/get_average_metrics")
+def get_average_metrics_route(session_id):
+    average_metrics = find_session(session_id).get_average_metrics()
     return jsonify(average_metrics)
 
+# Inference Queue Stats
+# - this session's wait in the shared inference scheduler's queue (mean/p95/max) and its inference time
+@session_route("/get_inference_stats")
+def get_inference_stats_route(session_id):
+    return jsonify(find_session(session_id).get_inference_stats())
+
+# Scheduler Stats
+# - throughput of the shared inference scheduler across all sessions, for sizing hosts
+@app.route("/scheduler_stats")
+def scheduler_stats():
+    return jsonify(get_scheduler_stats())
+
+def _is_reloader_parent():
+    """python server.py with the reloader: this process only watches files and restarts the serving child"""
+    return __name__ == "__main__" and DEBUG and not is_running_from_reloader()
+
+# Load and warm the model in the background as soon as the app starts, however it is served
+# (python server.py, flask run, a WSGI server), so the first session doesn't wait for it
+# - except in the reloader's parent process, which never serves a request
+if not _is_reloader_parent():
+    start_model_warmup()
+
 if __name__ == "__main__":
-    app.run(debug=True, port=5001) # Starts the Flask application in debug mode
+    app.run(debug=DEBUG, port=5001) # Starts the Flask application (in debug mode by default)
 
 # Flask will need to serve an HTML file, as well as request and display the metrics data 
\ No newline at end of file
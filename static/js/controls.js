@@ -1,13 +1,31 @@
 import { initialiseCharts, resetCharts } from './charts.js';
-import { pollTranscript, pollMetrics } from './polling.js';
+import { pollTranscript, pollMetrics, subscribeToUpdates } from './polling.js';
 import { 
     startTime, setStartTime, 
     metricsMode, setMetricsMode, 
     transcriptInterval, setTranscriptInterval, 
     metricsInterval, setMetricsInterval, 
-    isPaused, setIsPaused 
+    eventSource, setEventSource,
+    isPaused, setIsPaused,
+    sessionId, setSessionId, sessionUrl
 } from './state.js';
 
+// Create this page's server session the first time it is needed
+function ensureSession() {
+    if (sessionId) {
+        return Promise.resolve(sessionId);
+    }
+    return fetch('/sessions', { method: 'POST' })
+        .then(response => response.json().then(data => ({ ok: response.ok, data })))
+        .then(({ ok, data }) => {
+            if (!ok) {
+                throw new Error(data.error);
+            }
+            setSessionId(data.session_id);
+            return data.session_id;
+        });
+}
+
 function updateMetricsDisplay(metricsMode) {
     if (metricsMode === "live") {
         document.getElementById('wpm-label').textContent = 'Words per Minute';
@@ -43,13 +61,23 @@ function initialiseControls({
         setStartTime(Date.now());
         transcriptBox.textContent = "Recording started...";
 
-        fetch('/start_recording', { method: 'POST' })
-            .then(response => response.json())
-            .then(data => {
+        ensureSession()
+            .then(() => fetch(sessionUrl('/start_recording'), { method: 'POST' }))
+            .then(response => response.json().then(data => ({ ok: response.ok, data })))
+            .then(({ ok, data }) => {
                 transcriptBox.textContent = data.status;
+                // Model not ready yet (503) - stay out of live mode so Start can be pressed again
+                if (!ok) {
+                    setMetricsMode(null);
+                    return;
+                }
                 updateMetricsDisplay(metricsMode);
-                // This is only used if we want to poll on intervals 
-                if (!transcriptInterval && !metricsInterval) {
+                // Updates are pushed by the server; poll on intervals only where EventSource is missing
+                if (window.EventSource) {
+                    if (!eventSource) {
+                        setEventSource(subscribeToUpdates(transcriptBox, wpmValue, volumeValue, pitchValue));
+                    }
+                } else if (!transcriptInterval && !metricsInterval) {
                     setTranscriptInterval(setInterval(() => pollTranscript(transcriptBox), 2000));
                     setMetricsInterval(setInterval(() => pollMetrics(wpmValue, volumeValue, pitchValue), 6000));
                 }
@@ -68,12 +96,17 @@ function initialiseControls({
         }
         setMetricsMode("average");
         // Note: Removed resetCharts() call - graphs will be preserved
-        fetch('/stop_recording', { method: 'POST' })
+        fetch(sessionUrl('/stop_recording'), { method: 'POST' })
             .then(response => response.json())
             .then(data => {
                 transcriptBox.textContent = data.status;
                 updateMetricsDisplay(metricsMode);
 
+                if (eventSource) {
+                    eventSource.close();
+                    setEventSource(null);
+                }
+
                 if (transcriptInterval) {
                     clearInterval(transcriptInterval); // JavaScript function 
                     setTranscriptInterval(null);
@@ -86,7 +119,7 @@ function initialiseControls({
                 updateMetricsDisplay(metricsMode);
 
                  // Fetch the final transcript and metrics 
-                fetch('/get_final_transcript')
+                fetch(sessionUrl('/get_final_transcript'))
                     .then(response => response.json())
                     .then(data => {
                         transcriptBox.textContent = data.transcript || 'No transcript available.';
@@ -96,7 +129,7 @@ function initialiseControls({
                         console.error('Error fetching final transcript:', error);
                     });
                 
-                fetch('/get_average_metrics')
+                fetch(sessionUrl('/get_average_metrics'))
                     .then(response => response.json())
                     .then(data => {
                         wpmValue.textContent = data.average_wpm !== undefined ? data.average_wpm.toFixed(2) : 'N/A';
@@ -123,7 +156,7 @@ function initialiseControls({
             return;
         }
         if (!isPaused) {
-            fetch('/pause_recording', { method: 'POST' })
+            fetch(sessionUrl('/pause_recording'), { method: 'POST' })
                 .then(response => {
                     if (response.ok) {
                         setIsPaused(true);
@@ -136,7 +169,7 @@ function initialiseControls({
                     alert("Error pausing recording.");
                 });
         } else {
-            fetch('/resume_recording', { method: 'POST' })
+            fetch(sessionUrl('/resume_recording'), { method: 'POST' })
                 .then(response => {
                     if (response.ok) {
                         setIsPaused(false);
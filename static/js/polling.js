@@ -1,11 +1,23 @@
 import { updateCharts } from './charts.js';
-import { isPaused } from './state.js';
+import { isPaused, sessionUrl } from './state.js';
+
+function renderTranscript(transcriptBox, data) {
+    // Latest finalized segment, then the segment still being spoken (stable + unstable words)
+    transcriptBox.textContent = [data.transcript, data.committed].filter(Boolean).join(' ');
+
+    if (data.partial) {
+        const partialSpan = document.createElement('span');
+        partialSpan.className = 'partial-text';
+        partialSpan.textContent = ' ' + data.partial;
+        transcriptBox.appendChild(partialSpan);
+    }
+}
 
 function pollTranscript(transcriptBox){
-    fetch('/get_live_transcript')
+    fetch(sessionUrl('/get_live_transcript'))
         .then(response => response.json())
         .then(data => {
-            transcriptBox.textContent = data.transcript; 
+            renderTranscript(transcriptBox, data);
         });
 }
 
@@ -36,29 +48,60 @@ function updateOutOfBounds(wpm, volume, pitch) {
     }
 }
 
+function renderMetrics(data, wpmValue, volumeValue, pitchValue) {
+    // Update charts with new data only if not paused
+    if (!isPaused) {
+        console.log('Received metrics:', data);
+
+        // Update all metrics 
+        wpmValue.textContent = data.wpm.toFixed(2)
+        volumeValue.textContent = data.volume.toFixed(2)
+        pitchValue.textContent = data.pitch.toFixed(2)
+
+        // Update charts 
+        updateCharts(data.wpm, data.volume, data.pitch);
+        updateOutOfBounds(data.wpm, data.volume, data.pitch);
+    } else {
+        console.log('Recording is paused, skipping chart update');
+    }
+}
+
 function pollMetrics(wpmValue, volumeValue, pitchValue) {
-    fetch('/get_live_metrics')
+    fetch(sessionUrl('/get_live_metrics'))
         .then(response => response.json())
         .then(data => {    
-            // Update charts with new data only if not paused
-            if (!isPaused) {
-                console.log('Received metrics:', data);
-
-                // Update all metrics 
-                wpmValue.textContent = data.wpm.toFixed(2)
-                volumeValue.textContent = data.volume.toFixed(2)
-                pitchValue.textContent = data.pitch.toFixed(2)
-
-                // Update charts 
-                updateCharts(data.wpm, data.volume, data.pitch);
-                updateOutOfBounds(data.wpm, data.volume, data.pitch);
-            } else {
-                console.log('Recording is paused, skipping chart update');
-            }
+            renderMetrics(data, wpmValue, volumeValue, pitchValue);
         })
         .catch(error => {
             console.error('Error fetching metrics:', error);
         });
 }
 
-export { pollTranscript, pollMetrics};
\ No newline at end of file
+// Live updates pushed by the server (Server-Sent Events): each segment and metrics update is shown
+// as soon as the pipeline produces it, and an idle tab makes no requests
+// - the browser reconnects by itself after a dropped connection; the server resends the current state
+function subscribeToUpdates(transcriptBox, wpmValue, volumeValue, pitchValue) {
+    const source = new EventSource(sessionUrl('/events'));
+    // Only render while the session records: after Stop the final transcript must not be overwritten
+    let running = false;
+
+    source.addEventListener('status', event => {
+        running = JSON.parse(event.data).running;
+    });
+    source.addEventListener('transcript', event => {
+        if (running) {
+            renderTranscript(transcriptBox, JSON.parse(event.data));
+        }
+    });
+    source.addEventListener('metrics', event => {
+        if (running) {
+            renderMetrics(JSON.parse(event.data), wpmValue, volumeValue, pitchValue);
+        }
+    });
+    source.onerror = () => {
+        console.warn('Live update stream interrupted, reconnecting...');
+    };
+    return source;
+}
+
+export { pollTranscript, pollMetrics, subscribeToUpdates };
\ No newline at end of file
@@ -13,8 +13,13 @@ export let startTime = null;
 export let metricsMode = null;
 export let transcriptInterval = null;
 export let metricsInterval = null;
+export let eventSource = null;
 export let isPaused = false;
 
+// Server session this page records into: ?session=<id> joins an existing one (e.g. a lecture room),
+// otherwise one is created on the first Start
+export let sessionId = new URLSearchParams(window.location.search).get('session');
+
 // Setter functions allow reassigning of these variables from other modules
 export function setWpmChart(chart) { wpmChart = chart; }
 export function setVolumeChart(chart) { volumeChart = chart; }
@@ -23,4 +28,11 @@ export function setStartTime(time) { startTime = time; }
 export function setMetricsMode(mode) { metricsMode = mode; }
 export function setTranscriptInterval(interval) { transcriptInterval = interval; }
 export function setMetricsInterval(interval) { metricsInterval = interval; }
+export function setEventSource(source) { eventSource = source; }
 export function setIsPaused(paused) { isPaused = paused; }
+export function setSessionId(id) { sessionId = id; }
+
+// URL of a route for this page's session (the server's default session until one exists)
+export function sessionUrl(path) {
+    return sessionId ? `/sessions/${encodeURIComponent(sessionId)}${path}` : path;
+}
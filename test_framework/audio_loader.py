@@ -1,35 +1,159 @@
+import os
+import re
+import shutil
+import hashlib
+import subprocess
 import numpy as np
-from pydub import AudioSegment
+from pathlib import Path
+
+# Decoded test audio, one .npy of int16 samples per (file location, file contents, sample rate)
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".audio_cache"
 
 class AudioLoader:
-    def __init__(self, sample_rate=16000):
+    def __init__(self, sample_rate=16000, block_size=16000, cache_dir=DEFAULT_CACHE_DIR):
         self.sample_rate = sample_rate
-    
+        self.block_size = block_size
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+
+    def load_pcm(self, file_path):
+        """
+        Decoded mono int16 samples at the target sample rate, through the on-disk cache.
+
+        The first load decodes the file into the cache; later loads (every config and
+        repeat of a test run) memory-map the cached .npy read-only, which costs no decode
+        and no copy: VirtualAudioStream slices the map directly and the OS pages it in.
+        Entries are keyed on the file's location, a hash of its contents and the sample rate,
+        so editing the file or changing the rate decodes it again, and the stale entry is
+        removed; files with the same name in different directories keep separate entries.
+        """
+        if self.cache_dir is None:
+            return self.convert_to_int16(self.load_audio(file_path))
+
+        file_path = Path(file_path)
+        cache_path = self._cache_path(file_path)
+        if not cache_path.exists():
+            self._decode_to_cache(file_path, cache_path)
+        return np.load(cache_path, mmap_mode='r')
+
+    def _cache_path(self, file_path):
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return self.cache_dir / f"{self._entry_prefix(file_path)}-{digest.hexdigest()[:16]}-{self.sample_rate}.npy"
+
+    def _entry_prefix(self, file_path):
+        # Name plus a hash of the resolved path: a/lecture.mp3 and b/lecture.mp3 are different entries
+        location = hashlib.sha256(str(Path(file_path).resolve()).encode()).hexdigest()[:8]
+        return f"{file_path.stem}-{location}"
+
+    def _decode_to_cache(self, file_path, cache_path):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        partial_path = cache_path.with_name(cache_path.name + f".{os.getpid()}.partial")
+        try:
+            if shutil.which("ffmpeg") is not None:
+                # Stream the raw samples to disk, then wrap them in a .npy header: one block in memory
+                raw_path = partial_path.with_suffix(".raw")
+                with open(raw_path, 'wb') as raw:
+                    for block in self.stream_audio(file_path):
+                        raw.write(block.data)
+                samples = np.memmap(raw_path, dtype=np.int16, mode='r') if raw_path.stat().st_size else np.zeros(0, np.int16)
+                with open(partial_path, 'wb') as out:
+                    np.save(out, samples)
+                del samples
+                raw_path.unlink()
+            else:
+                with open(partial_path, 'wb') as out:
+                    np.save(out, self.convert_to_int16(self.load_audio(file_path)))
+            os.replace(partial_path, cache_path)     # Atomic: concurrent runs never see half an entry
+        finally:
+            for leftover in (partial_path, partial_path.with_suffix(".raw")):
+                if leftover.exists():
+                    leftover.unlink()
+
+        # Entries for an older version of the file are stale now
+        entry = re.compile(rf"{re.escape(self._entry_prefix(file_path))}-[0-9a-f]{{16}}-{self.sample_rate}\.npy")
+        for stale in self.cache_dir.iterdir():
+            if stale != cache_path and entry.fullmatch(stale.name):
+                stale.unlink()
+        print(f"[AUDIO CACHE] Decoded {file_path.name} into {cache_path}")
+
+    def stream_audio(self, file_path, block_size=None):
+        """
+        Decode an audio file with a local ffmpeg, yielding mono int16 blocks of block_size
+        samples at the target sample rate (the last one may be shorter).
+
+        ffmpeg downmixes and resamples as it decodes, so memory stays at one block whatever
+        the length of the file, and the first block is ready as soon as ffmpeg has decoded it.
+        """
+        block_size = block_size or self.block_size
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            raise FileNotFoundError("ffmpeg is needed to stream audio files (install it and add it to PATH)")
+
+        command = [ffmpeg, "-nostdin", "-loglevel", "error", "-i", str(file_path),
+                   "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(self.sample_rate), "-"]
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            block_bytes = block_size * 2
+            while True:
+                data = process.stdout.read(block_bytes)     # Waits for a full block unless the file ended
+                if not data:
+                    break
+                yield np.frombuffer(data[:len(data) // 2 * 2], dtype=np.int16)
+        finally:
+            # Also runs when the consumer stops early: don't leave ffmpeg blocked on a full pipe
+            process.stdout.close()
+            if process.poll() is None:
+                process.kill()
+            stderr = process.stderr.read().decode(errors="replace").strip()
+            process.stderr.close()
+            if process.wait() not in (0, -9) and stderr:
+                raise RuntimeError(f"ffmpeg could not decode {file_path}: {stderr}")
+
+    def stream_audio_float(self, file_path, block_size=None):
+        """Like stream_audio, but float32 blocks normalized to [-1, 1]"""
+        for block in self.stream_audio(file_path, block_size):
+            yield block.astype(np.float32) / 32768.0
+
     def load_audio(self, file_path):
         """Load audio file and convert to required format"""
 
+        # Decode straight into one float32 array when ffmpeg is available
+        if shutil.which("ffmpeg") is not None:
+            blocks = list(self.stream_audio(file_path))
+            samples = np.empty(sum(len(block) for block in blocks), dtype=np.float32)
+            position = 0
+            for block in blocks:
+                np.divide(block, 32768.0, out=samples[position:position + len(block)], casting='unsafe')
+                position += len(block)
+            return samples
+
+        # Fall back on pydub, which holds several full copies of the file while converting
+        from pydub import AudioSegment
+
         # Load the audio file using pydub.AudioSegment
         audio = AudioSegment.from_file(str(file_path))
-        
+
         # Convert to mono if stereo
         if audio.channels > 1:
             audio = audio.set_channels(1)
-        
+
         # Resample to target sample rate
         if audio.frame_rate != self.sample_rate:
             audio = audio.set_frame_rate(self.sample_rate)
-        
+
         # Convert to numpy array
         samples = np.array(audio.get_array_of_samples())
-        
+
         # Convert to float32 (normalized to [-1, 1])
         if audio.sample_width == 2:  # 16-bit
             samples = samples.astype(np.float32) / 32768.0
         else:
             samples = samples.astype(np.float32) / 32768.0
-        
+
         return samples
-    
+
     def convert_to_int16(self, audio_samples):
         """Convert float32 samples to int16 for transcription queue"""
-        return (audio_samples * 32767).astype(np.int16) 
\ No newline at end of file
+        return (audio_samples * 32767).astype(np.int16)
\ No newline at end of file
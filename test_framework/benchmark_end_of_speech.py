@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+End-of-speech -> text latency benchmark for incremental log-mel features
+
+Compares what happens once a segment has ended:
+- audio path: backend.transcribe(audio) (log-mel of the whole segment + encoder + decoder)
+- incremental path: IncrementalLogMel.finalize() + backend.transcribe_features() (the
+  frames were computed while the segment was being spoken, only the edge frames,
+  normalisation, encoder and decoder are left)
+
+The feature stage is timed on its own first (no model needed), then the full latency
+with a Whisper model. Segments are cut from the 1 minute test recording, or from
+synthetic noise if it can't be loaded (needs ffmpeg).
+
+Run: python benchmark_end_of_speech.py [model_size]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import whisper
+from whisper.audio import N_SAMPLES
+
+# Add transcriber_app to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from transcriber_app.features import IncrementalLogMel
+from transcriber_app.asr_backends import create_backend
+
+SAMPLE_RATE = 16000
+FRAME_SIZE = 320            # 20ms VAD frames, as fed by the segmenter
+SEGMENT_SECONDS = (2, 5, 10, 20)
+TEST_AUDIO = os.path.join(os.path.dirname(__file__), 'test_audio', '1min_medium_pace_audio.mp3')
+
+def load_speech():
+    try:
+        from audio_loader import AudioLoader
+        return AudioLoader(SAMPLE_RATE).load_audio(TEST_AUDIO)
+    except Exception as e:
+        print(f"Could not load {TEST_AUDIO} ({e}), using synthetic audio")
+        rng = np.random.default_rng(0)
+        return (rng.standard_normal(60 * SAMPLE_RATE) * 0.05).astype(np.float32)
+
+def stream_features(extractor, audio):
+    """Feed the segment frame by frame, as the segmenter does while speech arrives"""
+    extractor.reset()
+    start = time.perf_counter()
+    for end in range(FRAME_SIZE, len(audio) + 1, FRAME_SIZE):
+        extractor.update(audio[:end])
+    return (time.perf_counter() - start) / max(1, len(audio) // FRAME_SIZE)
+
+def best_of(fn, repeats=5):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def benchmark_features(speech, n_mels=80):
+    extractor = IncrementalLogMel(n_mels)
+    print(f"\nFeature stage after end-of-speech ({n_mels} mels, best of 5)")
+    print(f"{'Segment':>8} | {'Full log-mel (ms)':>17} | {'Finalize (ms)':>13} | {'Per-frame update (us)':>21}")
+    for seconds in SEGMENT_SECONDS:
+        audio = speech[:seconds * SAMPLE_RATE]
+        full = best_of(lambda: whisper.log_mel_spectrogram(audio, n_mels, padding=N_SAMPLES))
+
+        per_frame = stream_features(extractor, audio)
+        def finalize():
+            # finalize() recomputes nothing that update() already finished, so repeat it from the same state
+            frames_done = extractor.frames_done
+            extractor.finalize(audio)
+            extractor.frames_done = frames_done
+        incremental = best_of(finalize)
+        print(f"{seconds:>7}s | {full * 1000:>17.2f} | {incremental * 1000:>13.2f} | {per_frame * 1e6:>21.1f}")
+
+def benchmark_latency(speech, model_size):
+    try:
+        backend = create_backend("whisper", model_size, "cpu")
+    except Exception as e:
+        print(f"\nSkipping end-to-end latency, could not load whisper '{model_size}': {e}")
+        return
+    backend.warm_up()
+
+    extractor = IncrementalLogMel(backend.feature_mels)
+    options = backend.fast_decode_options
+    print(f"\nEnd-of-speech -> text latency, whisper '{model_size}' on CPU (best of 3)")
+    print(f"{'Segment':>8} | {'Audio path (ms)':>15} | {'Incremental (ms)':>16} | {'Saved (ms)':>10}")
+    for seconds in SEGMENT_SECONDS:
+        audio = speech[:seconds * SAMPLE_RATE]
+        audio_path = best_of(lambda: backend.transcribe(audio, language="en", **options), repeats=3)
+
+        def incremental_path():
+            stream_features(extractor, audio)       # Happens during speech, not timed
+            start = time.perf_counter()
+            features = extractor.finalize(audio)
+            backend.transcribe_features(features, audio, language="en", **options)
+            return time.perf_counter() - start
+        incremental = min(incremental_path() for _ in range(3))
+        print(f"{seconds:>7}s | {audio_path * 1000:>15.1f} | {incremental * 1000:>16.1f} | "
+              f"{(audio_path - incremental) * 1000:>10.1f}")
+
+def main():
+    model_size = sys.argv[1] if len(sys.argv) > 1 else "tiny"
+    speech = load_speech()
+    benchmark_features(speech)
+    benchmark_latency(speech, model_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the VAD framing path in transcriber.py
+
+Compares the old framing loop (np.concatenate per block, slice per frame, tobytes per
+VAD call) with the preallocated FrameRingBuffer (in-place writes, zero-copy memoryview
+frames). VAD itself is not called, so only the framing overhead is measured.
+
+Run: python benchmark_framing.py
+"""
+
+import os
+import sys
+import time
+import numpy as np
+
+# Add transcriber_app to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from transcriber_app.audio_buffers import FrameRingBuffer
+
+SAMPLE_RATE = 16000
+BLOCK_SIZE = 480            # Matches AudioStream blocksize
+AUDIO_SECONDS = 600         # Amount of audio pushed through each framing path
+
+def make_blocks():
+    rng = np.random.default_rng(0)
+    audio = rng.integers(-3000, 3000, SAMPLE_RATE * AUDIO_SECONDS, dtype=np.int16)
+    return [audio[i:i + BLOCK_SIZE] for i in range(0, len(audio), BLOCK_SIZE)]
+
+def legacy_framing(blocks, frame_size):
+    """The original loop: concatenate per block, slice + tobytes per frame"""
+    frames = 0
+    buffer = np.empty((0,), dtype=np.int16)
+    for pcm in blocks:
+        buffer = np.concatenate((buffer, pcm))
+        while len(buffer) >= frame_size:
+            frame = buffer[:frame_size]
+            buffer = buffer[frame_size:]
+            frame_bytes = frame.tobytes()
+            frames += 1
+    return frames
+
+def ring_framing(blocks, frame_size):
+    """The ring buffer loop used by VADSegmenter.run"""
+    frames = 0
+    buffer = FrameRingBuffer(capacity=SAMPLE_RATE, max_frame_size=int(SAMPLE_RATE * 30 / 1000))
+    for pcm in blocks:
+        written = 0
+        while written < len(pcm):
+            written += buffer.write(pcm[written:])
+            for frame, frame_bytes in buffer.read_frames(frame_size):
+                frames += 1
+    return frames
+
+def time_framing(framing_fn, blocks, frame_size, repeats=3):
+    """Best-of-N frames per second"""
+    best = 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        frames = framing_fn(blocks, frame_size)
+        elapsed = time.perf_counter() - start
+        best = max(best, frames / elapsed)
+    return best
+
+def main():
+    blocks = make_blocks()
+    print(f"\nFraming benchmark: {AUDIO_SECONDS}s of audio in {BLOCK_SIZE}-sample blocks")
+    print(f"{'Frame':>8} | {'Legacy (frames/s)':>18} | {'Ring (frames/s)':>16} | {'Speed-up':>8}")
+    for frame_duration_ms in (10, 20, 30):
+        frame_size = int(SAMPLE_RATE * frame_duration_ms / 1000)
+        legacy = time_framing(legacy_framing, blocks, frame_size)
+        ring = time_framing(ring_framing, blocks, frame_size)
+        print(f"{frame_duration_ms:>6}ms | {legacy:>18,.0f} | {ring:>16,.0f} | {ring / legacy:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+fp32 vs int8 (dynamic quantization) Whisper benchmark on CPU
+
+For each test file, transcribes the whole recording with the "whisper" and "whisper-int8"
+backends and reports:
+- RTF: transcription time / audio duration (lower is better, < 1 is faster than real time)
+- peak RSS: peak resident memory of the process, model load included
+- WER: against the reference transcript (same normalisation as MetricsCollector)
+
+Each backend runs in its own process so peak RSS isn't shared between them.
+The 5 minute file has no transcript of its own; it is scored against the start of
+medium_pace_transcript.txt (the full talk), cut to the hypothesis length, so treat
+that WER as approximate.
+
+Run: python benchmark_quantization.py [model_size]
+"""
+
+import os
+import sys
+import json
+import time
+import resource
+import subprocess
+from pathlib import Path
+
+# Add transcriber_app to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+SAMPLE_RATE = 16000
+BACKENDS = ("whisper", "whisper-int8")
+TEST_AUDIO_DIR = Path(__file__).parent / "test_audio"
+TEST_FILES = ("10sec_medium_pace_audio.mp3", "1min_medium_pace_audio.mp3", "5min_medium_pace_audio.mp3")
+FULL_REFERENCE = TEST_AUDIO_DIR / "medium_pace_transcript.txt"
+
+def peak_rss_mb():
+    # ru_maxrss is in KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+def load_reference(audio_file, hypothesis):
+    transcript_file = audio_file.with_suffix('.txt')
+    if transcript_file.exists():
+        return transcript_file.read_text(), False
+    words = FULL_REFERENCE.read_text().split()
+    return " ".join(words[:len(hypothesis.split())]), True
+
+def run_backend(backend_name, model_size):
+    """Worker process: load one backend, transcribe every file, print the results as JSON"""
+    from jiwer import wer
+    from audio_loader import AudioLoader
+    from metrics_collector import transform
+    from transcriber_app.asr_backends import create_backend
+
+    start = time.perf_counter()
+    backend = create_backend(backend_name, model_size, "cpu")
+    load_seconds = time.perf_counter() - start
+    backend.warm_up((1.0,))
+
+    loader = AudioLoader(SAMPLE_RATE)
+    results = []
+    for name in TEST_FILES:
+        audio_file = TEST_AUDIO_DIR / name
+        audio = loader.load_audio(audio_file)
+
+        start = time.perf_counter()
+        hypothesis = backend.transcribe(audio, language="en")["text"]
+        elapsed = time.perf_counter() - start
+
+        reference, approximate = load_reference(audio_file, hypothesis)
+        results.append({
+            'file': name,
+            'rtf': elapsed / (len(audio) / SAMPLE_RATE),
+            'wer': wer(reference, hypothesis, reference_transform=transform, hypothesis_transform=transform),
+            'approximate_reference': approximate,
+            'peak_rss_mb': peak_rss_mb()
+        })
+
+    print(json.dumps({'backend': backend_name, 'load_seconds': load_seconds, 'results': results}))
+
+def main():
+    model_size = sys.argv[1] if len(sys.argv) > 1 else "small"
+    print(f"\nfp32 vs int8 Whisper '{model_size}' on CPU")
+
+    reports = []
+    for backend_name in BACKENDS:
+        completed = subprocess.run(
+            [sys.executable, __file__, "--worker", backend_name, model_size],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        if completed.returncode != 0:
+            print(f"{backend_name} failed:\n{completed.stderr[-2000:]}")
+            continue
+        reports.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    print(f"\n{'Backend':>13} | {'File':>28} | {'RTF':>6} | {'WER':>6} | {'Peak RSS (MB)':>13}")
+    for report in reports:
+        for result in report['results']:
+            wer_text = f"{result['wer']:.3f}" + ("*" if result['approximate_reference'] else "")
+            print(f"{report['backend']:>13} | {result['file']:>28} | {result['rtf']:>6.3f} | "
+                  f"{wer_text:>6} | {result['peak_rss_mb']:>13.0f}")
+    for report in reports:
+        print(f"{report['backend']} model load: {report['load_seconds']:.1f}s")
+    print("* scored against an approximate reference (see module docstring)")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        run_backend(sys.argv[2], sys.argv[3])
+    else:
+        main()
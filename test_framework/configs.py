@@ -9,7 +9,8 @@ TEST_CONFIGS = {
         {'chunk_size': 1.0, 'description': 'Small chunks (1.0s)'},
         {'chunk_size': 1.5, 'description': 'Medium chunks (1.5s)'},
         {'chunk_size': 2.5, 'description': 'Large chunks (2.5s)'},
-        {'chunk_size': 3.0, 'description': 'Very large chunks (3.0s)'}
+        {'chunk_size': 3.0, 'description': 'Very large chunks (3.0s)'},
+        {'chunk_size': 2.5, 'overlap': 0.5, 'description': 'Large chunks, 0.5s overlap'}
     ],
     
     'vad': [
@@ -23,6 +23,7 @@ from datetime import datetime
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from metrics_collector import MetricsCollector
+from audio_loader import AudioLoader
 from configs import TEST_CONFIGS, AUDIO_CATEGORIES
 from transcriber_app.main import start_transcription_pipeline, start_transcription_pipeline_with_virtual_audio, stop_transcription_pipeline
 import transcriber_app.main as main_module
@@ -39,6 +40,7 @@ class TestRunner:
         self.results_dir.mkdir(exist_ok=True)       # Creates directory if it doesn't exist
         
         self.results = []                           # Creates empty list to store test results
+        self.audio_loader = AudioLoader(16000)      # Decodes each test file once, into its PCM cache
         
     def find_audio_files(self):
         """Find audio files in test_audio directory"""
@@ -170,8 +172,9 @@ class TestRunner:
             
             # Start transcription pipeline with virtual audio injection
             print(f"\nStarting transcription with virtual audio...")
+            # Decoded once into the PCM cache, then memory-mapped for every later config and repeat
             start_transcription_pipeline_with_virtual_audio(
-                audio_file_path=str(audio_file),
+                audio_file_path=self.audio_loader.load_pcm(audio_file),
                 metrics_collector=metrics_collector,
                 real_time_simulation=False,  # Faster testing without real-time delays
                 config=config  # Pass the configuration to the transcription pipeline
@@ -179,11 +182,16 @@ class TestRunner:
             
             # Wait for transcription to complete
             # The virtual audio stream will automatically finish when all audio is processed
-            while main_module.transcription_thread and main_module.transcription_thread.is_alive():
+            while main_module.is_transcription_running():
                 time.sleep(0.1)
             
+            # A replay that failed partway (e.g. a decode error) would score a truncated transcript
+            stream_stats = main_module.get_audio_stream_stats()
+            
             # Stop transcription
             stop_transcription_pipeline()
+            if stream_stats and stream_stats.get('error'):
+                raise RuntimeError(f"Audio replay failed: {stream_stats['error']}")
             
             # Get results
             latency_metrics = metrics_collector.calculate_latency()
@@ -269,4 +269,51 @@ def test_priority_based_adjustments():
     # All three should be adjusted
     assert new_parameters['aggressiveness'] == 3  # Low confidence should increase (but already at max)
     assert new_parameters['max_silence_frames'] == 4  # High silence ratio should decrease
-    assert new_parameters['frame_duration_ms'] == 10  # High WPM should use smaller frames 
\ No newline at end of file
+    assert new_parameters['frame_duration_ms'] == 10  # High WPM should use smaller frames 
+
+def test_load_shedding_steps_down_while_falling_behind():
+    """A growing backlog walks through the cheaper decode modes, one step at a time"""
+    controller = AdaptiveController(backlog_threshold_high=3)
+    assert controller.get_decode_mode() == 'full'
+
+    # The first slow segment alone doesn't trigger a switch
+    assert controller.update_load(pending_segments=4, rtf=1.2) is None
+    assert controller.update_load(pending_segments=4, rtf=1.2) == 'no_fallback'
+
+    # Each switch gets a segment to take effect before the next one
+    assert controller.update_load(pending_segments=5, rtf=1.2) is None
+    assert controller.update_load(pending_segments=6, rtf=1.1) == 'smaller_model'
+
+    # Already at the cheapest mode
+    controller.update_load(pending_segments=6, rtf=1.1)
+    assert controller.update_load(pending_segments=6, rtf=1.1) is None
+    assert controller.get_decode_mode() == 'smaller_model'
+
+def test_load_shedding_steps_back_up_once_backlog_clears():
+    controller = AdaptiveController(load_recovery_segments=3)
+    controller.update_load(pending_segments=0, rtf=2.0)
+    assert controller.update_load(pending_segments=0, rtf=2.0) == 'no_fallback'
+
+    # Needs several calm segments in a row; a busy one resets the count
+    assert controller.update_load(pending_segments=0, rtf=0.2) is None
+    assert controller.update_load(pending_segments=1, rtf=0.2) is None
+    assert controller.update_load(pending_segments=0, rtf=0.2) is None
+    assert controller.update_load(pending_segments=0, rtf=0.2) is None
+    assert controller.update_load(pending_segments=0, rtf=0.2) == 'full'
+
+def test_load_shedding_mode_switches_in_status():
+    controller = AdaptiveController()
+    controller.update_load(pending_segments=5, rtf=0.8)
+    controller.update_load(pending_segments=5, rtf=0.8)
+
+    status = controller.get_status()
+    assert status['decode_mode'] == 'no_fallback'
+    assert status['mode_switch_count'] == 1
+    switch = status['mode_switches'][0]
+    assert (switch['from'], switch['to']) == ('full', 'no_fallback')
+    assert switch['pending_segments'] == 5
+    assert 'time' in switch and 'reason' in switch
+
+    controller.reset()
+    assert controller.get_status()['decode_mode'] == 'full'
+    assert controller.get_status()['mode_switches'] == []
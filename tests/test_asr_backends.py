@@ -0,0 +1,198 @@
+import sys
+import types
+import pytest
+import numpy as np
+from transcriber_app.asr_backends import create_backend, WhisperBackend, FasterWhisperBackend
+
+def test_create_backend_unknown_name():
+    with pytest.raises(ValueError, match="Unknown ASR backend"):
+        create_backend("not-a-backend", "tiny", "cpu")
+
+def test_whisper_backend_passes_fp16_and_language(mocker):
+    mock_model = mocker.Mock()
+    mock_model.transcribe.return_value = {"text": "hello", "segments": []}
+    mocker.patch("transcriber_app.asr_backends.whisper.load_model", return_value=mock_model)
+
+    backend = create_backend("whisper", "tiny", "cpu")
+    assert isinstance(backend, WhisperBackend)
+    assert backend.model is mock_model
+
+    audio = np.zeros(16000, dtype=np.float32)
+    result = backend.transcribe(audio, language="en")
+    assert result["text"] == "hello"
+    _, kwargs = mock_model.transcribe.call_args
+    assert kwargs["fp16"] is False
+    assert kwargs["language"] == "en"
+
+def test_faster_whisper_backend_returns_whisper_result_shape(mocker):
+    # Fake faster_whisper module so the test doesn't need CTranslate2 installed
+    segment = types.SimpleNamespace(start=0.0, end=1.0, text=" hello world", avg_logprob=-0.2, no_speech_prob=0.01)
+    info = types.SimpleNamespace(language="en")
+    mock_model = mocker.Mock()
+    mock_model.transcribe.return_value = (iter([segment]), info)
+    fake_module = types.SimpleNamespace(WhisperModel=mocker.Mock(return_value=mock_model))
+    mocker.patch.dict(sys.modules, {"faster_whisper": fake_module})
+
+    backend = create_backend("faster-whisper", "small", "cpu")
+    assert isinstance(backend, FasterWhisperBackend)
+
+    # int8 is the default compute type on CPU
+    fake_module.WhisperModel.assert_called_once_with("small", device="cpu", compute_type="int8")
+
+    result = backend.transcribe(np.zeros(16000, dtype=np.float32))
+    assert result["text"] == " hello world"
+    assert result["segments"][0]["avg_logprob"] == -0.2
+    assert result["language"] == "en"
+
+def test_faster_whisper_backend_size_from_model_files(mocker, tmp_path):
+    fake_module = types.SimpleNamespace(WhisperModel=mocker.Mock())
+    mocker.patch.dict(sys.modules, {"faster_whisper": fake_module})
+    (tmp_path / "model.bin").write_bytes(b"\0" * 1000)
+    (tmp_path / "vocabulary.txt").write_bytes(b"\0" * 50)
+
+    backend = create_backend("faster-whisper", str(tmp_path), "cpu")
+    assert backend.memory_bytes() == 1000
+
+def test_faster_whisper_backend_missing_package(mocker):
+    mocker.patch.dict(sys.modules, {"faster_whisper": None})
+    with pytest.raises(ImportError, match="faster-whisper"):
+        create_backend("faster-whisper", "small", "cpu")
+
+def test_warm_up_runs_decodes_at_each_length(mocker):
+    mock_model = mocker.Mock()
+    mock_model.transcribe.return_value = {"text": "", "segments": []}
+    mocker.patch("transcriber_app.asr_backends.whisper.load_model", return_value=mock_model)
+
+    backend = create_backend("whisper", "tiny", "cpu")
+    assert backend.is_warm is False
+
+    backend.warm_up(segment_seconds=(1.0, 2.5))
+    assert backend.is_warm is True
+    lengths = [len(call.args[0]) for call in mock_model.transcribe.call_args_list]
+    assert lengths == [16000, 40000]
+    # The settings sessions start with ('full'), temperature fallback included
+    assert "temperature" not in mock_model.transcribe.call_args.kwargs
+
+def test_warm_up_runs_the_feature_path_sessions_use(mocker):
+    mock_model = mocker.Mock()
+    mock_model.dims.n_mels = 80
+    mocker.patch("transcriber_app.asr_backends.whisper.load_model", return_value=mock_model)
+    backend = create_backend("whisper", "tiny", "cpu")
+    transcribe_features = mocker.patch.object(backend, "transcribe_features",
+                                              return_value={"text": "", "segments": []})
+
+    backend.warm_up(segment_seconds=(1.0,), features=True)
+    features, audio = transcribe_features.call_args.args
+    assert features.shape == (80, 3000) and len(audio) == 16000
+    mock_model.transcribe.assert_not_called()
+
+def test_whisper_backend_transcribe_features_falls_back_on_temperature(mocker):
+    mock_model = mocker.Mock()
+    mock_model.device = "cpu"
+    mocker.patch("transcriber_app.asr_backends.whisper.load_model", return_value=mock_model)
+
+    # Greedy decode is too repetitive, the first sampled one is fine
+    repetitive = types.SimpleNamespace(text="la la la", tokens=[1], avg_logprob=-0.3,
+                                       compression_ratio=3.0, no_speech_prob=0.01)
+    good = types.SimpleNamespace(text="hello world", tokens=[2], avg_logprob=-0.2,
+                                 compression_ratio=1.2, no_speech_prob=0.01)
+    mock_decode = mocker.patch("transcriber_app.asr_backends.whisper.decode", side_effect=[repetitive, good])
+
+    backend = create_backend("whisper", "tiny", "cpu")
+    features = np.zeros((80, 3000), dtype=np.float32)
+    result = backend.transcribe_features(features, np.zeros(16000, dtype=np.float32), beam_size=5)
+
+    assert result["text"] == " hello world"
+    assert result["segments"][0]["temperature"] == 0.2
+    assert result["segments"][0]["avg_logprob"] == -0.2
+
+    greedy_options = mock_decode.call_args_list[0].args[2]
+    sampled_options = mock_decode.call_args_list[1].args[2]
+    assert greedy_options.beam_size == 5 and greedy_options.fp16 is False
+    assert sampled_options.beam_size is None
+
+def test_whisper_backend_transcribe_features_drops_silence(mocker):
+    mock_model = mocker.Mock()
+    mock_model.device = "cpu"
+    mocker.patch("transcriber_app.asr_backends.whisper.load_model", return_value=mock_model)
+    silence = types.SimpleNamespace(text="you", tokens=[3], avg_logprob=-1.5,
+                                    compression_ratio=1.0, no_speech_prob=0.9)
+    mock_decode = mocker.patch("transcriber_app.asr_backends.whisper.decode", return_value=silence)
+
+    backend = create_backend("whisper", "tiny", "cpu")
+    result = backend.transcribe_features(np.zeros((80, 3000), dtype=np.float32), np.zeros(16000, dtype=np.float32))
+
+    # No temperature fallback for silence, and no text
+    assert mock_decode.call_count == 1
+    assert result["text"] == "" and result["segments"] == []
+
+def tiny_random_whisper():
+    """A small randomly initialised Whisper model, so no checkpoint has to be downloaded"""
+    from whisper.model import Whisper, ModelDimensions
+    dims = ModelDimensions(n_mels=80, n_audio_ctx=1500, n_audio_state=64, n_audio_head=2, n_audio_layer=2,
+                           n_vocab=51865, n_text_ctx=448, n_text_state=64, n_text_head=2, n_text_layer=2)
+    return Whisper(dims).eval()
+
+def test_quantized_whisper_backend_uses_int8_linear_layers(mocker):
+    import torch
+    model = tiny_random_whisper()
+    mocker.patch("transcriber_app.asr_backends.whisper.load_model", return_value=model)
+    mel = torch.randn(1, 80, 3000)
+    with torch.no_grad():
+        reference = model.encoder(mel)
+
+    backend = create_backend("whisper-int8", "tiny", "cpu")
+    assert backend.quantized
+    assert not any(isinstance(module, torch.nn.Linear) for module in backend.model.modules())
+    assert any(isinstance(module, torch.ao.nn.quantized.dynamic.Linear) for module in backend.model.modules())
+
+    # Same model, small quantization error
+    with torch.no_grad():
+        quantized = backend.model.encoder(mel)
+    assert torch.nn.functional.cosine_similarity(reference.flatten(), quantized.flatten(), dim=0) > 0.99
+
+def test_quantized_whisper_backend_is_cpu_only(mocker):
+    mocker.patch("transcriber_app.asr_backends.whisper.load_model", return_value=tiny_random_whisper())
+    with pytest.raises(ValueError, match="only supported on CPU"):
+        create_backend("whisper-int8", "tiny", "cuda")
+
+def test_whisper_backend_transcribe_batch_decodes_once_and_falls_back_per_segment(mocker):
+    mock_model = mocker.Mock()
+    mock_model.device = "cpu"
+    mock_model.dims.n_mels = 80
+    mocker.patch("transcriber_app.asr_backends.whisper.load_model", return_value=mock_model)
+
+    good = types.SimpleNamespace(text="hello", tokens=[1], avg_logprob=-0.2,
+                                 compression_ratio=1.2, no_speech_prob=0.01)
+    repetitive = types.SimpleNamespace(text="la la la", tokens=[2], avg_logprob=-0.3,
+                                       compression_ratio=3.0, no_speech_prob=0.01)
+    retried = types.SimpleNamespace(text="world", tokens=[3], avg_logprob=-0.2,
+                                    compression_ratio=1.1, no_speech_prob=0.01)
+    mock_decode = mocker.patch("transcriber_app.asr_backends.whisper.decode",
+                               side_effect=[[good, repetitive], retried])
+
+    backend = create_backend("whisper", "tiny", "cpu")
+    assert backend.supports_batching
+    audio = [np.zeros(16000, dtype=np.float32), np.zeros(32000, dtype=np.float32)]
+    results = backend.transcribe_batch(audio, [np.zeros((80, 3000), dtype=np.float32), None])
+
+    assert [result["text"] for result in results] == [" hello", " world"]
+    assert results[1]["segments"][0]["temperature"] == 0.2
+    assert results[1]["segments"][0]["end"] == 2.0
+
+    # One padded batch of full windows, then only the repetitive segment again
+    batch_mel = mock_decode.call_args_list[0].args[1]
+    assert tuple(batch_mel.shape) == (2, 80, 3000)
+    assert mock_decode.call_count == 2
+
+def test_warm_up_decodes_hold_the_decode_lock(mocker):
+    mock_model = mocker.Mock()
+    mocker.patch("transcriber_app.asr_backends.whisper.load_model", return_value=mock_model)
+    backend = create_backend("whisper", "tiny", "cpu")
+
+    # A session decoding on the shared model at the same time must not overlap with warm-up
+    locked = []
+    mock_model.transcribe.side_effect = lambda *args, **kwargs: locked.append(backend.decode_lock.locked())
+    backend.warm_up(segment_seconds=(1.0, 2.0))
+    assert locked == [True, True]
+    assert not backend.decode_lock.locked()
@@ -0,0 +1,297 @@
+import time
+import queue
+import pytest
+import numpy as np
+from transcriber_app.audio_buffers import FrameRingBuffer, SegmentBuffer, AudioRingBuffer
+
+# -------------- FrameRingBuffer Tests --------------
+
+def test_ring_buffer_returns_frames_in_order():
+    ring = FrameRingBuffer(capacity=1000, max_frame_size=320)
+    ring.write(np.arange(640, dtype=np.int16))
+
+    first, _ = ring.read_frame(320)
+    second, _ = ring.read_frame(320)
+    assert np.array_equal(first, np.arange(320, dtype=np.int16))
+    assert np.array_equal(second, np.arange(320, 640, dtype=np.int16))
+    assert len(ring) == 0
+    assert ring.read_frame(320) is None
+
+def test_ring_buffer_wraps_without_reallocating():
+    ring = FrameRingBuffer(capacity=1000, max_frame_size=480)
+    storage = ring.buffer
+    expected = np.empty(0, dtype=np.int16)
+    received = []
+
+    # Feed 480-sample blocks and read 320-sample frames so frames straddle the wrap point
+    for block_index in range(20):
+        block = np.arange(block_index * 480, (block_index + 1) * 480, dtype=np.int16)
+        expected = np.concatenate((expected, block))
+        ring.write(block)
+        while len(ring) >= 320:
+            received.append(ring.read_frame(320)[0].copy())
+
+    assert ring.buffer is storage
+    assert np.array_equal(np.concatenate(received), expected[:len(received) * 320])
+
+def test_ring_buffer_frames_are_views():
+    ring = FrameRingBuffer(capacity=1000, max_frame_size=320)
+    ring.write(np.ones(320, dtype=np.int16))
+    frame, frame_bytes = ring.read_frame(320)
+    assert np.shares_memory(frame, ring.buffer)
+    assert frame_bytes.obj is ring.buffer
+
+def test_ring_buffer_partial_write_when_full():
+    ring = FrameRingBuffer(capacity=500, max_frame_size=320)
+    written = ring.write(np.ones(800, dtype=np.int16))
+    assert written == 500
+    assert ring.free_space() == 0
+    assert ring.write(np.ones(10, dtype=np.int16)) == 0
+
+def test_ring_buffer_rejects_oversized_frames():
+    ring = FrameRingBuffer(capacity=1000, max_frame_size=320)
+    ring.write(np.ones(640, dtype=np.int16))
+    with pytest.raises(ValueError):
+        ring.read_frame(480)
+
+def test_ring_buffer_frame_bytes_are_byte_sized():
+    # webrtcvad uses len(buf) / 2 as the sample count
+    ring = FrameRingBuffer(capacity=1000, max_frame_size=320)
+    ring.write(np.arange(900, dtype=np.int16))
+    ring.read_frame(320)
+    ring.read_frame(320)
+    ring.write(np.arange(500, dtype=np.int16))
+    frame, frame_bytes = ring.read_frame(320)       # Straddles the wrap point
+    assert len(frame_bytes) == 640
+    assert frame_bytes.tobytes() == frame.tobytes()
+
+def test_ring_buffer_read_frames_drains_complete_frames():
+    ring = FrameRingBuffer(capacity=1000, max_frame_size=320)
+    ring.write(np.arange(700, dtype=np.int16))
+    frames = [frame.copy() for frame, _ in ring.read_frames(320)]
+    assert len(frames) == 2
+    assert np.array_equal(frames[1], np.arange(320, 640, dtype=np.int16))
+    assert len(ring) == 60
+
+def test_ring_buffer_frame_views_across_wrap_point():
+    ring = FrameRingBuffer(capacity=1000, max_frame_size=160)
+    ring.write(np.zeros(800, dtype=np.int16))
+    for _ in ring.read_frames(160):     # Next frame starts at 800, 200 samples before the wrap point
+        pass
+
+    rng = np.random.default_rng(0)
+    audio = rng.integers(-3000, 3000, 900).astype(np.int16)
+    assert ring.write(audio) == 900
+
+    runs = ring.frame_views(160)
+    assert len(runs) == 2
+    assert np.array_equal(np.concatenate(runs), audio[:800].reshape(-1, 160))
+
+    # Nothing consumed
+    assert len(ring) == 900
+    assert np.array_equal(ring.read_frame(160)[0], audio[:160])
+
+# -------------- SegmentBuffer Tests --------------
+
+def test_segment_buffer_matches_legacy_conversion():
+    frames = [np.random.randint(-32768, 32767, 320).astype(np.int16) for _ in range(5)]
+    segments = SegmentBuffer(block_seconds=1)
+    for frame in frames:
+        segments.append(frame)
+
+    audio_float = segments.finalize()
+    expected = np.concatenate(frames).astype(np.float32) / 32767.0
+    assert audio_float.dtype == np.float32
+    assert np.array_equal(audio_float, expected)
+    assert len(segments) == 0
+
+def test_segment_buffer_finalize_is_a_view():
+    segments = SegmentBuffer(block_seconds=1)
+    segments.append(np.ones(320, dtype=np.int16))
+    audio_float = segments.finalize()
+    assert np.shares_memory(audio_float, segments.storage)
+
+def test_segment_buffer_keeps_finalized_segments_intact():
+    segments = SegmentBuffer(block_seconds=0.05)    # 800 samples per block
+    segments.append(np.full(320, 100, dtype=np.int16))
+    first = segments.finalize()
+
+    # The next segment doesn't fit in what is left of the block, so it moves to a new one
+    for _ in range(4):
+        segments.append(np.full(320, 200, dtype=np.int16))
+    second = segments.finalize()
+
+    assert np.allclose(first, 100 / 32767.0)
+    assert len(second) == 1280
+    assert np.allclose(second, 200 / 32767.0)
+
+def test_segment_buffer_discard_drops_open_segment():
+    segments = SegmentBuffer(block_seconds=1)
+    segments.append(np.ones(320, dtype=np.int16))
+    segments.discard()
+    assert len(segments) == 0
+    segments.append(np.full(160, 2, dtype=np.int16))
+    assert len(segments.finalize()) == 160
+
+# -------------- AudioRingBuffer Tests --------------
+
+def test_audio_ring_buffer_wraps_in_variable_blocks():
+    ring = AudioRingBuffer(capacity=1000, block_size=300)
+    data = np.arange(1600, dtype=np.int16)
+
+    read = []
+    for start in range(0, 1600, 400):
+        assert ring.write(data[start:start + 400]) == 400
+        while (block := ring.read(max_samples=250)) is not None:
+            read.append(block.copy())
+    np.testing.assert_array_equal(np.concatenate(read), data)
+    # Blocks never span the end of the storage
+    assert max(len(block) for block in read) <= 250
+    assert ring.overflow_count == 0
+
+def test_audio_ring_buffer_converts_float_in_place():
+    ring = AudioRingBuffer(capacity=10)
+    ring.write_float(np.array([0.5, -0.5, 1.0], dtype=np.float32))
+    np.testing.assert_array_equal(ring.get(), np.array([16383, -16383, 32767], dtype=np.int16))
+
+def test_audio_ring_buffer_counts_overflow_and_underflow():
+    ring = AudioRingBuffer(capacity=1000, max_backlog=1000)
+    assert ring.read() is None
+    assert ring.underflow_count == 1
+
+    assert ring.write(np.zeros(800, dtype=np.int16)) == 800
+    assert ring.write(np.ones(300, dtype=np.int16)) == 200      # Only 200 samples of space left
+    stats = ring.get_stats()
+    assert (stats['buffered_samples'], stats['overflow_count'], stats['overflow_samples'],
+            stats['underflow_count']) == (1000, 1, 100, 1)
+    assert stats['dropped_seconds']['overflow'] == 100 / 16000
+
+    # A block handed out by read() keeps its space until the next read
+    block = ring.read()
+    assert len(block) == 1000 and ring.write(np.ones(10, dtype=np.int16)) == 0
+    assert ring.read() is None
+    assert ring.write(np.ones(10, dtype=np.int16)) == 10
+
+def test_audio_ring_buffer_get_waits_and_ends_on_close():
+    import threading
+    ring = AudioRingBuffer(capacity=1000, poll_interval=0.001)
+
+    def produce():
+        for _ in range(5):
+            ring.write(np.ones(100, dtype=np.int16))
+            time.sleep(0.002)
+        ring.put(None)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    total = 0
+    while (block := ring.get()) is not None:
+        total += len(block)
+    producer.join()
+    assert total == 500
+
+    with pytest.raises(queue.Empty):
+        AudioRingBuffer(capacity=10).get(timeout=0.01)
+
+def test_audio_ring_buffer_drop_oldest_keeps_newest_backlog():
+    ring = AudioRingBuffer(capacity=1000, max_backlog=500, overflow_policy='drop-oldest')
+    ring.write(np.arange(900, dtype=np.int16))
+
+    np.testing.assert_array_equal(ring.read(), np.arange(400, 900))
+    assert ring.get_stats()['dropped_seconds']['oldest'] == 400 / 16000
+
+def test_audio_ring_buffer_drops_silence_before_speech():
+    class LoudIsSpeech:
+        def is_speech(self, frame_bytes, sample_rate):
+            return np.abs(np.frombuffer(frame_bytes, dtype=np.int16)).max() > 100
+
+    # 30ms frames (480 samples): speech, silence, speech, silence, speech
+    frames = [np.full(480, value, dtype=np.int16) for value in (1000, 0, 2000, 0, 3000)]
+    ring = AudioRingBuffer(capacity=4800, max_backlog=1440, overflow_policy='drop-silence-first', vad=LoudIsSpeech())
+    ring.write(np.concatenate(frames))
+
+    # Two frames over the limit: both silent frames go, every speech frame is kept in order
+    kept = ring.read().copy()
+    kept = np.concatenate([kept] + [block.copy() for block in iter(ring.read, None)])
+    np.testing.assert_array_equal(kept, np.concatenate([frames[0], frames[2], frames[4]]))
+    dropped = ring.get_stats()['dropped_seconds']
+    assert dropped['silence'] == 960 / 16000 and dropped['speech'] == 0
+
+    with pytest.raises(ValueError):
+        AudioRingBuffer(overflow_policy='drop-silence-first')
+
+def test_audio_ring_buffer_classifies_each_frame_once_while_shedding():
+    class CountingVAD:
+        calls = 0
+        def is_speech(self, frame_bytes, sample_rate):
+            self.calls += 1
+            return np.abs(np.frombuffer(frame_bytes, dtype=np.int16)).max() > 100
+
+    # An overloaded consumer: 20 frames arrive for every frame it reads, for a while
+    vad = CountingVAD()
+    ring = AudioRingBuffer(capacity=48000, max_backlog=4800, overflow_policy='drop-silence-first', vad=vad)
+    written = 0
+    for i in range(50):
+        for k in range(20):
+            ring.write(np.full(480, 1000 if k % 2 else 0, dtype=np.int16))
+            written += 1
+        ring.read(480)
+
+    # The backlog is re-shed on every read, but no frame went through the VAD twice
+    assert vad.calls <= written
+    assert ring.get_stats()['dropped_seconds']['silence'] > 0
+    assert len(ring) <= 4800 + 20 * 480
+
+def test_audio_ring_buffer_spills_to_disk_without_loss():
+    ring = AudioRingBuffer(capacity=1000, max_backlog=300, overflow_policy='spill-to-disk')
+    data = np.arange(3000, dtype=np.int16)
+
+    read = []
+    for start in range(0, 3000, 600):
+        ring.write(data[start:start + 600])
+        read.append(ring.get().copy())
+    ring.close()
+    while (block := ring.get()) is not None:
+        read.append(block.copy())
+
+    np.testing.assert_array_equal(np.concatenate(read), data)
+    stats = ring.get_stats()
+    assert stats['spilled_seconds'] > 0 and sum(stats['dropped_seconds'].values()) == 0
+    assert ring.spill_file is None      # Removed once the stream is drained
+
+def test_audio_ring_buffer_block_policy_waits_for_the_reader():
+    import threading
+    ring = AudioRingBuffer(capacity=1000, overflow_policy='block', poll_interval=0.001)
+    data = np.arange(5000, dtype=np.int16)
+
+    def produce():
+        for start in range(0, 5000, 700):
+            ring.write(data[start:start + 700])
+        ring.close()
+    producer = threading.Thread(target=produce)
+    producer.start()
+    read = []
+    while (block := ring.get()) is not None:
+        read.append(block.copy())
+    producer.join()
+
+    np.testing.assert_array_equal(np.concatenate(read), data)
+    assert ring.overflow_count == 0
+
+def test_audio_ring_buffer_clips_resampled_full_scale_audio():
+    from transcriber_app.resampler import PolyphaseResampler
+    # A full-scale square wave: the resampling filter rings past +-1 at every edge
+    t = np.arange(48000)
+    square = np.where((t // 60) % 2 == 0, 1.0, -1.0).astype(np.float32)
+    resampled = PolyphaseResampler(48000, 16000).process(square)
+    assert np.abs(resampled).max() > 1.0
+
+    ring = AudioRingBuffer(capacity=32000)
+    ring.write_float(resampled)
+    pcm = ring.read().copy()
+
+    # Overshoot saturates instead of wrapping around to the opposite sign
+    expected_sign = np.sign(resampled)
+    wrapped = (np.sign(pcm) != expected_sign) & (np.abs(resampled) > 0.5)
+    assert not wrapped.any()
+    assert pcm.max() == 32767 and pcm.min() == -32767
@@ -0,0 +1,145 @@
+import time
+import wave
+import numpy as np
+import pytest
+from transcriber_app.audio_replay import AudioRecorder, VirtualAudioStream, load_audio_file, load_recording
+from transcriber_app.resampler import PolyphaseResampler
+
+def drain(audio_queue):
+    blocks = []
+    while True:
+        block = audio_queue.get()
+        if block is None:
+            return np.concatenate(blocks) if blocks else np.zeros(0, np.int16)
+        blocks.append(block.copy())
+
+def test_fast_replay_delivers_every_sample():
+    audio = (np.random.default_rng(0).standard_normal(48000) * 3000).astype(np.int16)
+    stream = VirtualAudioStream(16000, audio, speed=None, buffer_seconds=0.5)
+    stream.start()
+
+    # The ring is smaller than the audio: the 'block' policy waits for the reader instead of dropping
+    np.testing.assert_array_equal(drain(stream.audio_queue), audio)
+    assert stream.is_finished()
+    assert stream.get_stats()['replayed_seconds'] == 3.0
+    stream.stop()
+
+def test_replay_is_paced_by_speed():
+    audio = np.zeros(16000, np.int16)
+    stream = VirtualAudioStream(16000, audio, speed=4.0)
+    start = time.perf_counter()
+    stream.start()
+    drain(stream.audio_queue)
+    elapsed = time.perf_counter() - start
+    stream.stop()
+
+    assert 0.2 <= elapsed < 0.5
+
+def test_pause_holds_the_replay():
+    stream = VirtualAudioStream(16000, np.zeros(16000, np.int16), speed=10.0)
+    stream.start()
+    stream.pause()
+    time.sleep(0.05)
+    position = stream.position
+    time.sleep(0.1)
+    assert stream.position == position and not stream.is_finished()
+
+    stream.resume()
+    drain(stream.audio_queue)
+    assert stream.is_finished()
+    stream.stop()
+
+def test_recording_replays_like_the_live_session(tmp_path):
+    path = tmp_path / "session.pcm"
+    recorder = AudioRecorder(path, 16000, 480)
+    blocks = [np.random.default_rng(i).uniform(-0.5, 0.5, 480).astype(np.float32) for i in range(10)]
+    for block in blocks:
+        recorder.write(block)
+    recorder.close()
+
+    samples, sample_rate, block_size = load_recording(path)
+    np.testing.assert_array_equal(samples, np.concatenate(blocks))
+    assert (sample_rate, block_size) == (16000, 480)
+
+    stream = VirtualAudioStream(16000, str(path), speed=None)
+    stream.start()
+    expected = (np.concatenate(blocks) * 32767).astype(np.int16)
+    np.testing.assert_allclose(drain(stream.audio_queue), expected, atol=1)
+    stream.stop()
+
+def test_recording_at_device_rate_replays_through_the_live_resampler(tmp_path):
+    # A 48 kHz device delivers 30ms blocks of 1440 samples; the pipeline runs at 16 kHz
+    path = tmp_path / "session.pcm"
+    recorder = AudioRecorder(path, 48000, 1440)
+    blocks = [np.random.default_rng(i).uniform(-0.5, 0.5, 1440).astype(np.float32) for i in range(10)]
+    for block in blocks:
+        recorder.write(block)
+    recorder.close()
+
+    # What the live callback wrote into the ring
+    resampler = PolyphaseResampler(48000, 16000, max_block_size=1440)
+    live = np.concatenate([resampler.process(block).copy() for block in blocks])
+    expected = (np.clip(live, -1.0, 1.0) * 32767).astype(np.int16)
+
+    stream = VirtualAudioStream(16000, str(path), speed=None)
+    assert stream.duration == 0.3
+    stream.start()
+    np.testing.assert_array_equal(drain(stream.audio_queue), expected)
+    stream.stop()
+
+def test_load_wav(tmp_path):
+    path = tmp_path / "speech.wav"
+    pcm = (np.random.default_rng(0).standard_normal(1600) * 3000).astype(np.int16)
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(pcm.tobytes())
+
+    np.testing.assert_allclose(load_audio_file(path), pcm / 32768.0, atol=1e-6)
+    with pytest.raises(ValueError, match="expected 8000 Hz"):
+        load_audio_file(path, sample_rate=8000)
+
+def test_replay_from_a_block_generator():
+    # A streaming decoder's blocks are consumed as the replay goes
+    audio = (np.random.default_rng(0).standard_normal(16000) * 3000).astype(np.int16)
+    consumed = []
+    def decoder():
+        for start in range(0, len(audio), 4000):
+            consumed.append(start)
+            yield audio[start:start + 4000]
+
+    stream = VirtualAudioStream(16000, decoder(), speed=None)
+    assert consumed == [] and stream.duration is None
+    stream.start()
+    np.testing.assert_array_equal(drain(stream.audio_queue), audio)
+    assert stream.is_finished() and stream.duration == 1.0
+    stream.stop()
+
+def test_int16_npy_is_replayed_from_a_memory_map(tmp_path):
+    path = tmp_path / "cached.npy"
+    pcm = (np.random.default_rng(0).standard_normal(8000) * 3000).astype(np.int16)
+    np.save(path, pcm)
+
+    loaded = load_audio_file(path)
+    assert isinstance(loaded, np.memmap) and loaded.dtype == np.int16
+
+    stream = VirtualAudioStream(16000, str(path), speed=None)
+    stream.start()
+    np.testing.assert_array_equal(drain(stream.audio_queue), pcm)
+    stream.stop()
+
+def test_failing_source_still_ends_the_stream():
+    # e.g. ffmpeg failing partway through a streamed file
+    def decoder():
+        yield np.ones(4000, np.int16)
+        raise RuntimeError("ffmpeg could not decode lecture.mp3")
+
+    stream = VirtualAudioStream(16000, decoder(), speed=None)
+    stream.start()
+    assert len(drain(stream.audio_queue)) == 4000
+    stream.stream.join(timeout=5)
+    assert not stream.is_finished()
+    assert isinstance(stream.error, RuntimeError)
+    assert "could not decode" in stream.get_stats()['error']
+    stream.stop()
@@ -36,6 +36,7 @@ def test_start_creates_and_starts_stream(mocker):
     # 'mocker.patch()' temporarily replaces the class itself with a mock 
     # - so that if you test the creation of an object, it is also a mock 
     mock_input_stream = mocker.patch('sounddevice.InputStream')
+    mocker.patch('sounddevice.query_devices', return_value={'default_samplerate': 16000.0})
 
     # '.return_value' uses the mock class to return a mock object of the class 
     mock_stream_instance = mock_input_stream.return_value
@@ -52,6 +53,23 @@ def test_start_creates_and_starts_stream(mocker):
     )
     mock_stream_instance.start.assert_called_once()
     assert stream.stream == mock_stream_instance
+    assert stream.resampler is None
+
+# Test start opens the device at its native rate and resamples to the pipeline's
+def test_start_uses_native_device_rate(mocker):
+    stream = AudioStream(sample_rate=16000, device_id=3)
+    mock_input_stream = mocker.patch('sounddevice.InputStream')
+    mocker.patch('sounddevice.query_devices', return_value={'default_samplerate': 48000.0})
+    stream.start()
+
+    kwargs = mock_input_stream.call_args.kwargs
+    assert kwargs['samplerate'] == 48000
+    assert kwargs['blocksize'] == 1440
+    assert stream.resampler is not None
+
+    # A 30ms block at 48 kHz reaches the queue as 480 samples at 16 kHz
+    stream.callback(np.full((1440, 1), 0.25, dtype=np.float32), 1440, None, None)
+    assert len(stream.audio_queue) == 480
 
 # Test stop closes and clears stream 
 def test_stop_closes_stream(mocker):
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+import whisper
+from whisper.audio import N_FRAMES, N_SAMPLES
+from transcriber_app.features import IncrementalLogMel
+
+def whisper_features(audio, n_mels=80):
+    """What model.transcribe feeds the model for a segment shorter than 30 s."""
+    mel = whisper.log_mel_spectrogram(audio, n_mels, padding=N_SAMPLES)
+    content_frames = mel.shape[-1] - N_FRAMES
+    return whisper.pad_or_trim(mel[:, :content_frames], N_FRAMES).numpy()
+
+def speech_like(length, seed=0):
+    rng = np.random.default_rng(seed)
+    envelope = np.abs(np.sin(np.arange(length) / 3000))
+    return (rng.standard_normal(length) * 0.1 * envelope).astype(np.float32)
+
+@pytest.mark.parametrize("length", [4000, 16000, 16123, 80077, N_SAMPLES])
+def test_incremental_log_mel_matches_whisper(length):
+    audio = speech_like(length)
+    extractor = IncrementalLogMel()
+
+    # Fed one 20ms frame at a time, like the segmenter does
+    for end in range(320, length + 320, 320):
+        extractor.update(audio[:end])
+    features = extractor.finalize(audio)
+
+    assert features.shape == (80, N_FRAMES)
+    np.testing.assert_allclose(features, whisper_features(audio), atol=1e-4)
+
+def test_incremental_log_mel_finalize_before_end_of_audio():
+    # Forced split: the segment ends before the audio the extractor has already seen
+    audio = speech_like(50000, seed=1)
+    extractor = IncrementalLogMel()
+    extractor.update(audio)
+
+    features = extractor.finalize(audio[:30001])
+    np.testing.assert_allclose(features, whisper_features(audio[:30001]), atol=1e-4)
+
+def test_incremental_log_mel_reset_and_long_segments():
+    extractor = IncrementalLogMel()
+    extractor.update(speech_like(32000, seed=2))
+    extractor.reset()
+
+    audio = speech_like(20000, seed=3)
+    extractor.update(audio)
+    np.testing.assert_allclose(extractor.finalize(audio), whisper_features(audio), atol=1e-4)
+
+    # Longer than one window: the caller decodes the audio instead
+    assert extractor.finalize(np.zeros(N_SAMPLES + 1, dtype=np.float32)) is None
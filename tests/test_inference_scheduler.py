@@ -0,0 +1,173 @@
+import threading
+import time
+import numpy as np
+import pytest
+from transcriber_app.asr_backends import ASRBackend
+from transcriber_app.inference_scheduler import InferenceScheduler, FINAL, BACKGROUND
+
+class RecordingBackend(ASRBackend):
+    """Returns each segment's first sample as its text and records the decode order."""
+    name = "recording"
+
+    def __init__(self, supports_batching=False):
+        super().__init__("tiny", "cpu")
+        self.supports_batching = supports_batching
+        self.order = []
+        self.batches = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def transcribe(self, audio_float, language="en", **options):
+        self.gate.wait()
+        self.order.append(int(audio_float[0]))
+        return {"text": str(int(audio_float[0])), "segments": []}
+
+    def transcribe_batch(self, audio_floats, features=None, language="en", **options):
+        self.gate.wait()
+        self.batches.append([int(audio[0]) for audio in audio_floats])
+        return [{"text": str(int(audio[0])), "segments": []} for audio in audio_floats]
+
+def segment(tag, seconds=1.0):
+    return np.full(int(16000 * seconds), tag, dtype=np.float32)
+
+@pytest.fixture
+def scheduler():
+    scheduler = InferenceScheduler(num_workers=1, max_batch_size=1, max_wait_s=None)
+    yield scheduler
+    scheduler.stop()
+
+def hold_worker(scheduler, backend):
+    """Keep the worker busy on a throwaway job, so the next submissions queue up."""
+    backend.gate.clear()
+    job = scheduler.submit("warm-up", backend, segment(-1))
+    while job.started is None:
+        time.sleep(0.001)
+    return job
+
+def test_round_robin_across_sessions(scheduler):
+    backend = RecordingBackend()
+    hold_worker(scheduler, backend)
+
+    # A busy room queues five segments before a quiet one queues two
+    jobs = [scheduler.submit("busy", backend, segment(10 + i)) for i in range(5)]
+    jobs += [scheduler.submit("quiet", backend, segment(20 + i)) for i in range(2)]
+    backend.gate.set()
+    assert [job.wait(timeout=5)["text"] for job in jobs] == ["10", "11", "12", "13", "14", "20", "21"]
+
+    # The quiet room doesn't wait for the whole backlog of the busy one
+    assert backend.order == [-1, 10, 20, 11, 21, 12, 13, 14]
+
+def test_weights_share_inference_time(scheduler):
+    backend = RecordingBackend()
+    scheduler.register("lecture", weight=2.0)
+    scheduler.register("meeting", weight=1.0)
+    hold_worker(scheduler, backend)
+
+    jobs = [scheduler.submit("lecture", backend, segment(10 + i)) for i in range(4)]
+    jobs += [scheduler.submit("meeting", backend, segment(20 + i)) for i in range(2)]
+    backend.gate.set()
+    for job in jobs:
+        job.wait(timeout=5)
+
+    # Two lecture segments per meeting segment
+    assert backend.order[1:] == [10, 20, 11, 12, 21, 13]
+
+def test_final_segments_go_before_background_decodes(scheduler):
+    backend = RecordingBackend()
+    hold_worker(scheduler, backend)
+
+    partial = scheduler.submit("room", backend, segment(1), priority=BACKGROUND)
+    final = scheduler.submit("other", backend, segment(2), priority=FINAL)
+    backend.gate.set()
+    partial.wait(timeout=5)
+    final.wait(timeout=5)
+    assert backend.order[1:] == [2, 1]
+
+def test_overdue_segments_jump_the_fair_share_order():
+    scheduler = InferenceScheduler(num_workers=1, max_batch_size=1, max_wait_s=0.05)
+    backend = RecordingBackend()
+    scheduler.register("room", weight=100.0)
+    hold_worker(scheduler, backend)
+
+    old = scheduler.submit("slow-room", backend, segment(1))
+    time.sleep(0.1)
+    # The heavily weighted room would go first, but the other room's segment is past its deadline
+    new = scheduler.submit("room", backend, segment(2))
+    backend.gate.set()
+    old.wait(timeout=5)
+    new.wait(timeout=5)
+    scheduler.stop()
+    assert backend.order[1:] == [1, 2]
+
+def test_segments_that_arrive_together_are_batched():
+    scheduler = InferenceScheduler(num_workers=1, max_batch_size=3, max_wait_s=None)
+    backend = RecordingBackend(supports_batching=True)
+    hold_worker(scheduler, backend)
+
+    jobs = [scheduler.submit(f"room-{i}", backend, segment(10 + i)) for i in range(4)]
+    # Different decode options can't share a batch
+    other = scheduler.submit("room-0", backend, segment(20), temperature=0.0)
+    backend.gate.set()
+    assert [job.wait(timeout=5)["text"] for job in jobs] == ["10", "11", "12", "13"]
+    other.wait(timeout=5)
+    scheduler.stop()
+
+    assert backend.batches[0] == [10, 11, 12]
+    assert jobs[0].batch_size == 3
+    stats = scheduler.get_stats()
+    assert stats['jobs'] == 6 and stats['mean_batch_size'] == 6 / 4
+
+def test_failed_batch_only_fails_the_job_that_raises():
+    scheduler = InferenceScheduler(num_workers=1, max_batch_size=4, max_wait_s=None)
+    backend = RecordingBackend(supports_batching=True)
+    batch_decode = backend.transcribe_batch
+    single_decode = backend.transcribe
+
+    def transcribe_batch(audio_floats, features=None, language="en", **options):
+        if any(audio[0] == 13 for audio in audio_floats):
+            raise ValueError("poisoned segment")
+        return batch_decode(audio_floats, features, language, **options)
+
+    def transcribe(audio_float, language="en", **options):
+        if audio_float[0] == 13:
+            raise ValueError("poisoned segment")
+        return single_decode(audio_float, language, **options)
+
+    backend.transcribe_batch = transcribe_batch
+    backend.transcribe = transcribe
+    hold_worker(scheduler, backend)
+
+    # Three sessions share a batch; one session's segment breaks the batched decode
+    jobs = [scheduler.submit(room, backend, segment(tag))
+            for room, tag in (("room-a", 11), ("room-b", 12), ("room-c", 13), ("room-a", 14))]
+    backend.gate.set()
+
+    for job, text in zip([jobs[0], jobs[1], jobs[3]], ["11", "12", "14"]):
+        assert job.wait(timeout=5)["text"] == text
+    with pytest.raises(ValueError, match="poisoned"):
+        jobs[2].wait(timeout=5)
+    scheduler.stop()
+
+    assert jobs[0].batch_size == 4
+    assert backend.order[1:] == [11, 12, 14]
+
+def test_stats_and_errors(scheduler):
+    backend = RecordingBackend()
+    failing = RecordingBackend()
+    failing.transcribe = lambda audio_float, **options: 1 / 0
+
+    scheduler.register("room")
+    scheduler.submit("room", backend, segment(1, seconds=2.0)).wait(timeout=5)
+    with pytest.raises(ZeroDivisionError):
+        scheduler.submit("room", failing, segment(2)).wait(timeout=5)
+
+    client = scheduler.get_client_stats("room")
+    assert client['jobs'] == 2 and client['audio_seconds'] == 3.0 and client['pending'] == 0
+    assert 0 <= client['mean_wait_s'] <= client['max_wait_s']
+
+    stats = scheduler.get_stats()
+    assert stats['audio_seconds'] == 3.0 and stats['audio_seconds_per_second'] > 0
+    assert set(stats['clients']) == {"room"}
+
+    scheduler.unregister("room")
+    assert scheduler.get_client_stats("room") is None
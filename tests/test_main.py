@@ -0,0 +1,132 @@
+import queue
+import pytest
+import numpy as np
+import transcriber_app.main as main
+from transcriber_app.main import SessionManager
+from transcriber_app.asr_backends import ASRBackend
+
+class FakeBackend(ASRBackend):
+    name = "fake"
+
+    def transcribe(self, audio_float, language="en", **options):
+        return {"text": " hello", "segments": []}
+
+class FakeAudioStream:
+    """Stands in for the microphone: plays a few blocks of speech-level audio, then ends."""
+    def __init__(self, *args, **kwargs):
+        self.audio_queue = queue.Queue()
+
+    def start(self):
+        for _ in range(5):
+            self.audio_queue.put(np.full(1600, 3000, dtype=np.int16))
+        self.audio_queue.put(None)
+
+    def stop(self):
+        pass
+
+@pytest.fixture
+def fake_pipeline(mocker):
+    # One shared mock model, no audio device
+    backend = FakeBackend("small", "cpu")
+    mocker.patch.object(main.model_registry, "acquire", return_value=backend)
+    release = mocker.patch.object(main.model_registry, "release")
+    mocker.patch("transcriber_app.main.AudioStream", FakeAudioStream)
+    mocker.patch.object(main, "SEGMENTER", "fixed")
+    mocker.patch.object(main, "PARTIAL_RESULTS_INTERVAL", None)
+    return backend, release
+
+def test_create_and_look_up_sessions():
+    manager = SessionManager()
+    session = manager.create_session("room-1")
+    assert manager.get_session("room-1") is session
+    assert manager.get_session("room-2") is None
+
+    with pytest.raises(ValueError, match="already exists"):
+        manager.create_session("room-1")
+
+    # Random ids when none is given
+    other = manager.create_session()
+    assert other.session_id != "room-1"
+    assert [status['session_id'] for status in manager.list_sessions()] == ["room-1", other.session_id]
+
+def test_session_limit():
+    manager = SessionManager(max_sessions=1)
+    manager.create_session("room-1")
+    with pytest.raises(RuntimeError, match="Too many sessions"):
+        manager.create_session("room-2")
+
+    assert manager.remove_session("room-1")
+    assert not manager.remove_session("room-1")
+    manager.create_session("room-2")
+
+def test_stopped_idle_sessions_are_dropped(mocker):
+    manager = SessionManager(idle_timeout=60)
+    manager.create_session("old").last_used -= 120
+    manager.create_session("new")
+    assert manager.get_session("old") is None
+    assert manager.get_session("new") is not None
+
+def test_sessions_keep_separate_transcripts(fake_pipeline):
+    backend, release = fake_pipeline
+    manager = SessionManager()
+    first, second = manager.create_session("room-1"), manager.create_session("room-2")
+
+    first.start(enable_adaptive_control=False)
+    first.transcription_thread.join(timeout=5)
+    assert "hello" in first.get_final_transcript()
+    assert second.get_final_transcript() == ""
+
+    # Both sessions share the one model; stopping releases this session's reference only
+    second.start(enable_adaptive_control=False)
+    second.transcription_thread.join(timeout=5)
+    assert first.transcriber.backend is second.transcriber.backend
+    first.stop()
+    release.assert_called_once_with(backend)
+    assert first.get_final_transcript() == second.get_final_transcript()
+
+def test_module_functions_use_the_default_session(fake_pipeline, mocker):
+    mocker.patch.object(main, "session_manager", SessionManager())
+
+    # Nothing recorded yet: reads as empty
+    assert main.get_final_transcript() == ""
+    assert main.get_current_metrics() == {'wpm': 0, 'volume': 0, 'pitch': 0}
+
+    main.start_transcription_pipeline(enable_adaptive_control=False)
+    session = main.session_manager.get_session(main.DEFAULT_SESSION_ID)
+    session.transcription_thread.join(timeout=5)
+    assert not main.is_transcription_running()
+    assert "hello" in main.get_final_transcript()
+    main.stop_transcription_pipeline()
+
+def test_sessions_share_the_inference_scheduler(fake_pipeline, mocker):
+    scheduler = main.InferenceScheduler(max_batch_size=1)
+    mocker.patch.object(main, "inference_scheduler", scheduler)
+    manager = SessionManager()
+    session = manager.create_session("room-1", weight=2.0)
+
+    session.start(enable_adaptive_control=False)
+    session.transcription_thread.join(timeout=5)
+    assert "hello" in session.get_final_transcript()
+    stats = session.get_inference_stats()
+    assert stats['weight'] == 2.0 and stats['jobs'] >= 1
+
+    manager.remove_session("room-1")
+    assert scheduler.get_client_stats("room-1") is None
+    scheduler.stop()
+
+def test_session_pushes_transcript_and_metrics_updates(fake_pipeline):
+    session = SessionManager().create_session("room-1")
+    updates = session.events.subscribe()
+
+    session.start(enable_adaptive_control=False)
+    session.transcription_thread.join(timeout=5)
+    session.stop()
+
+    received = []
+    while not updates.empty():
+        received.append(updates.get_nowait())
+    names = [event for event, data in received]
+    assert names[0] == 'status' and received[0][1]['running']
+    assert names[-1] == 'status' and not received[-1][1]['running']
+    assert ('transcript', session.get_live_transcript()) in received
+    assert names.index('transcript') < names.index('metrics')
@@ -0,0 +1,105 @@
+import pytest
+from transcriber_app.model_registry import ModelRegistry
+
+class FakeBackend:
+    def __init__(self, backend, model_size, device):
+        self.key = (model_size, device, backend)
+        self.model = None
+
+def make_loader(mocker):
+    return mocker.Mock(side_effect=lambda backend, model_size, device, **options: FakeBackend(backend, model_size, device))
+
+def test_registry_loads_each_model_once(mocker):
+    loader = make_loader(mocker)
+    registry = ModelRegistry(loader=loader)
+
+    first = registry.acquire("small", "cpu", "whisper")
+    registry.release(first)
+    second = registry.acquire("small", "cpu", "whisper")
+
+    assert first is second
+    loader.assert_called_once_with("whisper", "small", "cpu")
+    status = registry.get_status()
+    assert status['loads'] == 1
+    assert status['hits'] == 1
+
+def test_registry_keys_by_size_device_and_backend(mocker):
+    loader = make_loader(mocker)
+    registry = ModelRegistry(loader=loader)
+
+    a = registry.acquire("small", "cpu", "whisper")
+    b = registry.acquire("tiny", "cpu", "whisper")
+    c = registry.acquire("small", "cpu", "faster-whisper")
+    assert len({id(a), id(b), id(c)}) == 3
+    assert loader.call_count == 3
+
+def backend_time(registry):
+    return next(iter(registry.entries.values())).last_used
+
+def test_registry_evicts_idle_models(mocker):
+    registry = ModelRegistry(idle_timeout=60, loader=make_loader(mocker))
+    registry._stop_reaper.set()     # Drive eviction by hand
+
+    backend = registry.acquire("small", "cpu")
+    assert registry.evict_idle(now=backend_time(registry) + 120) == 0     # Still in use
+
+    registry.release(backend)
+    assert registry.evict_idle(now=backend_time(registry) + 30) == 0      # Not idle long enough
+    assert registry.evict_idle(now=backend_time(registry) + 120) == 1
+    assert registry.get_status()['models'] == []
+
+def test_registry_memory_cap_evicts_least_recently_used(mocker):
+    registry = ModelRegistry(max_memory_bytes=250, loader=make_loader(mocker))
+    mocker.patch.object(registry, "_estimate_size", return_value=100)
+
+    small = registry.acquire("small", "cpu")
+    registry.release(small)
+    tiny = registry.acquire("tiny", "cpu")
+    registry.release(tiny)
+
+    # A third model would exceed the cap, so the least recently used idle one goes
+    registry.acquire("base", "cpu")
+    sizes = [model['model_size'] for model in registry.get_status()['models']]
+    assert sorted(sizes) == ["base", "tiny"]
+    assert registry.evictions == 1
+
+def test_registry_sizes_models_from_backend_hint(mocker, capsys):
+    sized = FakeBackend("faster-whisper", "small", "cpu")
+    sized.memory_bytes = lambda: 300
+    unsized = FakeBackend("custom", "small", "cpu")
+    backends = iter([sized, unsized])
+    registry = ModelRegistry(loader=mocker.Mock(side_effect=lambda *args, **options: next(backends)))
+
+    registry.acquire("small", "cpu", "faster-whisper")
+    registry.acquire("small", "cpu", "custom")
+
+    sizes = {model['backend']: model['size_mb'] for model in registry.get_status()['models']}
+    assert sizes == {"faster-whisper": 300 / 1e6, "custom": 0.0}
+    assert "size of FakeBackend model unknown" in capsys.readouterr().out
+
+def test_registry_never_evicts_models_in_use(mocker):
+    registry = ModelRegistry(max_memory_bytes=150, loader=make_loader(mocker))
+    mocker.patch.object(registry, "_estimate_size", return_value=100)
+
+    registry.acquire("small", "cpu")
+    registry.acquire("tiny", "cpu")
+    assert len(registry.get_status()['models']) == 2
+    assert registry.evictions == 0
+
+def test_registry_load_failure_is_not_cached(mocker):
+    loader = mocker.Mock(side_effect=[RuntimeError("no checkpoint"), FakeBackend("whisper", "small", "cpu")])
+    registry = ModelRegistry(loader=loader)
+
+    with pytest.raises(RuntimeError, match="no checkpoint"):
+        registry.acquire("small", "cpu")
+    assert registry.acquire("small", "cpu") is not None
+
+def test_registry_peek_does_not_load(mocker):
+    loader = make_loader(mocker)
+    registry = ModelRegistry(loader=loader)
+
+    assert registry.peek("small", "cpu") is None
+    loader.assert_not_called()
+
+    backend = registry.acquire("small", "cpu")
+    assert registry.peek("small", "cpu") is backend
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from transcriber_app.resampler import PolyphaseResampler
+
+def sine(frequency, rate, seconds=1.0, delay=0.0):
+    t = np.arange(int(rate * seconds)) / rate - delay
+    return (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+def resample_in_blocks(resampler, audio, block_size):
+    return np.concatenate([resampler.process(audio[start:start + block_size]).copy()
+                           for start in range(0, len(audio), block_size)])
+
+@pytest.mark.parametrize("input_rate", [48000, 44100, 32000, 8000])
+def test_resamples_a_tone_to_16k(input_rate):
+    resampler = PolyphaseResampler(input_rate, 16000)
+    output = resample_in_blocks(resampler, sine(440, input_rate), round(480 * input_rate / 16000))
+
+    assert len(output) == 16000
+    # The filter delays the output by half its length
+    delay = (resampler.taps * resampler.up - 1) / 2 / resampler.down / 16000
+    np.testing.assert_allclose(output[400:], sine(440, 16000, delay=delay)[400:], atol=1e-3)
+
+def test_blocks_resample_like_one_signal():
+    audio = np.random.default_rng(0).uniform(-0.5, 0.5, 44100).astype(np.float32)
+    whole = PolyphaseResampler(44100, 16000, max_block_size=44100).process(audio).copy()
+
+    # Uneven block sizes, including ones smaller than the ratio that produce no output
+    resampler = PolyphaseResampler(44100, 16000, max_block_size=1500)
+    pieces, start = [], 0
+    for size in [1, 2, 1323, 700, 1500, 1323] * 20:
+        pieces.append(resampler.process(audio[start:start + size]).copy())
+        start += size
+    pieces.append(resampler.process(audio[start:]).copy())
+
+    np.testing.assert_allclose(np.concatenate(pieces), whole, atol=1e-6)
+
+def test_removes_content_above_the_output_nyquist():
+    # 10 kHz would alias to 6 kHz at 16 kHz
+    output = PolyphaseResampler(48000, 16000).process(sine(10000, 48000, seconds=0.05))
+    assert np.abs(output[100:]).max() < 1e-3
+
+def test_process_reuses_its_output_buffer():
+    resampler = PolyphaseResampler(48000, 16000, max_block_size=1440)
+    first = resampler.process(np.zeros(1440, np.float32))
+    second = resampler.process(np.zeros(1440, np.float32))
+    assert len(first) == len(second) == 480
+    assert np.shares_memory(first, second)
@@ -0,0 +1,99 @@
+import sys
+import queue
+import pytest
+import numpy as np
+from pathlib import Path
+from transcriber_app.transcriber import Transcriber
+from transcriber_app.segmenters import (create_segmenter, segmenter_from_config, FixedWindowSegmenter,
+                                        OverlappingWindowSegmenter, VADSegmenter, AdaptiveVADSegmenter)
+
+def audio_queue_from(audio, block_size=4000):
+    audio_queue = queue.Queue()
+    for start in range(0, len(audio), block_size):
+        audio_queue.put(audio[start:start + block_size])
+    audio_queue.put(None)
+    return audio_queue
+
+@pytest.fixture
+def transcriber(mocker):
+    mock_model = mocker.Mock()
+    mock_model.transcribe.return_value = {"text": " words", "segments": []}
+    mocker.patch("transcriber_app.transcriber.whisper.load_model", return_value=mock_model)
+    return Transcriber(model_size="small", device="cpu")
+
+def test_create_segmenter_unknown_name():
+    with pytest.raises(ValueError, match="Unknown segmenter"):
+        create_segmenter("not-a-segmenter")
+
+def test_fixed_windows_cover_the_stream(transcriber):
+    # 3.5s of audio in 0.25s blocks: three 1s windows, then the last 0.5s when the stream ends
+    audio = (np.random.default_rng(0).standard_normal(56000) * 3000).astype(np.int16)
+    durations = []
+    transcriber.transcribe_stream(audio_queue_from(audio), lambda text, duration: durations.append(duration), None,
+                                  segmenter=create_segmenter("fixed", chunk_s=1.0))
+
+    assert durations == [1.0, 1.0, 1.0, 0.5]
+    decoded = [call.args[0] for call in transcriber.backend.model.transcribe.call_args_list]
+    np.testing.assert_allclose(np.concatenate(decoded), audio / 32767.0, atol=1e-6)
+
+def test_overlapping_windows_repeat_the_previous_end(transcriber, mocker):
+    audio = (np.random.default_rng(0).standard_normal(46000) * 3000).astype(np.int16)
+    on_audio_chunk = mocker.Mock()
+    durations = []
+    transcriber.transcribe_stream(audio_queue_from(audio), lambda text, duration: durations.append(duration),
+                                  on_audio_chunk, segmenter=OverlappingWindowSegmenter(chunk_s=1.0, overlap_s=0.25))
+
+    # Each window after the first starts 0.25s before the previous one ended
+    decoded = [call.args[0] for call in transcriber.backend.model.transcribe.call_args_list]
+    assert [len(window) for window in decoded] == [16000, 16000, 16000, 10000]
+    np.testing.assert_array_equal(decoded[1][:4000], decoded[0][-4000:])
+
+    # Durations and metrics only count new audio, so they still add up to the stream
+    assert durations == [1.0, 0.75, 0.75, 0.375]
+    assert sum(len(call.args[0]) for call in on_audio_chunk.call_args_list) == len(audio)
+
+def test_fixed_windows_report_silence_ratio(transcriber, mocker):
+    # Half a window of loud noise, half of near silence
+    rng = np.random.default_rng(0)
+    audio = np.concatenate([(rng.standard_normal(8000) * 3000), (rng.standard_normal(8000) * 3)]).astype(np.int16)
+    insider = mocker.Mock()
+    transcriber.transcribe_stream(audio_queue_from(audio), None, None, insider,
+                                  segmenter=FixedWindowSegmenter(chunk_s=1.0))
+
+    insider.add_chunk_silence_ratio.assert_called_once()
+    assert insider.add_chunk_silence_ratio.call_args.args[0] == pytest.approx(0.5, abs=0.05)
+
+@pytest.mark.parametrize("segmenter, applied", [(VADSegmenter(), False), (AdaptiveVADSegmenter(), True)])
+def test_only_adaptive_vad_applies_parameter_updates(transcriber, mocker, segmenter, applied):
+    mock_vad = mocker.Mock()
+    mock_vad.is_speech.side_effect = lambda frame_bytes, sample_rate: np.frombuffer(frame_bytes, np.int16)[0] > 0
+    vad_class = mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
+
+    # One speech segment, then silence to end it (the chunk boundary where updates apply)
+    audio = np.concatenate([np.full(8000, 3000, np.int16), np.zeros(8000, np.int16)])
+    transcriber.update_parameters(aggressiveness=1, frame_duration_ms=20, max_silence_frames=5)
+    transcriber.transcribe_stream(audio_queue_from(audio), None, None, segmenter=segmenter,
+                                  aggressiveness=3, max_silence_frames=10)
+
+    assert (transcriber.current_aggressiveness == 1) == applied
+    assert transcriber.current_max_silence_frames == (5 if applied else 10)
+    # The VAD itself switches at the first chunk boundary
+    assert [call.args[0] for call in vad_class.call_args_list] == ([3, 1] if applied else [3])
+
+def test_segmenter_from_test_configs():
+    sys.path.append(str(Path(__file__).parent.parent / "test_framework"))
+    from configs import TEST_CONFIGS
+
+    for config in TEST_CONFIGS['fixed']:
+        segmenter = segmenter_from_config({**config, 'model_type': 'fixed'})
+        expected = OverlappingWindowSegmenter if config.get('overlap') else FixedWindowSegmenter
+        assert type(segmenter) is expected
+        assert segmenter.chunk_samples == int(config['chunk_size'] * 16000)
+    for config in TEST_CONFIGS['vad']:
+        assert type(segmenter_from_config({**config, 'model_type': 'vad'})) is VADSegmenter
+    for config in TEST_CONFIGS['adaptive']:
+        assert type(segmenter_from_config({**config, 'model_type': 'adaptive'})) is AdaptiveVADSegmenter
+
+    # Without a model_type, chunk_size means fixed windows
+    overlapping = segmenter_from_config({'chunk_size': 2.0, 'overlap': 0.5})
+    assert type(overlapping) is OverlappingWindowSegmenter and overlapping.overlap_samples == 8000
@@ -0,0 +1,28 @@
+from transcriber_app.session_events import SessionEvents, format_sse
+
+def test_every_subscriber_gets_each_update():
+    events = SessionEvents()
+    first, second = events.subscribe(), events.subscribe()
+    events.publish('metrics', {'wpm': 120.0})
+
+    assert first.get_nowait() == ('metrics', {'wpm': 120.0})
+    assert second.get_nowait() == ('metrics', {'wpm': 120.0})
+
+    events.unsubscribe(first)
+    events.publish('status', {'running': False})
+    assert first.empty()
+    assert second.get_nowait() == ('status', {'running': False})
+    assert events.subscriber_count() == 1
+
+def test_slow_subscriber_loses_its_oldest_updates():
+    events = SessionEvents(max_pending=2)
+    subscriber = events.subscribe()
+    for i in range(5):
+        events.publish('transcript', {'transcript': str(i)})
+
+    # Publishing never blocked; the newest updates are kept
+    assert [subscriber.get_nowait()[1]['transcript'] for _ in range(2)] == ["3", "4"]
+    assert events.dropped == 3
+
+def test_format_sse():
+    assert format_sse('metrics', {'wpm': 1.5}) == 'event: metrics\ndata: {"wpm": 1.5}\n\n'
@@ -156,3 +156,14 @@ def test_pitch_smoothing(tracker):
 
 
 
+
+def test_replace_transcription_keeps_duration(tracker):
+    tracker.add_transcription(" hello wrld ", 2.0)
+    tracker.add_transcription(" second", 1.0)
+
+    assert tracker.replace_transcription(0, " hello world ")
+    assert tracker.accumulated == [("hello world", 2.0), ("second", 1.0)]
+
+    # Out of range (e.g. the transcript was cleared by a new session) is ignored
+    assert not tracker.replace_transcription(5, "late result")
+    assert len(tracker.accumulated) == 2
@@ -3,6 +3,7 @@ import numpy as np
 import queue 
 from unittest.mock import patch
 from transcriber_app.transcriber import Transcriber 
+from transcriber_app.asr_backends import create_backend
 
 def test_transcriber_init_loads_model(mocker):
 
@@ -39,7 +40,7 @@ def test_transcriber_stream_calls_callbacks_and_model(mocker):
     mock_vad.is_speech.side_effect = [True, True, False, False, False, False, False, False]
 
     # Patch webrtcvad.Vad so that transcriber returns our 'mock model' 
-    mocker.patch("transcriber_app.transcriber.webrtcvad.Vad", return_value=mock_vad)
+    mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
 
     # Create a fake audio queue filled with chunks to match our VAD pattern 
     audio_queue = queue.Queue()
@@ -99,7 +100,7 @@ def test_transcribe_stream_no_speech(mocker):
     mock_vad.is_speech.side_effect = [False] * 8
 
     # Patch the VAD constructor to return the mock vad
-    mocker.patch("transcriber_app.transcriber.webrtcvad.Vad", return_value=mock_vad)
+    mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
 
     # Fill the queue with silence frames and a None to stop
     frame_size = int(16000 * 20 / 1000)
@@ -134,7 +135,7 @@ def test_transcribe_stream_multiple_segments(mocker):
     mock_vad = mocker.Mock()
     # Speech, speech, silence x6 (segment 1), speech, speech, silence x6 (segment 2)
     mock_vad.is_speech.side_effect = [True, True] + [False]*6 + [True, True] + [False]*6
-    mocker.patch("transcriber_app.transcriber.webrtcvad.Vad", return_value=mock_vad)
+    mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
 
     frame_size = int(16000 * 20 / 1000)
     audio_queue = queue.Queue()
@@ -171,7 +172,7 @@ def test_transcribe_stream_callback_exception(mocker):
     mocker.patch("transcriber_app.transcriber.whisper.load_model", return_value=mock_model)
     mock_vad = mocker.Mock()
     mock_vad.is_speech.side_effect = [True, True] + [False]*6
-    mocker.patch("transcriber_app.transcriber.webrtcvad.Vad", return_value=mock_vad)
+    mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
 
     frame_size = int(16000 * 20 / 1000)
     audio_queue = queue.Queue()
@@ -205,7 +206,7 @@ def test_transcribe_stream_with_custom_aggressiveness(mocker):
     # Mock VAD to verify it's created with correct aggressiveness
     mock_vad = mocker.Mock()
     mock_vad.is_speech.side_effect = [True, True, False, False, False, False, False, False]
-    mock_vad_class = mocker.patch("transcriber_app.transcriber.webrtcvad.Vad", return_value=mock_vad)
+    mock_vad_class = mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
 
     # Create audio queue
     frame_size = int(16000 * 20 / 1000)
@@ -242,7 +243,7 @@ def test_transcribe_stream_with_custom_frame_duration(mocker):
     
     mock_vad = mocker.Mock()
     mock_vad.is_speech.side_effect = [True, True, False, False, False, False, False, False]
-    mocker.patch("transcriber_app.transcriber.webrtcvad.Vad", return_value=mock_vad)
+    mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
 
     on_transcription = mocker.Mock()
     on_audio_chunk = mocker.Mock()
@@ -282,7 +283,7 @@ def test_transcriber_parameter_queue(mocker):
     
     mock_vad = mocker.Mock()
     mock_vad.is_speech.side_effect = [True, True, False, False, False, False, False, False]
-    mocker.patch("transcriber_app.transcriber.webrtcvad.Vad", return_value=mock_vad)
+    mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
 
     transcriber = Transcriber(model_size="small", device="cpu")
     
@@ -316,7 +317,7 @@ def test_transcriber_parameter_queue_multiple_updates(mocker):
     
     mock_vad = mocker.Mock()
     mock_vad.is_speech.side_effect = [True, True, False, False, False, False, False, False]
-    mocker.patch("transcriber_app.transcriber.webrtcvad.Vad", return_value=mock_vad)
+    mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
 
     transcriber = Transcriber(model_size="small", device="cpu")
     
@@ -331,4 +332,483 @@ def test_transcriber_parameter_queue_multiple_updates(mocker):
     # Should have the last update applied
     assert transcriber.current_aggressiveness == 0
     assert transcriber.current_frame_duration_ms == 30
-    assert transcriber.current_max_silence_frames == 7
\ No newline at end of file
+    assert transcriber.current_max_silence_frames == 7
+# -------------- Pipeline (VAD stage / inference stage) Tests --------------
+
+def test_transcribe_stream_keeps_segment_order_with_multiple_workers(mocker):
+    """Segments must reach the callbacks in stream order even if a later one decodes first"""
+    import threading
+    import time
+
+    first_started = threading.Event()
+
+    def slow_first_transcribe(audio, **kwargs):
+        # The first (longer) segment decodes slowly, the second one instantly
+        if len(audio) > 640:
+            first_started.set()
+            time.sleep(0.2)
+            return {"text": "first segment"}
+        first_started.wait(timeout=1.0)
+        return {"text": "second segment"}
+
+    mock_model = mocker.Mock()
+    mock_model.transcribe.side_effect = slow_first_transcribe
+    mocker.patch("transcriber_app.transcriber.whisper.load_model", return_value=mock_model)
+
+    mock_vad = mocker.Mock()
+    mock_vad.is_speech.side_effect = [True, True, True] + [False]*3 + [True, True] + [False]*3
+    mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
+
+    frame_size = int(16000 * 20 / 1000)
+    audio_queue = queue.Queue()
+    for _ in range(11):
+        audio_queue.put(np.ones(frame_size, dtype=np.int16))
+    audio_queue.put(None)
+
+    on_transcription = mocker.Mock()
+    on_audio_chunk = mocker.Mock()
+
+    transcriber = Transcriber(model_size="small", device="cpu", num_workers=2)
+    transcriber.transcribe_stream(audio_queue, on_transcription, on_audio_chunk, max_silence_frames=2)
+
+    texts = [call.args[0] for call in on_transcription.call_args_list]
+    assert texts == ["first segment", "second segment"]
+
+    depths = transcriber.get_queue_depths()
+    assert depths['segment_queue'] == 0
+    assert depths['awaiting_delivery'] == 0
+    assert depths['segments_emitted'] == depths['segments_delivered'] == 2
+
+def test_transcribe_stream_propagates_worker_errors(mocker):
+    """Errors raised in the inference stage are re-raised by transcribe_stream"""
+    mock_model = mocker.Mock()
+    mock_model.transcribe.side_effect = RuntimeError("Decode failed!")
+    mocker.patch("transcriber_app.transcriber.whisper.load_model", return_value=mock_model)
+
+    mock_vad = mocker.Mock()
+    mock_vad.is_speech.side_effect = [True, True] + [False]*3
+    mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
+
+    frame_size = int(16000 * 20 / 1000)
+    audio_queue = queue.Queue()
+    for _ in range(5):
+        audio_queue.put(np.ones(frame_size, dtype=np.int16))
+    audio_queue.put(None)
+
+    on_transcription = mocker.Mock()
+    transcriber = Transcriber(model_size="small", device="cpu")
+    with pytest.raises(RuntimeError, match="Decode failed!"):
+        transcriber.transcribe_stream(audio_queue, on_transcription, None, max_silence_frames=2)
+    on_transcription.assert_not_called()
+
+def test_transcribe_stream_bounds_pending_segments(mocker):
+    """With max_pending_segments set, the segmenter waits for inference instead of queueing everything"""
+    import time
+
+    transcriber = None
+    pending = []
+
+    def slow_transcribe(audio, **kwargs):
+        pending.append(transcriber.segment_queue.qsize())
+        time.sleep(0.05)
+        return {"text": "speech"}
+
+    mock_model = mocker.Mock()
+    mock_model.transcribe.side_effect = slow_transcribe
+    mocker.patch("transcriber_app.transcriber.whisper.load_model", return_value=mock_model)
+
+    mock_vad = mocker.Mock()
+    mock_vad.is_speech.side_effect = ([True, True] + [False]*3) * 5
+    mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
+
+    frame_size = int(16000 * 20 / 1000)
+    audio_queue = queue.Queue()
+    for _ in range(25):
+        audio_queue.put(np.ones(frame_size, dtype=np.int16))
+    audio_queue.put(None)
+
+    on_transcription = mocker.Mock()
+    transcriber = Transcriber(model_size="small", device="cpu")
+    transcriber.transcribe_stream(audio_queue, on_transcription, None, max_silence_frames=2,
+                                  max_pending_segments=1)
+
+    assert on_transcription.call_count == 5
+    assert max(pending) <= 1
+
+def test_transcriber_uses_selected_backend(mocker):
+    """Transcriber builds its engine through create_backend and decodes through it"""
+    mock_backend = mocker.Mock()
+    mock_backend.transcribe.return_value = {"text": "from backend", "segments": [{"avg_logprob": -0.1}]}
+    mock_create = mocker.patch("transcriber_app.transcriber.create_backend", return_value=mock_backend)
+
+    mock_vad = mocker.Mock()
+    mock_vad.is_speech.side_effect = [True, True] + [False]*3
+    mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
+
+    frame_size = int(16000 * 20 / 1000)
+    audio_queue = queue.Queue()
+    for _ in range(5):
+        audio_queue.put(np.ones(frame_size, dtype=np.int16))
+    audio_queue.put(None)
+
+    on_transcription = mocker.Mock()
+    transcriber = Transcriber(model_size="small", device="cpu", backend="faster-whisper", compute_type="int8")
+    transcriber.transcribe_stream(audio_queue, on_transcription, None, max_silence_frames=2)
+
+    mock_create.assert_called_once_with("faster-whisper", "small", "cpu", compute_type="int8")
+    assert transcriber.model is mock_backend.model
+    on_transcription.assert_called_once_with("from backend", pytest.approx(2 * frame_size / 16000))
+
+# -------------- Partial Results Tests --------------
+
+def test_local_agreement_commits_stable_prefix():
+    from transcriber_app.transcriber import LocalAgreement
+    agreement = LocalAgreement()
+
+    assert agreement.update("the quick") == ("", "the quick")
+    assert agreement.update("the quick brown") == ("the quick", "brown")
+    # Punctuation/case changes still count as agreement
+    assert agreement.update("The quick, brown fox") == ("The quick, brown", "fox")
+    # Committed words are never retracted, even if a later hypothesis disagrees
+    assert agreement.update("a quick brown fox jumps") == ("The quick, brown", "fox jumps")
+
+def test_transcribe_stream_emits_partials_before_final(mocker):
+    """With partial results on, the open segment is decoded before the segment ends"""
+    import threading
+    events = []
+    partial_seen = threading.Event()
+
+    def fake_transcribe(audio, **kwargs):
+        if kwargs.get("temperature") == 0.0:
+            return {"text": "hello there"}
+        return {"text": "hello there world"}
+
+    mock_model = mocker.Mock()
+    mock_model.transcribe.side_effect = fake_transcribe
+    mocker.patch("transcriber_app.transcriber.whisper.load_model", return_value=mock_model)
+
+    mock_vad = mocker.Mock()
+    mock_vad.is_speech.side_effect = [True] * 5 + [False] * 3
+    mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
+
+    frame_size = int(16000 * 20 / 1000)
+
+    class SlowQueue:
+        """Hands out frames, pausing at the segment end until a partial result has arrived"""
+        def __init__(self):
+            self.items = [np.ones(frame_size, dtype=np.int16) for _ in range(8)] + [None]
+        def get(self):
+            if len(self.items) == 4:
+                partial_seen.wait(timeout=2.0)
+            return self.items.pop(0)
+        def qsize(self):
+            return len(self.items)
+
+    def on_partial(committed, partial):
+        events.append(("partial", committed, partial))
+        partial_seen.set()
+
+    def on_transcription(text, duration):
+        events.append(("final", text))
+
+    transcriber = Transcriber(model_size="small", device="cpu")
+    transcriber.transcribe_stream(SlowQueue(), on_transcription, None, max_silence_frames=2,
+                                  on_partial=on_partial, partial_interval_s=0.04)
+
+    assert events[0] == ("partial", "", "hello there")
+    assert events[-1] == ("final", "hello there world")
+
+# -------------- Maximum Segment Duration Tests --------------
+
+def test_transcribe_stream_force_splits_long_segments(mocker):
+    """Continuous speech is split at the quietest frame of the last second, with an overlap"""
+    decoded_lengths = []
+
+    def fake_transcribe(audio, **kwargs):
+        decoded_lengths.append(len(audio))
+        return {"text": " one two three" if len(decoded_lengths) == 1 else " three four five"}
+
+    mock_model = mocker.Mock()
+    mock_model.transcribe.side_effect = fake_transcribe
+    mocker.patch("transcriber_app.transcriber.whisper.load_model", return_value=mock_model)
+
+    # 2.5s of continuous speech, then silence
+    mock_vad = mocker.Mock()
+    mock_vad.is_speech.side_effect = [True] * 125 + [False] * 3
+    mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
+
+    frame_size = int(16000 * 20 / 1000)
+    audio_queue = queue.Queue()
+    for i in range(125):
+        # Frame 80 (1.6s) is the quietest point of the last second before the 2s limit
+        level = 10 if i == 80 else 1000
+        audio_queue.put(np.full(frame_size, level, dtype=np.int16))
+    for _ in range(3):
+        audio_queue.put(np.zeros(frame_size, dtype=np.int16))
+    audio_queue.put(None)
+
+    on_transcription = mocker.Mock()
+    on_audio_chunk = mocker.Mock()
+    transcriber = Transcriber(model_size="small", device="cpu")
+    transcriber.transcribe_stream(audio_queue, on_transcription, on_audio_chunk, max_silence_frames=2,
+                                  max_segment_s=2.0, split_overlap_s=0.25)
+
+    split = 80 * frame_size + frame_size // 2
+    overlap = 4000
+    assert decoded_lengths == [split, 125 * frame_size - split + overlap]
+
+    # Overlapping words are removed from the second half
+    texts = [call.args[0] for call in on_transcription.call_args_list]
+    assert texts == [" one two three", " four five"]
+
+    # Durations and metrics audio don't count the overlap twice
+    durations = [call.args[1] for call in on_transcription.call_args_list]
+    assert sum(durations) == pytest.approx(125 * frame_size / 16000)
+    assert sum(len(call.args[0]) for call in on_audio_chunk.call_args_list) == 125 * frame_size
+
+def test_stitch_overlap_only_removes_repeated_prefix(mocker):
+    mocker.patch("transcriber_app.transcriber.whisper.load_model", return_value=mocker.Mock())
+    transcriber = Transcriber(model_size="small", device="cpu")
+    assert transcriber._stitch_overlap(" we went to the", " The park today") == " park today"
+    assert transcriber._stitch_overlap(" hello there", " general kenobi") == " general kenobi"
+    assert transcriber._stitch_overlap(" hello there", " there") == ""
+
+def test_transcribe_stream_decodes_incremental_features(mocker):
+    """With incremental_features, each segment arrives with Whisper's log-mel already computed"""
+    import whisper
+    from whisper.audio import N_FRAMES, N_SAMPLES
+
+    mock_backend = mocker.Mock()
+    mock_backend.feature_mels = 80
+    mock_backend.transcribe_features.return_value = {"text": " from features", "segments": []}
+    mocker.patch("transcriber_app.transcriber.create_backend", return_value=mock_backend)
+
+    # 2.5s of continuous speech (force-split at 2s), then silence
+    mock_vad = mocker.Mock()
+    mock_vad.is_speech.side_effect = [True] * 125 + [False] * 3
+    mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
+
+    frame_size = int(16000 * 20 / 1000)
+    rng = np.random.default_rng(0)
+    audio_queue = queue.Queue()
+    for _ in range(125):
+        audio_queue.put((rng.standard_normal(frame_size) * 3000).astype(np.int16))
+    for _ in range(3):
+        audio_queue.put(np.zeros(frame_size, dtype=np.int16))
+    audio_queue.put(None)
+
+    transcriber = Transcriber(model_size="small", device="cpu")
+    transcriber.transcribe_stream(audio_queue, mocker.Mock(), None, max_silence_frames=2,
+                                  max_segment_s=2.0, split_overlap_s=0.25, incremental_features=True)
+
+    assert mock_backend.transcribe_features.call_count == 2
+    mock_backend.transcribe.assert_not_called()
+    for call in mock_backend.transcribe_features.call_args_list:
+        features, audio = call.args[0], call.args[1]
+        mel = whisper.log_mel_spectrogram(audio, 80, padding=N_SAMPLES)
+        expected = whisper.pad_or_trim(mel[:, :mel.shape[-1] - N_FRAMES], N_FRAMES).numpy()
+        np.testing.assert_allclose(features, expected, atol=1e-4)
+
+def test_transcriber_decode_modes_for_load_shedding(mocker):
+    """set_decode_mode changes the options (and backend) of the next decodes, get_load reports RTF"""
+    mock_model = mocker.Mock()
+    mock_model.transcribe.return_value = {"text": " big model", "segments": []}
+    mocker.patch("transcriber_app.transcriber.whisper.load_model", return_value=mock_model)
+
+    small_backend = mocker.Mock()
+    small_backend.thread_safe = False
+    small_backend.transcribe.return_value = {"text": " small model", "segments": []}
+
+    mock_vad = mocker.Mock()
+    mock_vad.is_speech.side_effect = [True, True] + [False] * 3
+    mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
+
+    frame_size = int(16000 * 20 / 1000)
+    def run_stream(transcriber):
+        audio_queue = queue.Queue()
+        for _ in range(5):
+            audio_queue.put(np.ones(frame_size, dtype=np.int16))
+        audio_queue.put(None)
+        on_transcription = mocker.Mock()
+        transcriber.transcribe_stream(audio_queue, on_transcription, None, max_silence_frames=2)
+        return on_transcription.call_args.args[0]
+
+    transcriber = Transcriber(model_size="small", device="cpu")
+    transcriber.set_decode_mode('no_fallback')
+    assert run_stream(transcriber) == " big model"
+    _, kwargs = mock_model.transcribe.call_args
+    assert kwargs["temperature"] == 0.0 and kwargs["beam_size"] is None
+
+    load = transcriber.get_load()
+    assert load['decode_mode'] == 'no_fallback'
+    assert load['pending_segments'] == 0
+    assert load['rtf'] >= 0.0
+
+    mock_vad.is_speech.side_effect = [True, True] + [False] * 3
+    transcriber.set_decode_mode('smaller_model', small_backend)
+    assert run_stream(transcriber) == " small model"
+    assert mock_model.transcribe.call_count == 1
+
+def test_transcribe_stream_two_pass_refines_delivered_segments(mocker):
+    """Live text comes from the fast backend, every segment is re-decoded by the refine backend"""
+    mock_model = mocker.Mock()
+    mock_model.transcribe.side_effect = [{"text": " live one", "segments": []}, 
+                                         {"text": " live two", "segments": []}]
+    mocker.patch("transcriber_app.transcriber.whisper.load_model", return_value=mock_model)
+
+    refine_backend = mocker.Mock()
+    refine_backend.thread_safe = False
+    refine_backend.transcribe.side_effect = [{"text": " accurate one", "segments": []}, 
+                                             {"text": " accurate two", "segments": []}]
+
+    mock_vad = mocker.Mock()
+    mock_vad.is_speech.side_effect = [True, True, False, False, False, True, True, False, False, False]
+    mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
+
+    frame_size = int(16000 * 20 / 1000)
+    audio_queue = queue.Queue()
+    for _ in range(10):
+        audio_queue.put(np.ones(frame_size, dtype=np.int16))
+    audio_queue.put(None)
+
+    on_transcription = mocker.Mock()
+    on_refined = mocker.Mock()
+    transcriber = Transcriber(model_size="base", device="cpu")
+    transcriber.transcribe_stream(audio_queue, on_transcription, None, max_silence_frames=2,
+                                  refine_backend=refine_backend, on_refined=on_refined)
+
+    assert [call.args[0] for call in on_transcription.call_args_list] == [" live one", " live two"]
+
+    # The second pass has finished by the time transcribe_stream returns, in segment order
+    assert [call.args for call in on_refined.call_args_list] == [(0, " accurate one"), (1, " accurate two")]
+    assert len(refine_backend.transcribe.call_args.args[0]) == 2 * frame_size
+
+def test_numpy_vad_engine_segments_without_webrtcvad(mocker):
+    """The batch engine classifies buffered frames itself; webrtcvad is never created"""
+    mocker.patch("transcriber_app.transcriber.whisper.load_model", return_value=mocker.Mock(
+        transcribe=mocker.Mock(return_value={"text": " speech", "segments": []})))
+    webrtc = mocker.patch("transcriber_app.segmenters.webrtcvad.Vad")
+
+    frame_size = 320
+    rng = np.random.default_rng(0)
+    t = np.arange(frame_size * 30) / 16000
+    voiced = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 15))
+    voiced = (3000 * voiced / np.abs(voiced).max()).astype(np.int16)
+    def silence(n_frames):
+        return (rng.standard_normal(frame_size * n_frames) * 10).astype(np.int16)
+    audio = np.concatenate([silence(20), voiced, silence(30), voiced, silence(30)])
+
+    audio_queue = queue.Queue()
+    for start in range(0, len(audio), 8000):
+        audio_queue.put(audio[start:start + 8000])
+    audio_queue.put(None)
+
+    chunks = []
+    transcriber = Transcriber(model_size="small", device="cpu")
+    transcriber.transcribe_stream(audio_queue, lambda text, duration: chunks.append(text), None, mocker.Mock(),
+                                  max_silence_frames=10, vad_engine="numpy")
+
+    assert chunks == [" speech", " speech"]
+    webrtc.assert_not_called()
+    assert transcriber.get_vad_stats()['vad_calls'] == 0
+
+def test_unknown_vad_engine_rejected(mocker):
+    mocker.patch("transcriber_app.transcriber.whisper.load_model")
+    transcriber = Transcriber(model_size="small", device="cpu")
+    with pytest.raises(ValueError):
+        transcriber.transcribe_stream(queue.Queue(), None, None, vad_engine="silero")
+
+def test_frame_duration_change_reframes_and_keeps_endpoint_latency(mocker):
+    """A frame size switch takes effect at the next chunk boundary; endpoint silence stays 200ms"""
+    mocker.patch("transcriber_app.transcriber.whisper.load_model", return_value=mocker.Mock(
+        transcribe=mocker.Mock(return_value={"text": " speech", "segments": []})))
+
+    frame_lengths = []
+    silence_run = []
+    def is_speech(frame_bytes, sample_rate):
+        frame = np.frombuffer(frame_bytes, dtype=np.int16)
+        frame_lengths.append(len(frame))
+        speech = bool(np.abs(frame).mean() > 500)
+        silence_run.append(0 if speech else (silence_run[-1] if silence_run else 0) + len(frame))
+        return speech
+    mock_vad = mocker.Mock()
+    mock_vad.is_speech.side_effect = is_speech
+    mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
+
+    # 0.6s bursts of "speech" and silence, delivered in 0.25s blocks (not a multiple of 30ms frames)
+    audio = np.concatenate([np.full(9600, 3000, np.int16), np.zeros(9600, np.int16)] * 3)
+    audio_queue = queue.Queue()
+    for start in range(0, len(audio), 4000):
+        audio_queue.put(audio[start:start + 4000])
+    audio_queue.put(None)
+
+    chunks = []
+    transcriber = Transcriber(model_size="small", device="cpu")
+    endpoint_silence = []       # Silence heard when each segment was emitted
+    emit = transcriber._emit_segment
+    def record_emit(*args, **kwargs):
+        endpoint_silence.append(silence_run[-1])
+        emit(*args, **kwargs)
+    transcriber._emit_segment = record_emit
+    transcriber.update_parameters(aggressiveness=3, frame_duration_ms=30, max_silence_frames=10)
+    transcriber.transcribe_stream(audio_queue, lambda text, duration: chunks.append(text), None,
+                                  frame_duration_ms=20, max_silence_frames=10)
+
+    assert chunks == [" speech"] * 3
+    # 20ms frames until the first endpoint, 30ms frames afterwards
+    switch = frame_lengths.index(480)
+    assert set(frame_lengths[:switch]) == {320} and set(frame_lengths[switch:]) == {480}
+    assert transcriber.current_endpoint_silence_ms == 200
+
+    # Each endpoint fired on the first frame past 200ms of silence: 220ms at 20ms frames, 210ms at 30ms
+    assert endpoint_silence == [220 * 16, 210 * 16, 210 * 16]
+    assert transcriber.get_vad_stats()['frames'] == len(frame_lengths)
+
+def test_transcribe_stream_reads_from_audio_ring_buffer(mocker):
+    """The microphone's lock-free ring can stand in for the audio queue"""
+    import threading
+    from transcriber_app.audio_buffers import AudioRingBuffer
+    mocker.patch("transcriber_app.transcriber.whisper.load_model", return_value=mocker.Mock(
+        transcribe=mocker.Mock(return_value={"text": " speech", "segments": []})))
+    mock_vad = mocker.Mock()
+    mock_vad.is_speech.side_effect = lambda frame_bytes, sample_rate: np.frombuffer(frame_bytes, np.int16)[0] > 0
+    mocker.patch("transcriber_app.segmenters.webrtcvad.Vad", return_value=mock_vad)
+
+    # Two 0.5s bursts of "speech", written 480 float samples at a time like the audio callback
+    audio = np.tile(np.concatenate([np.full(8000, 0.1, np.float32), np.zeros(8000, np.float32)]), 2)
+    ring = AudioRingBuffer(capacity=4800, poll_interval=0.001, overflow_policy='block')
+    def callback():
+        for start in range(0, len(audio), 480):
+            ring.write_float(audio[start:start + 480])      # Waits for the transcriber to catch up
+        ring.close()
+    producer = threading.Thread(target=callback)
+    producer.start()
+
+    durations = []
+    transcriber = Transcriber(model_size="small", device="cpu")
+    transcriber.transcribe_stream(ring, lambda text, duration: durations.append(duration), None)
+    producer.join()
+
+    assert durations == [0.5, 0.5]
+    assert transcriber.get_vad_stats()['frames'] == len(audio) // 320
+
+def test_every_load_shedding_step_changes_the_decode(mocker):
+    """Each mode down the shedding ladder sends the backend cheaper settings (or another backend)"""
+    from transcriber_app.adaptive_controller import LOAD_SHEDDING_MODES
+    mock_model = mocker.Mock()
+    mock_model.transcribe.return_value = {"text": " text", "segments": []}
+    mocker.patch("transcriber_app.asr_backends.whisper.load_model", return_value=mock_model)
+    transcriber = Transcriber(model_size="small", device="cpu")
+    small_backend = create_backend("whisper", "base", "cpu")
+
+    decodes = []
+    for mode in LOAD_SHEDDING_MODES:
+        transcriber.set_decode_mode(mode, small_backend if mode == 'smaller_model' else None)
+        transcriber._decode(np.zeros(16000, dtype=np.float32), backend=transcriber.decode_backend,
+                            **transcriber.decode_options)
+        decodes.append((transcriber.decode_backend, mock_model.transcribe.call_args.kwargs))
+
+    for previous, current in zip(decodes, decodes[1:]):
+        assert previous != current
+    # 'full' keeps the baseline decode (temperature fallback), the first step drops the fallback
+    assert "temperature" not in decodes[0][1] and decodes[1][1]["temperature"] == 0.0
@@ -0,0 +1,83 @@
+import pytest
+import numpy as np
+from transcriber_app.vad import EnergyGate, NumpyVAD
+
+def energy_at(dbfs):
+    """Mean-square int16 energy of a frame at the given level"""
+    return (32768.0 ** 2) * 10 ** (dbfs / 10)
+
+def test_energy_gate_gates_frames_near_noise_floor():
+    gate = EnergyGate(margin_db=6.0, max_gate_db=-45.0)
+    energies = np.array([energy_at(db) for db in (-70, -68, -66, -30, -20, -62)])
+
+    # Floor starts at the quietest frame (-70 dBFS), threshold -64 dBFS
+    assert gate.classify(energies) == [True, True, True, False, False, False]
+    assert abs(gate.noise_floor_db + 70.0) < 1e-3
+
+def test_energy_gate_never_gates_above_max_level():
+    # A loud room: the floor is -40 dBFS, but nothing above -45 dBFS is gated
+    gate = EnergyGate(margin_db=6.0, max_gate_db=-45.0)
+    energies = np.array([energy_at(db) for db in (-40, -39, -38)])
+    assert gate.classify(energies) == [False, False, False]
+
+def test_energy_gate_floor_rises_slowly():
+    gate = EnergyGate(floor_rise_db=0.1)
+    gate.classify(np.array([energy_at(-80)] * 4))
+    assert abs(gate.noise_floor_db + 80.0) < 1e-3
+
+    # The room gets louder: the floor moves up 0.1 dB per frame, not straight to -60
+    gate.classify(np.array([energy_at(-60)] * 10))
+    assert abs(gate.noise_floor_db + 79.0) < 1e-3
+
+    gate.reset()
+    assert gate.noise_floor_db is None
+
+def voiced_frames(n_frames, frame_size=320, amplitude=3000, seed=0):
+    """Harmonic "vowel" (150 Hz pitch) with a little noise, int16 frames"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_frames * frame_size) / 16000
+    signal = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 15))
+    signal = amplitude * signal / np.abs(signal).max() + rng.standard_normal(len(t)) * 10
+    return signal.astype(np.int16).reshape(n_frames, frame_size)
+
+def noise_frames(n_frames, frame_size=320, amplitude=10, seed=1):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal((n_frames, frame_size)) * amplitude).astype(np.int16)
+
+def test_numpy_vad_detects_voiced_frames_with_hangover():
+    vad = NumpyVAD(aggressiveness=3)
+    frames = np.concatenate([noise_frames(20), voiced_frames(10), noise_frames(20)])
+    decisions = vad.classify(frames)
+
+    # 100ms hangover at 20ms frames: 5 more frames of speech after the voiced ones
+    assert decisions[:20] == [False] * 20
+    assert decisions[20:30] == [True] * 10
+    assert decisions[30:35] == [True] * 5
+    assert decisions[35:] == [False] * 15
+
+def test_numpy_vad_block_split_matches_whole_block():
+    frames = np.concatenate([noise_frames(20), voiced_frames(10), noise_frames(20)])
+    whole = NumpyVAD(aggressiveness=2).classify(frames)
+
+    vad = NumpyVAD(aggressiveness=2)
+    split = []
+    for start in range(0, len(frames), 7):
+        split += vad.classify(frames[start:start + 7])
+    assert split == whole
+
+    # Single-frame, webrtcvad-style calls agree as well
+    vad = NumpyVAD(aggressiveness=2)
+    assert [vad.is_speech(frame.tobytes(), 16000) for frame in frames] == whole
+
+def test_numpy_vad_aggressiveness():
+    # Quiet, breathy frames: accepted by the lenient mode only
+    frames = np.concatenate([noise_frames(20), noise_frames(10, amplitude=25, seed=2)])
+    lenient = NumpyVAD(aggressiveness=0).classify(frames)
+    strict = NumpyVAD(aggressiveness=3).classify(frames)
+    assert sum(strict) <= sum(lenient)
+
+    vad = NumpyVAD()
+    vad.set_aggressiveness(1)
+    assert vad.aggressiveness == 1
+    with pytest.raises(ValueError):
+        vad.set_aggressiveness(4)
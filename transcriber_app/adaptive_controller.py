@@ -1,6 +1,15 @@
 import threading
 import time
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Optional
+
+# Decode modes for load shedding, from full quality to cheapest
+# - full: the backend's normal decode settings
+# - no_fallback: greedy at temperature 0 only, no re-decodes when the output looks bad
+# - smaller_model: no_fallback on a smaller model size (e.g. tiny or base)
+# Every step must shed work on every backend: a 'greedy' step (no beam search) would change
+# nothing for openai-whisper, whose transcribe() already decodes greedily, so it isn't a rung
+# (Transcriber.set_decode_mode still accepts it)
+LOAD_SHEDDING_MODES = ('full', 'no_fallback', 'smaller_model')
 
 class AdaptiveController:
     """
@@ -17,7 +26,12 @@ class AdaptiveController:
                  silence_ratio_threshold_low=0.3,
                  wpm_threshold_fast=150,
                  wpm_threshold_slow=80,
-                 chunk_averaging_window=5):
+                 chunk_averaging_window=5,
+                 backlog_threshold_high=3,
+                 rtf_threshold_high=0.9,
+                 rtf_threshold_low=0.5,
+                 load_recovery_segments=5,
+                 max_load_shedding_level=len(LOAD_SHEDDING_MODES) - 1):
 
         # Thresholds for parameter adjustment
         self.confidence_threshold_low = confidence_threshold_low 
@@ -27,6 +41,13 @@ class AdaptiveController:
         self.wpm_threshold_fast = wpm_threshold_fast 
         self.wpm_threshold_slow = wpm_threshold_slow 
         self.chunk_averaging_window = chunk_averaging_window 
+
+        # Thresholds for load shedding
+        self.backlog_threshold_high = backlog_threshold_high    # Pending segments that count as falling behind
+        self.rtf_threshold_high = rtf_threshold_high            # Decode time / audio time that counts as falling behind
+        self.rtf_threshold_low = rtf_threshold_low              # Below this (with no backlog) there is headroom again
+        self.load_recovery_segments = load_recovery_segments    # Calm segments in a row before stepping back up
+        self.max_load_shedding_level = max_load_shedding_level
         
         # Current parameter values
         self.current_aggressiveness = 3
@@ -48,6 +69,12 @@ class AdaptiveController:
         # Debug info
         self.last_adjustment_time = time.time()
         self.adjustment_count = 0
+
+        # Load shedding state
+        self.load_shedding_level = 0        # Index into LOAD_SHEDDING_MODES
+        self.segments_since_mode_switch = 0
+        self.calm_segments = 0
+        self.mode_switches = []             # History of decode mode changes, see get_status()
     
     def get_current_parameters(self) -> Tuple[int, int, int]:
         # Get the current chunking parameters and return them as a tuple
@@ -225,6 +252,55 @@ class AdaptiveController:
             
             return True
     
+    def get_decode_mode(self) -> str:
+        with self.lock:
+            return LOAD_SHEDDING_MODES[self.load_shedding_level]
+
+    def update_load(self, pending_segments: int, rtf: float) -> Optional[str]:
+        # Load shedding: called once per decoded segment with the inference backlog and the
+        # recent real-time factor. Steps to a cheaper decode mode while inference can't keep
+        # up, and back up once the backlog has cleared and there is headroom again.
+        # Returns the new decode mode when it changes, otherwise None.
+
+        with self.lock:
+            self.segments_since_mode_switch += 1
+            overloaded = pending_segments >= self.backlog_threshold_high or rtf > self.rtf_threshold_high
+            has_headroom = pending_segments == 0 and rtf < self.rtf_threshold_low
+
+            new_level = self.load_shedding_level
+            if overloaded:
+                self.calm_segments = 0
+                # Give the previous switch a segment to take effect before shedding more
+                if self.load_shedding_level < self.max_load_shedding_level and self.segments_since_mode_switch >= 2:
+                    new_level = self.load_shedding_level + 1
+                reason = f"falling behind ({pending_segments} pending segments, RTF {rtf:.2f})"
+            elif has_headroom:
+                self.calm_segments += 1
+                if self.load_shedding_level > 0 and self.calm_segments >= self.load_recovery_segments:
+                    new_level = self.load_shedding_level - 1
+                reason = f"backlog cleared (RTF {rtf:.2f})"
+            else:
+                self.calm_segments = 0
+
+            if new_level == self.load_shedding_level:
+                return None
+
+            old_mode = LOAD_SHEDDING_MODES[self.load_shedding_level]
+            new_mode = LOAD_SHEDDING_MODES[new_level]
+            self.load_shedding_level = new_level
+            self.segments_since_mode_switch = 0
+            self.calm_segments = 0
+            self.mode_switches.append({
+                'time': time.time(),
+                'from': old_mode,
+                'to': new_mode,
+                'reason': reason,
+                'pending_segments': pending_segments,
+                'rtf': rtf
+            })
+            print(f"[ADAPTIVE] Decode mode: {old_mode} → {new_mode}, {reason}")
+            return new_mode
+
     def get_status(self) -> Dict:
         with self.lock:
             return {
@@ -235,7 +311,10 @@ class AdaptiveController:
                 'last_adjustment_time': self.last_adjustment_time,
                 'chunk_counter': self.chunk_counter,
                 'buffer_size': len(self.metrics_buffer),
-                'averaging_window': self.chunk_averaging_window
+                'averaging_window': self.chunk_averaging_window,
+                'decode_mode': LOAD_SHEDDING_MODES[self.load_shedding_level],
+                'mode_switch_count': len(self.mode_switches),
+                'mode_switches': list(self.mode_switches)
             }
     
     def reset(self):
@@ -248,4 +327,8 @@ class AdaptiveController:
             self.last_adjustment_time = time.time()
             self.chunk_counter = 0
             self.metrics_buffer.clear()
+            self.load_shedding_level = 0
+            self.segments_since_mode_switch = 0
+            self.calm_segments = 0
+            self.mode_switches.clear()
             print("[ADAPTIVE] Controller reset to default parameters") 
\ No newline at end of file
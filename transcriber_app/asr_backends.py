@@ -0,0 +1,399 @@
+import contextlib
+import os
+import threading
+import numpy as np
+import torch
+import whisper
+
+# Every backend returns the same result shape as openai-whisper's model.transcribe:
+#   {
+#       'text': str,
+#       'segments': [{'start': float, 'end': float, 'text': str, 'avg_logprob': float}, ...],
+#       'language': str
+#   }
+# so Transcriber._extract_confidence and the metrics callbacks work unchanged.
+
+# Every backend takes mono audio at Whisper's sample rate (16 kHz)
+SAMPLE_RATE = whisper.audio.SAMPLE_RATE
+
+def _model_files_bytes(directory, suffixes):
+    """Total size of the files in directory (and below) whose names end with one of suffixes."""
+    total = 0
+    for root, _, files in os.walk(directory):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files if name.endswith(suffixes))
+    return total
+
+class ASRBackend:
+    """Base class for speech recognition engines used by the Transcriber."""
+
+    name = None
+    full_decode_options = {}    # Decode settings at full quality (the 'full' load shedding mode)
+    fast_decode_options = {}    # Cheap decode settings, used for warm-up and partial results
+    greedy_decode_options = {}  # Decode settings that turn off beam search / best-of sampling
+    thread_safe = False         # Whether transcribe() may run from several threads at once
+    feature_mels = None         # Mel bins of the log-mel input transcribe_features() takes (None = audio only)
+    supports_batching = False   # Whether transcribe_batch() decodes several segments in one pass
+
+    def __init__(self, model_size, device):
+        self.model_size = model_size
+        self.device = device
+        self.model = None
+        self.is_warm = False
+        # Serialises transcribe() when not thread_safe, across every Transcriber (session) sharing the model
+        self.decode_lock = threading.Lock()
+
+    def transcribe(self, audio_float, language="en", **options):
+        """Transcribe float32 16 kHz mono audio in [-1, 1]."""
+        raise NotImplementedError
+
+    def transcribe_features(self, features, audio_float, language="en", **options):
+        """
+        Transcribe from precomputed Whisper log-mel features, an (feature_mels, 3000) float32
+        array as made by features.IncrementalLogMel. Backends without a mel input decode
+        the audio instead.
+        """
+        return self.transcribe(audio_float, language=language, **options)
+
+    def memory_bytes(self):
+        """Approximate memory the loaded model's weights take, in bytes (None if the backend can't tell)."""
+        return None
+
+    def transcribe_batch(self, audio_floats, features=None, language="en", **options):
+        """Transcribe several segments; one result per segment. Backends without batching decode them in turn."""
+        features = features or [None] * len(audio_floats)
+        results = []
+        for audio_float, feature in zip(audio_floats, features):
+            if feature is not None and self.feature_mels == feature.shape[0]:
+                results.append(self.transcribe_features(feature, audio_float, language=language, **options))
+            else:
+                results.append(self.transcribe(audio_float, language=language, **options))
+        return results
+
+    def warm_up(self, segment_seconds=(1.0, 5.0, 15.0), sample_rate=SAMPLE_RATE, features=False):
+        """
+        Run a few throwaway decodes at different segment lengths, so lazy allocations and
+        kernel selection happen now instead of on the first real segment of a session.
+        The decodes use the path sessions start on: the 'full' decode settings, and the
+        transcribe_features() path when sessions decode precomputed features (features=True).
+        """
+        rng = np.random.default_rng(0)
+        for seconds in segment_seconds:
+            # Low-level noise rather than digital silence, so the full decode path runs
+            audio = (rng.standard_normal(int(seconds * sample_rate)) * 0.01).astype(np.float32)
+            # The model is shared (ModelRegistry): a session may already be decoding on it
+            with self.decode_lock if not self.thread_safe else contextlib.nullcontext():
+                if features and self.feature_mels:
+                    mel = whisper.log_mel_spectrogram(audio, self.feature_mels, padding=whisper.audio.N_SAMPLES)
+                    self.transcribe_features(mel[:, :whisper.audio.N_FRAMES].numpy(), audio, language="en",
+                                             **self.full_decode_options)
+                else:
+                    self.transcribe(audio, language="en", **self.full_decode_options)
+        self.is_warm = True
+
+
+class WhisperBackend(ASRBackend):
+    """openai-whisper (PyTorch). The default engine."""
+
+    name = "whisper"
+    fast_decode_options = {'temperature': 0.0}     # Greedy, no temperature fallback loop
+    greedy_decode_options = {'beam_size': None, 'best_of': None}
+    supports_batching = True
+
+    def __init__(self, model_size, device, quantize=False):
+        super().__init__(model_size, device)
+        self.model = whisper.load_model(model_size, device=device)
+        self.quantized = False
+        if quantize:
+            self._quantize_linear_layers()
+
+    def _quantize_linear_layers(self):
+        """
+        Dynamic int8 quantization of every linear layer (attention projections and MLPs,
+        most of the model's weights and compute). Weights are stored as int8 and activations
+        are quantized on the fly, so there is no calibration step. CPU only.
+        """
+        if self.device != "cpu":
+            raise ValueError("int8 dynamic quantization is only supported on CPU")
+
+        # whisper.model.Linear only adds an fp16 cast to nn.Linear; quantize_dynamic matches exact
+        # module types, so turn them back into plain nn.Linear (same weights) first
+        for module in self.model.modules():
+            if type(module) is whisper.model.Linear:
+                module.__class__ = torch.nn.Linear
+
+        torch.ao.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        self.quantized = True
+
+    @property
+    def feature_mels(self):
+        return self.model.dims.n_mels       # 80, or 128 for large-v3
+
+    def memory_bytes(self):
+        """Size of the PyTorch weights (int8 packed weights included)."""
+        total = 0
+        for value in self.model.state_dict().values():
+            # Dynamically quantized layers store (weight, bias) tuples
+            for tensor in (value if isinstance(value, tuple) else (value,)):
+                if isinstance(tensor, torch.Tensor):
+                    total += tensor.numel() * tensor.element_size()
+        return total
+
+    def transcribe(self, audio_float, language="en", **options):
+        return self.model.transcribe(
+            audio_float,
+            fp16=(self.device != "cpu"),
+            language=language,
+            **options
+        )
+
+    def transcribe_features(self, features, audio_float, language="en",
+                            temperature=(0.0, 0.2, 0.4, 0.6, 0.8, 1.0), compression_ratio_threshold=2.4,
+                            logprob_threshold=-1.0, no_speech_threshold=0.6, **options):
+        """
+        Decode one 30 s window of precomputed features with whisper.decode (model.transcribe
+        only takes audio), using the same temperature fallback and no-speech rules.
+        """
+        mel = torch.from_numpy(features).to(self.model.device)
+        temperatures = [temperature] if isinstance(temperature, (int, float)) else temperature
+        thresholds = (compression_ratio_threshold, logprob_threshold, no_speech_threshold)
+
+        for t in temperatures:
+            decoded = whisper.decode(self.model, mel, self._decoding_options(language, t, options))
+            needs_fallback, is_silence = self._check_decode(decoded, *thresholds)
+            if not needs_fallback or is_silence:
+                break
+
+        return self._result(decoded, t, is_silence, audio_float, language)
+
+    def transcribe_batch(self, audio_floats, features=None, language="en",
+                         temperature=(0.0, 0.2, 0.4, 0.6, 0.8, 1.0), compression_ratio_threshold=2.4,
+                         logprob_threshold=-1.0, no_speech_threshold=0.6, **options):
+        """
+        Decode several segments (each at most 30 s) in one padded batch: their mels are
+        stacked, so the encoder and decoder run once for all of them. Only the first
+        temperature is batched; segments that need the fallback are redone one by one.
+        """
+        features = features or [None] * len(audio_floats)
+        mels = []
+        for audio_float, feature in zip(audio_floats, features):
+            if feature is None or feature.shape[0] != self.feature_mels:
+                # Pad to a full window, as transcribe() does
+                feature = whisper.log_mel_spectrogram(audio_float, self.feature_mels,
+                                                      padding=whisper.audio.N_SAMPLES)[:, :whisper.audio.N_FRAMES]
+            else:
+                feature = torch.from_numpy(feature)
+            mels.append(feature)
+        mel = torch.stack(mels).to(self.model.device)
+
+        temperatures = [temperature] if isinstance(temperature, (int, float)) else list(temperature)
+        thresholds = (compression_ratio_threshold, logprob_threshold, no_speech_threshold)
+        decoded_batch = whisper.decode(self.model, mel, self._decoding_options(language, temperatures[0], options))
+
+        results = []
+        for i, decoded in enumerate(decoded_batch):
+            needs_fallback, is_silence = self._check_decode(decoded, *thresholds)
+            if needs_fallback and not is_silence and len(temperatures) > 1:
+                results.append(self.transcribe_features(
+                    mel[i].cpu().numpy(), audio_floats[i], language=language, temperature=temperatures[1:],
+                    compression_ratio_threshold=compression_ratio_threshold,
+                    logprob_threshold=logprob_threshold, no_speech_threshold=no_speech_threshold, **options))
+            else:
+                results.append(self._result(decoded, temperatures[0], is_silence, audio_floats[i], language))
+        return results
+
+    def _decoding_options(self, language, t, options):
+        kwargs = dict(options)
+        if t > 0:
+            # Sampling: beam search options don't apply
+            kwargs.pop('beam_size', None)
+            kwargs.pop('patience', None)
+        else:
+            kwargs.pop('best_of', None)
+        return whisper.DecodingOptions(language=language, fp16=(self.device != "cpu"), temperature=t, **kwargs)
+
+    def _check_decode(self, decoded, compression_ratio_threshold, logprob_threshold, no_speech_threshold):
+        """(needs a higher temperature, is silence), by transcribe()'s rules."""
+        needs_fallback = (
+            (compression_ratio_threshold is not None and decoded.compression_ratio > compression_ratio_threshold)
+            or (logprob_threshold is not None and decoded.avg_logprob < logprob_threshold)
+        )
+        is_silence = (
+            no_speech_threshold is not None and logprob_threshold is not None
+            and decoded.no_speech_prob > no_speech_threshold
+            and decoded.avg_logprob < logprob_threshold
+        )
+        return needs_fallback, is_silence
+
+    def _result(self, decoded, t, is_silence, audio_float, language):
+        # transcribe() drops windows it considers silence
+        if is_silence or not decoded.text:
+            return {'text': "", 'segments': [], 'language': language}
+
+        text = " " + decoded.text       # transcribe() keeps the tokenizer's leading space
+        return {
+            'text': text,
+            'segments': [{
+                'id': 0,
+                'start': 0.0,
+                'end': len(audio_float) / SAMPLE_RATE,
+                'text': text,
+                'tokens': decoded.tokens,
+                'temperature': t,
+                'avg_logprob': decoded.avg_logprob,
+                'compression_ratio': decoded.compression_ratio,
+                'no_speech_prob': decoded.no_speech_prob
+            }],
+            'language': language
+        }
+
+
+class QuantizedWhisperBackend(WhisperBackend):
+    """openai-whisper with int8 dynamically quantized linear layers, for CPU-only hosts."""
+
+    name = "whisper-int8"
+
+    def __init__(self, model_size, device):
+        super().__init__(model_size, device, quantize=True)
+
+
+class FasterWhisperBackend(ASRBackend):
+    """
+    faster-whisper (CTranslate2). Runs int8 on CPU by default, which is usually the
+    biggest throughput gain available on CPU-only hosts.
+    Requires: pip install faster-whisper
+    """
+
+    name = "faster-whisper"
+    fast_decode_options = {'temperature': 0.0, 'beam_size': 1}
+    greedy_decode_options = {'beam_size': 1, 'best_of': 1}
+    thread_safe = True          # CTranslate2 models can serve concurrent calls
+
+    def __init__(self, model_size, device, compute_type=None, beam_size=5):
+        super().__init__(model_size, device)
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise ImportError("The 'faster-whisper' backend needs the faster-whisper package "
+                              "(pip install faster-whisper)") from e
+
+        # int8 on CPU, fp16 on GPU unless told otherwise
+        self.compute_type = compute_type or ("int8" if device == "cpu" else "float16")
+        self.beam_size = beam_size
+        self.model = WhisperModel(model_size, device=device, compute_type=self.compute_type)
+
+    def memory_bytes(self):
+        """
+        Size of the CTranslate2 weights file. The published models are stored as float16, so
+        this overestimates an int8 compute_type (about half of it is loaded).
+        """
+        model_dir = self.model_size
+        if not os.path.isdir(model_dir):
+            try:
+                from faster_whisper.utils import download_model
+                # The directory WhisperModel loaded from (already cached, so nothing is downloaded)
+                model_dir = download_model(self.model_size, local_files_only=True)
+            except Exception:
+                return None
+        return _model_files_bytes(model_dir, ("model.bin",)) or None
+
+    def transcribe(self, audio_float, language="en", **options):
+        options.setdefault('beam_size', self.beam_size)
+
+        # faster-whisper returns a lazy generator, decoding happens while we iterate
+        segments, info = self.model.transcribe(audio_float, language=language, **options)
+        segments = [
+            {
+                'id': i,
+                'start': segment.start,
+                'end': segment.end,
+                'text': segment.text,
+                'avg_logprob': segment.avg_logprob,
+                'no_speech_prob': segment.no_speech_prob
+            }
+            for i, segment in enumerate(segments)
+        ]
+        return {
+            'text': "".join(segment['text'] for segment in segments),
+            'segments': segments,
+            'language': info.language
+        }
+
+
+class OnnxWhisperBackend(ASRBackend):
+    """
+    Whisper exported to ONNX and run with ONNX Runtime (through Hugging Face Optimum).
+    model_path can point at a pre-exported model directory; otherwise openai/whisper-<size>
+    is exported on first load. Audio longer than Whisper's 30 s window is truncated.
+    Requires: pip install optimum[onnxruntime] transformers
+    """
+
+    name = "onnx"
+    greedy_decode_options = {'num_beams': 1}
+    thread_safe = True          # ONNX Runtime sessions can serve concurrent calls
+
+    def __init__(self, model_size, device, model_path=None):
+        super().__init__(model_size, device)
+        try:
+            from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+            from transformers import WhisperProcessor
+        except ImportError as e:
+            raise ImportError("The 'onnx' backend needs optimum[onnxruntime] and transformers "
+                              "(pip install optimum[onnxruntime] transformers)") from e
+
+        model_id = model_path or f"openai/whisper-{model_size}"
+        provider = "CPUExecutionProvider" if device == "cpu" else "CUDAExecutionProvider"
+        self.processor = WhisperProcessor.from_pretrained(model_id)
+        self.model = ORTModelForSpeechSeq2Seq.from_pretrained(model_id, export=model_path is None, provider=provider)
+
+    def memory_bytes(self):
+        """Size of the ONNX graphs and their external weights, each of which gets its own session."""
+        model_dir = getattr(self.model, 'model_save_dir', None)
+        if model_dir is None:
+            return None
+        return _model_files_bytes(model_dir, (".onnx", ".onnx_data", ".onnx.data")) or None
+
+    def transcribe(self, audio_float, language="en", **options):
+        features = self.processor(audio_float, sampling_rate=SAMPLE_RATE, return_tensors="pt").input_features
+        output = self.model.generate(
+            features,
+            language=language,
+            task="transcribe",
+            return_dict_in_generate=True,
+            output_scores=True,
+            **options
+        )
+
+        # Per-token log probabilities -> one avg_logprob, like Whisper's segment-level value
+        # (with beam search the scores have to be traced back along the chosen beam)
+        beam_indices = getattr(output, 'beam_indices', None)
+        scores = self.model.compute_transition_scores(output.sequences, output.scores, beam_indices,
+                                                      normalize_logits=beam_indices is None)
+        avg_logprob = float(scores[0].mean()) if scores.numel() > 0 else 0.0
+        text = self.processor.batch_decode(output.sequences, skip_special_tokens=True)[0]
+
+        return {
+            'text': text,
+            'segments': [{
+                'id': 0,
+                'start': 0.0,
+                'end': len(audio_float) / SAMPLE_RATE,
+                'text': text,
+                'avg_logprob': avg_logprob
+            }],
+            'language': language
+        }
+
+
+# Backends selectable by name (e.g. ASR_BACKEND in main.py)
+BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    QuantizedWhisperBackend.name: QuantizedWhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+    OnnxWhisperBackend.name: OnnxWhisperBackend
+}
+
+def create_backend(backend, model_size, device, **options):
+    """Instantiate the named backend and load its model."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown ASR backend '{backend}'. Choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[backend](model_size, device, **options)
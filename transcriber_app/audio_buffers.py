@@ -0,0 +1,519 @@
+import os
+import time
+import queue
+import tempfile
+import numpy as np
+from collections import deque
+
+class FrameRingBuffer:
+    """
+    Fixed-capacity int16 ring buffer used by the VAD framing loop.
+    The first max_frame_size samples are mirrored past the end of the storage, so any
+    frame (up to max_frame_size long) is one contiguous slice and can be handed out as a
+    zero-copy view, even when it wraps around the end of the ring.
+    """
+
+    def __init__(self, capacity, max_frame_size=480):
+        if max_frame_size > capacity:
+            raise ValueError("max_frame_size cannot be larger than capacity")
+
+        self.capacity = capacity
+        self.max_frame_size = max_frame_size
+
+        # Storage + mirror of the head, allocated once
+        self.buffer = np.zeros(capacity + max_frame_size, dtype=np.int16)
+
+        # Byte-level view of the same memory, so VAD frames are just slices of it
+        # (webrtcvad derives the sample count from len(buf) / 2)
+        self.byte_view = memoryview(self.buffer).cast('B')
+        self.read_pos = 0       # Index of the oldest unread sample
+        self.available = 0      # Samples written but not yet read
+
+    def __len__(self):
+        return self.available
+
+    def free_space(self):
+        return self.capacity - self.available
+
+    def write(self, pcm):
+        """
+        Copy as many samples of pcm as fit into the ring.
+        Returns the number of samples written (like a socket send), so callers can
+        write large blocks in pieces while draining frames in between.
+        """
+        capacity = self.capacity
+        n = len(pcm)
+        free = capacity - self.available
+        if n > free:
+            if free == 0:
+                return 0
+            n = free
+            pcm = pcm[:n]
+
+        write_pos = self.read_pos + self.available
+        if write_pos >= capacity:
+            write_pos -= capacity
+        end = write_pos + n
+
+        if end <= capacity:
+            # Common case: the block fits before the wrap point
+            self.buffer[write_pos:end] = pcm
+            if write_pos < self.max_frame_size:
+                self._mirror(write_pos, end)
+        else:
+            # Part before the wrap point, then the rest from the start of the ring
+            first = capacity - write_pos
+            self.buffer[write_pos:capacity] = pcm[:first]
+            self.buffer[0:n - first] = pcm[first:]
+            self._mirror(0, n - first)
+
+        self.available += n
+        return n
+
+    def _mirror(self, start, end):
+        # Keep the tail copy of [0, max_frame_size) in sync with the head
+        if start < self.max_frame_size:
+            end = min(end, self.max_frame_size)
+            self.buffer[self.capacity + start:self.capacity + end] = self.buffer[start:end]
+
+    def read_frame(self, frame_size):
+        """
+        Return the next frame as (samples, frame_bytes), or None if fewer than frame_size
+        samples are buffered. samples is an int16 view into the ring and frame_bytes a
+        memoryview over the same memory for webrtcvad; both are only valid until the
+        ring wraps over them, so copy the samples if they have to outlive the next writes.
+        """
+        if self.available < frame_size:
+            return None
+        if frame_size > self.max_frame_size:
+            raise ValueError(f"frame_size {frame_size} exceeds max_frame_size {self.max_frame_size}")
+
+        start = self.read_pos
+        end = start + frame_size
+        frame = self.buffer[start:end]
+        frame_bytes = self.byte_view[2 * start:2 * end]
+
+        self.read_pos = end if end < self.capacity else end - self.capacity
+        self.available -= frame_size
+        return frame, frame_bytes
+
+    def read_frames(self, frame_size):
+        """
+        Yield (samples, frame_bytes) for every complete frame currently buffered.
+        Same views as read_frame, without a method call per frame in the hot loop.
+        """
+        if frame_size > self.max_frame_size:
+            raise ValueError(f"frame_size {frame_size} exceeds max_frame_size {self.max_frame_size}")
+
+        buffer = self.buffer
+        byte_view = self.byte_view
+        capacity = self.capacity
+        while self.available >= frame_size:
+            start = self.read_pos
+            end = start + frame_size
+            self.read_pos = end if end < capacity else end - capacity
+            self.available -= frame_size
+            yield buffer[start:end], byte_view[2 * start:2 * end]
+
+    def frame_views(self, frame_size):
+        """
+        Every complete frame currently buffered, in read order, as 2-D (n_frames, frame_size)
+        int16 views, without consuming them. One view per contiguous run: two if the frames
+        wrap the ring, otherwise one.
+        """
+        count = self.available // frame_size
+        if count == 0:
+            return []
+        if frame_size > self.max_frame_size:
+            raise ValueError(f"frame_size {frame_size} exceeds max_frame_size {self.max_frame_size}")
+
+        # Frames starting before the wrap point are contiguous (the last one may run into the mirror),
+        # the rest start again from the beginning of the ring
+        before_wrap = min(count, -(-(self.capacity - self.read_pos) // frame_size))
+        runs = [self.buffer[self.read_pos:self.read_pos + before_wrap * frame_size].reshape(-1, frame_size)]
+        if count > before_wrap:
+            start = self.read_pos + before_wrap * frame_size - self.capacity
+            runs.append(self.buffer[start:start + (count - before_wrap) * frame_size].reshape(-1, frame_size))
+        return runs
+
+    def clear(self):
+        self.read_pos = 0
+        self.available = 0
+
+
+
+class SegmentBuffer:
+    """
+    Growable float32 accumulator for the open speech segment.
+    Speech frames are converted to float32 straight into preallocated storage as they
+    arrive, and finalize() returns a view of them, so the audio is never copied again
+    before Whisper (or on_audio_chunk) sees it.
+
+    Consecutive segments are packed into the same storage block one after another; a new
+    block is only allocated when the open segment doesn't fit in what is left, and only
+    that open segment is copied across. Finalized views keep their block alive, so blocks
+    are never reused or overwritten.
+    """
+
+    def __init__(self, block_seconds=30, sample_rate=16000, scale=32767.0):
+        self.block_size = int(block_seconds * sample_rate)
+        self.scale = np.float32(scale)      # int16 -> [-1, 1], matches the old astype / 32767.0
+        self.storage = np.empty(self.block_size, dtype=np.float32)
+        self.segment_start = 0              # Start of the open segment in storage
+        self.write_pos = 0                  # End of the open segment in storage
+
+    def __len__(self):
+        return self.write_pos - self.segment_start
+
+    def append(self, frame):
+        """Convert an int16 frame to float32 and append it to the open segment."""
+        n = len(frame)
+        end = self.write_pos + n
+        if end > len(self.storage):
+            self._new_block(n)
+            end = self.write_pos + n
+
+        np.divide(frame, self.scale, out=self.storage[self.write_pos:end], dtype=np.float32)
+        self.write_pos = end
+
+    def _new_block(self, extra):
+        # Move the open segment to the start of a fresh block that has room for it to keep growing
+        open_length = self.write_pos - self.segment_start
+        new_size = max(self.block_size, 2 * (open_length + extra))
+        storage = np.empty(new_size, dtype=np.float32)
+        storage[:open_length] = self.storage[self.segment_start:self.write_pos]
+
+        self.storage = storage
+        self.segment_start = 0
+        self.write_pos = open_length
+
+    def peek(self):
+        """View of the open segment so far (it keeps growing; don't hold on to it)."""
+        return self.storage[self.segment_start:self.write_pos]
+
+    def finalize(self):
+        """Close the open segment and return it as a float32 view; the next one starts right after it."""
+        segment = self.storage[self.segment_start:self.write_pos]
+        self.segment_start = self.write_pos
+        return segment
+
+    def split(self, at, keep_from):
+        """
+        Close the open segment at sample `at` and return it as a view, like finalize().
+        The next segment starts at sample keep_from (keep_from < at keeps an overlap), and
+        nothing is copied: the samples after keep_from simply stay where they are.
+        """
+        segment = self.storage[self.segment_start:self.segment_start + at]
+        self.segment_start += keep_from
+        return segment
+
+    def discard(self):
+        """Drop the open segment without emitting it."""
+        self.write_pos = self.segment_start
+
+
+class AudioRingBuffer:
+    """
+    Single-producer / single-consumer int16 ring between the sounddevice callback and the
+    transcriber, without locks or per-block allocation.
+
+    The producer (audio callback) converts each block straight into preallocated storage and
+    then publishes it by advancing write_pos; the consumer only ever advances read_pos. Each
+    position is written by one thread only (a single attribute store), so neither side needs a
+    lock, and the callback never wakes the consumer: get() polls instead.
+
+    The consumer side looks like queue.Queue to the segmenters: get() returns the next
+    contiguous run of buffered samples (variable size, at most up to the end of the storage)
+    as a view, which stays valid until the following get(); put(None) / close() ends the
+    stream once everything buffered has been read.
+
+    capacity is a hard memory bound. When the unread backlog grows past max_backlog, the
+    consumer applies the overflow policy before reading on (so the producer stays lock-free):
+
+    - 'block': nothing is dropped; instead write() waits for space (file replay, never a live callback)
+    - 'drop-oldest': the oldest audio beyond max_backlog is discarded
+    - 'drop-silence-first': frames the VAD calls non-speech are discarded first, oldest first,
+      then the oldest speech if that wasn't enough. Frames are classified once, as the backlog
+      grows past half of max_backlog, and the decisions are kept, so shedding doesn't re-run
+      the VAD over the whole backlog on every read
+    - 'spill-to-disk': the oldest audio is moved to a temporary file and read back before the
+      ring, so nothing is lost and memory stays bounded (latency still grows)
+
+    If the ring fills up completely anyway, the samples that don't fit are dropped (the
+    producer can't move read_pos) and counted as 'overflow'.
+    """
+
+    OVERFLOW_POLICIES = ('block', 'drop-oldest', 'drop-silence-first', 'spill-to-disk')
+
+    def __init__(self, capacity=16000 * 10, block_size=480, poll_interval=0.005, overflow_policy='drop-oldest',
+                 max_backlog=None, vad=None, sample_rate=16000):
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow_policy}'. "
+                             f"Choose from: {', '.join(self.OVERFLOW_POLICIES)}")
+        if overflow_policy == 'drop-silence-first' and vad is None:
+            raise ValueError("The 'drop-silence-first' policy needs a VAD")
+
+        self.capacity = capacity
+        self.block_size = block_size            # Callback block size, for qsize()
+        self.poll_interval = poll_interval      # Seconds get() / a blocked write() sleep while waiting
+        self.overflow_policy = overflow_policy
+        self.max_backlog = capacity * 3 // 4 if max_backlog is None else min(max_backlog, capacity)
+        self.vad = vad                          # webrtcvad-style is_speech(bytes, sample_rate)
+        self.sample_rate = sample_rate
+        self.vad_frame_size = int(sample_rate * 30 / 1000)
+        self.buffer = np.zeros(capacity, dtype=np.int16)
+
+        # 'drop-silence-first': VAD decisions of consecutive whole frames of the backlog, the
+        # first one starting at vad_origin (consumer side only)
+        self.vad_decisions = deque()
+        self.vad_origin = 0
+
+        # Monotonic sample counters, storage index = counter % capacity
+        self.write_pos = 0          # Written by the producer only
+        self.read_pos = 0           # Written by the consumer only
+        self.held = 0               # Samples handed out by the last read, released by the next
+        self.closed = False
+
+        # Spill file for 'spill-to-disk': raw int16, read back from spill_read_offset (in samples)
+        self.spill_file = None
+        self.spill_read_offset = 0
+        self.spill_samples = 0      # Samples in the spill file not yet read back
+
+        self.overflow_count = 0     # Producer writes that didn't fit (completely)
+        self.overflow_samples = 0   # Samples dropped because of them
+        self.underflow_count = 0    # Consumer reads that found the ring empty
+        self.dropped_samples = {'overflow': 0, 'oldest': 0, 'silence': 0, 'speech': 0}
+        self.spilled_samples = 0    # Total moved to disk (not lost)
+
+        # Producer-only scratch for clipping float blocks before conversion (grows to the largest block once)
+        self.clip_buffer = np.empty(block_size, dtype=np.float32)
+
+    # -- Producer side (audio callback) --
+
+    def write(self, pcm):
+        """Copy int16 samples in; returns how many fit."""
+        return self._write(pcm, 1)
+
+    def write_float(self, samples, scale=32767.0):
+        """Convert float32 samples in [-1, 1] to int16 straight into the ring; returns how many fit."""
+        return self._write(samples, scale)
+
+    def _write(self, samples, scale):
+        n = len(samples)
+        if self.overflow_policy == 'block':
+            # Wait for the consumer instead of dropping anything
+            while self.capacity - (self.write_pos - self.read_pos) < min(n, self.capacity) and not self.closed:
+                time.sleep(self.poll_interval)
+            if n > self.capacity:
+                return self._write(samples[:self.capacity], scale) + self._write(samples[self.capacity:], scale)
+
+        write_pos = self.write_pos
+        free = self.capacity - (write_pos - self.read_pos)
+        if n > free:
+            self.overflow_count += 1
+            self.overflow_samples += n - free
+            self.dropped_samples['overflow'] += n - free
+            n = free
+            if n == 0:
+                return 0
+
+        start = write_pos % self.capacity
+        first = min(n, self.capacity - start)
+        self._store(samples[:first], self.buffer[start:start + first], scale)
+        if first < n:
+            self._store(samples[first:n], self.buffer[:n - first], scale)
+
+        # Publish only once the samples are in place
+        self.write_pos = write_pos + n
+        return n
+
+    def _store(self, samples, out, scale):
+        if scale == 1:
+            out[:] = samples
+        else:
+            # Clip first: resampled full-scale audio overshoots +-1 a little, and the unsafe cast
+            # would wrap those samples to the opposite sign (audible clicks)
+            if len(samples) > len(self.clip_buffer):
+                self.clip_buffer = np.empty(len(samples), dtype=np.float32)
+            clipped = self.clip_buffer[:len(samples)]
+            np.clip(samples, -1.0, 1.0, out=clipped)
+            # Truncates like astype(np.int16)
+            np.multiply(clipped, scale, out=out, casting='unsafe')
+
+    # -- Consumer side (transcriber) --
+
+    def __len__(self):
+        return self.write_pos - self.read_pos - self.held + self.spill_samples
+
+    def read(self, max_samples=None):
+        """
+        Non-blocking: the next contiguous run of buffered samples (at most max_samples) as a
+        view valid until the next read() / get(), or None if nothing is buffered.
+        """
+        # The previous block has been used by now, hand its space back to the producer
+        self.read_pos += self.held
+        self.held = 0
+
+        write_pos = self.write_pos
+        if self.overflow_policy == 'drop-silence-first':
+            self._classify_backlog(write_pos)
+        if write_pos - self.read_pos > self.max_backlog and self.overflow_policy != 'block':
+            self._shed_backlog(write_pos)
+
+        # Spilled audio is older than anything in the ring
+        if self.spill_samples:
+            return self._read_spill(max_samples or self.capacity)
+
+        available = write_pos - self.read_pos
+        if available == 0:
+            self.underflow_count += 1
+            return None
+
+        start = self.read_pos % self.capacity
+        n = min(available, self.capacity - start)
+        if max_samples is not None:
+            n = min(n, max_samples)
+        self.held = n
+        return self.buffer[start:start + n]
+
+    def _shed_backlog(self, write_pos):
+        # Only [read_pos, write_pos) is touched: the producer never writes there until read_pos moves
+        excess = write_pos - self.read_pos - self.max_backlog
+        if self.overflow_policy == 'drop-oldest':
+            self.read_pos += excess
+            self.dropped_samples['oldest'] += excess
+        elif self.overflow_policy == 'spill-to-disk':
+            self._spill(excess)
+        else:
+            self._drop_silence_first(write_pos, excess)
+        print(f"[AUDIO] Backlog over {self.max_backlog / self.sample_rate:.1f}s, "
+              f"{self.overflow_policy}: {excess / self.sample_rate:.2f}s")
+
+    def _classify_backlog(self, write_pos):
+        """Run the VAD on the backlog's new whole frames (each frame once) while it is getting long."""
+        frame_size = self.vad_frame_size
+
+        # Forget frames the consumer has started reading; they can't be dropped any more
+        while self.vad_decisions and self.vad_origin < self.read_pos:
+            self.vad_decisions.popleft()
+            self.vad_origin += frame_size
+
+        if write_pos - self.read_pos <= self.max_backlog // 2:
+            # Keeping up: no need to classify anything
+            self.vad_decisions.clear()
+            return
+        if not self.vad_decisions:
+            self.vad_origin = self.read_pos
+
+        start = self.vad_origin + len(self.vad_decisions) * frame_size
+        while start + frame_size <= write_pos:
+            index = start % self.capacity
+            if index + frame_size <= self.capacity:
+                frame_bytes = self.buffer[index:index + frame_size].tobytes()
+            else:
+                frame_bytes = self.buffer[np.arange(start, start + frame_size) % self.capacity].tobytes()
+            self.vad_decisions.append(bool(self.vad.is_speech(frame_bytes, self.sample_rate)))
+            start += frame_size
+
+    def _drop_silence_first(self, write_pos, excess):
+        indices = np.arange(self.read_pos, write_pos) % self.capacity
+        backlog = self.buffer[indices]
+        frame_size = self.vad_frame_size
+        head = self.vad_origin - self.read_pos      # Partial frame before the first classified one, kept
+        speech = np.array(self.vad_decisions, dtype=bool)
+
+        # Which whole frames to drop: non-speech oldest first, then the oldest speech
+        to_drop = -(-excess // frame_size)
+        silent = np.flatnonzero(~speech)[:to_drop]
+        voiced = np.flatnonzero(speech)[:to_drop - len(silent)]
+        dropped = np.zeros(len(speech), dtype=bool)
+        dropped[silent] = True
+        dropped[voiced] = True
+        keep = np.ones(len(backlog), dtype=bool)
+        for frame in np.flatnonzero(dropped):
+            keep[head + frame * frame_size:head + (frame + 1) * frame_size] = False
+
+        # Close the gaps: what is kept moves up against write_pos, and read_pos follows
+        kept = backlog[keep]
+        self.buffer[indices[len(indices) - len(kept):]] = kept
+        self.read_pos = write_pos - len(kept)
+        self.vad_decisions = deque(speech[~dropped].tolist())
+        self.vad_origin = self.read_pos + head
+        self.dropped_samples['silence'] += len(silent) * frame_size
+        self.dropped_samples['speech'] += len(voiced) * frame_size
+
+    def _spill(self, n):
+        if self.spill_file is None:
+            self.spill_file = tempfile.TemporaryFile()
+        indices = np.arange(self.read_pos, self.read_pos + n) % self.capacity
+        self.spill_file.seek(0, os.SEEK_END)
+        self.spill_file.write(self.buffer[indices].tobytes())
+        self.read_pos += n
+        self.spill_samples += n
+        self.spilled_samples += n
+
+    def _read_spill(self, max_samples):
+        n = min(self.spill_samples, max_samples)
+        self.spill_file.seek(self.spill_read_offset * 2)
+        block = np.frombuffer(self.spill_file.read(n * 2), dtype=np.int16)
+        self.spill_read_offset += n
+        self.spill_samples -= n
+        if self.spill_samples == 0:
+            # Everything spilled has been read back, start the file over
+            self.spill_file.seek(0)
+            self.spill_file.truncate()
+            self.spill_read_offset = 0
+        return block
+
+    def get(self, block=True, timeout=None):
+        """queue.Queue-style read: waits for samples, returns None once closed and drained."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        block_data = self.read()
+        while block_data is None:
+            if self.closed and self.write_pos == self.read_pos:
+                self._close_spill()
+                return None
+            if not block or (deadline is not None and time.monotonic() >= deadline):
+                raise queue.Empty
+            time.sleep(self.poll_interval)
+            block_data = self._read_after_wait()
+        return block_data
+
+    def _read_after_wait(self):
+        # Like read(), without counting every empty poll as another underflow
+        if self.write_pos == self.read_pos:
+            return None
+        return self.read()
+
+    def _close_spill(self):
+        if self.spill_file is not None:
+            self.spill_file.close()
+            self.spill_file = None
+
+    def put(self, pcm):
+        """queue.Queue-style write (None closes the stream), for feeding the ring from Python code."""
+        if pcm is None:
+            self.close()
+        else:
+            self.write(pcm)
+
+    def close(self):
+        self.closed = True
+
+    def empty(self):
+        return len(self) == 0
+
+    def qsize(self):
+        """Buffered audio in callback blocks, as queue.Queue would count them."""
+        return -(-len(self) // self.block_size)
+
+    def get_stats(self):
+        return {
+            'buffered_samples': len(self),
+            'overflow_count': self.overflow_count,
+            'overflow_samples': self.overflow_samples,
+            'underflow_count': self.underflow_count,
+            'overflow_policy': self.overflow_policy,
+            'dropped_seconds': {reason: samples / self.sample_rate for reason, samples in self.dropped_samples.items()},
+            'spilled_seconds': self.spilled_samples / self.sample_rate
+        }
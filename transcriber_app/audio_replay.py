@@ -0,0 +1,205 @@
+import json
+import time
+import wave
+import threading
+import numpy as np
+from pathlib import Path
+from .audio_buffers import AudioRingBuffer
+from .resampler import PolyphaseResampler
+
+# Recordings are the callback's float32 blocks exactly as sounddevice delivered them (raw, native
+# byte order, at the device's rate, before resampling) plus a JSON sidecar with that rate and block
+# size. Replaying one runs the blocks through the same resampler as the live callback, so it feeds
+# the ring the same int16 samples in the same blocks as the live session did.
+
+class AudioRecorder:
+    """Writes a live session's callback blocks to disk for deterministic replay (see VirtualAudioStream)."""
+
+    def __init__(self, path, sample_rate, block_size):
+        self.path = Path(path)
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.samples = 0
+        self.file = open(self.path, 'wb')       # Buffered: most writes are just a copy into its buffer
+
+    def write(self, samples):
+        """Append one block of float32 samples (called from the audio callback)."""
+        self.file.write(np.ascontiguousarray(samples, dtype=np.float32).data)
+        self.samples += len(samples)
+
+    def close(self):
+        self.file.close()
+        metadata = {'sample_rate': self.sample_rate, 'block_size': self.block_size,
+                    'dtype': 'float32', 'samples': self.samples}
+        _metadata_path(self.path).write_text(json.dumps(metadata))
+        print(f"[RECORDER] Saved {self.samples / self.sample_rate:.1f}s of audio to {self.path}")
+
+def _metadata_path(path):
+    return path.with_name(path.name + '.json')
+
+def load_recording(path):
+    """Load an AudioRecorder recording: returns (float32 samples, sample_rate, block_size)."""
+    path = Path(path)
+    metadata = json.loads(_metadata_path(path).read_text())
+    samples = np.fromfile(path, dtype=metadata['dtype'])
+    return samples, metadata['sample_rate'], metadata['block_size']
+
+def load_audio_file(path, sample_rate=16000):
+    """
+    Load a recording, .wav or .npy file (or, with pydub installed, anything ffmpeg reads) as
+    float32 mono in [-1, 1] at sample_rate. int16 .npy files are returned as they are, memory-mapped.
+    """
+    path = Path(path)
+    if _metadata_path(path).exists():
+        samples, file_rate, _ = load_recording(path)
+    elif path.suffix == '.npy':
+        # Memory-mapped, so int16 files (such as the test framework's PCM cache) are replayed without a copy
+        samples, file_rate = np.load(path, mmap_mode='r'), sample_rate
+        if samples.dtype == np.int16:
+            return samples
+    elif path.suffix == '.wav':
+        with wave.open(str(path), 'rb') as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError(f"Only 16-bit WAV files are supported: {path}")
+            file_rate = wav.getframerate()
+            samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+            samples = samples.reshape(-1, wav.getnchannels()).mean(axis=1) / 32768.0
+    else:
+        try:
+            from pydub import AudioSegment
+        except ImportError:
+            raise ImportError(f"pydub is needed to load {path.suffix} files (pip install pydub)")
+        audio = AudioSegment.from_file(str(path)).set_channels(1).set_frame_rate(sample_rate)
+        samples, file_rate = np.array(audio.get_array_of_samples()) / 32768.0, sample_rate
+
+    if file_rate != sample_rate:
+        raise ValueError(f"{path} is {file_rate} Hz, expected {sample_rate} Hz")
+    return np.asarray(samples, dtype=np.float32)
+
+
+class VirtualAudioStream:
+    """
+    Stand-in for AudioStream that plays a file or array into the pipeline instead of the
+    microphone, with the same interface (start/stop/pause/resume/audio_queue/get_stats).
+
+    speed=1.0 replays in real time, speed=N N times faster, and speed=None as fast as the
+    transcriber takes it. Blocks are released on an absolute schedule (block k at
+    start + k * block_duration / speed), so sleep overshoot doesn't accumulate into drift.
+    The ring uses the 'block' policy, so nothing is dropped and every replay of the same
+    input reaches the transcriber identically. The stream closes the queue at the end of the
+    audio; is_finished() tells when it got there.
+
+    audio can also be an iterable of int16 or float32 blocks (such as a streaming decoder's),
+    which is consumed as the replay goes, so a long file never has to be in memory at once.
+    Its duration is unknown (None) until the replay finishes.
+
+    A recording made at another rate than sample_rate (a device opened at its native rate)
+    is resampled block by block, as AudioStream's callback did live.
+    """
+
+    def __init__(self, sample_rate, audio, speed=1.0, block_size=480, buffer_seconds=10):
+        source_rate = sample_rate
+        if isinstance(audio, (str, Path)):
+            if _metadata_path(Path(audio)).exists():
+                audio, source_rate, block_size = load_recording(audio)
+            else:
+                audio = load_audio_file(audio, sample_rate)
+        self.audio = audio if isinstance(audio, np.ndarray) else iter(audio)
+        self.sample_rate = sample_rate
+        self.source_rate = source_rate
+        self.block_size = block_size
+        self.speed = speed
+        self.resampler = None
+        if source_rate != sample_rate:
+            self.resampler = PolyphaseResampler(source_rate, sample_rate, max_block_size=block_size)
+            block_size = self.resampler.output_size(block_size)
+        self.audio_queue = AudioRingBuffer(capacity=int(sample_rate * buffer_seconds), block_size=block_size,
+                                           overflow_policy='block', sample_rate=sample_rate)
+
+        self.stream = None          # Feeder thread, mirrors AudioStream.stream
+        self.active = False
+        self.stop_event = threading.Event()
+        self.position = 0           # Samples fed so far
+        self.finished = False
+        self.error = None           # Exception that ended the replay early (e.g. a failed decode)
+        self.schedule_start = None  # perf_counter() block 0 was due, moved on by pauses
+        self.paused_at = None       # perf_counter() when pause() was called
+
+    @property
+    def duration(self):
+        if isinstance(self.audio, np.ndarray):
+            return len(self.audio) / self.source_rate
+        return self.position / self.sample_rate if self.finished else None
+
+    def _blocks(self):
+        if isinstance(self.audio, np.ndarray):
+            blocks = (self.audio[start:start + self.block_size] for start in range(0, len(self.audio), self.block_size))
+        else:
+            blocks = self.audio
+        for block in blocks:
+            yield self.resampler.process(block) if self.resampler is not None else block
+
+    def _feed(self):
+        try:
+            for block in self._blocks():
+                while not self.active and not self.stop_event.is_set():
+                    time.sleep(0.01)
+                if self.stop_event.is_set():
+                    break
+
+                if self.speed:
+                    # Absolute schedule: sleep until this block is due
+                    due = self.schedule_start + self.position / self.sample_rate / self.speed
+                    delay = due - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                if block.dtype == np.int16:
+                    self.audio_queue.write(block)
+                else:
+                    self.audio_queue.write_float(block)
+                self.position += len(block)
+            else:
+                self.finished = True
+        except Exception as e:
+            # e.g. ffmpeg failing partway through a streamed file
+            self.error = e
+            print(f"[VIRTUAL AUDIO] Replay stopped after {self.position / self.sample_rate:.1f}s: {e}")
+        finally:
+            # End of the audio (or an error): the transcriber finishes what is buffered and returns
+            self.audio_queue.close()
+
+    def start(self):
+        if self.stream is None:
+            self.active = True
+            self.schedule_start = time.perf_counter()
+            self.stream = threading.Thread(target=self._feed, name="virtual-audio", daemon=True)
+            self.stream.start()
+
+    def stop(self):
+        if self.stream is not None:
+            self.stop_event.set()
+            self.audio_queue.close()        # Also releases a write() waiting for space
+            self.stream.join()
+            self.stream = None
+
+    def pause(self):
+        if self.stream is not None and self.active:
+            self.active = False
+            self.paused_at = time.perf_counter()
+
+    def resume(self):
+        if self.stream is not None and not self.active:
+            # Blocks that were due during the pause are due that much later
+            self.schedule_start += time.perf_counter() - self.paused_at
+            self.active = True
+
+    def is_finished(self):
+        return self.finished
+
+    def get_stats(self):
+        stats = self.audio_queue.get_stats()
+        stats['input_overflows'] = 0
+        stats['replayed_seconds'] = self.position / self.sample_rate
+        stats['error'] = str(self.error) if self.error is not None else None
+        return stats
@@ -1,15 +1,33 @@
-import numpy as np
-import queue
 import sounddevice as sd
+import webrtcvad
+from .audio_buffers import AudioRingBuffer
+from .audio_replay import AudioRecorder
+from .resampler import PolyphaseResampler
 
 class AudioStream:
     # Constructor to initialize the audio stream
     # - self is always the first argument in a method in a class
-    def __init__(self, sample_rate, device_id):
-        self.audio_queue = queue.Queue()
+    # - sample_rate is the pipeline's rate; the device is opened at device_rate (by default its native
+    #   rate, queried on start) and resampled to sample_rate in the callback when the two differ
+    def __init__(self, sample_rate, device_id, buffer_seconds=10, overflow_policy="drop-oldest", 
+                 max_backlog_seconds=None, record_path=None, device_rate=None):
+        # Lock-free ring the callback writes into; the transcriber reads it like a queue.
+        # buffer_seconds is the hard memory bound, overflow_policy what happens past max_backlog_seconds
+        vad = webrtcvad.Vad(3) if overflow_policy == "drop-silence-first" else None
+        max_backlog = int(sample_rate * max_backlog_seconds) if max_backlog_seconds else None
+        self.audio_queue = AudioRingBuffer(capacity=int(sample_rate * buffer_seconds), block_size=480,
+                                           overflow_policy=overflow_policy, max_backlog=max_backlog, 
+                                           vad=vad, sample_rate=sample_rate)
+        self.input_overflows = 0    # Blocks PortAudio itself dropped before the callback ran
         self.sample_rate = sample_rate
         self.device_id = device_id
         self.stream = None;  
+        self.device_rate = device_rate
+        self.resampler = None
+
+        # Optionally keep the session's blocks on disk, to replay it with VirtualAudioStream
+        self.record_path = record_path
+        self.recorder = None
 
     # Callback function -> called every time a chunk of audio is ready
     # - indata: Numpy array of shape (frames, channels) containing the audio data
@@ -17,31 +35,63 @@ class AudioStream:
     def callback(self, indata, frames, time_info, status):
         # print("Audio callback fired, frames:", frames) DEBUGGING STATEMENT
         if status: 
+            if status.input_overflow:
+                self.input_overflows += 1
             print("Mic error: ", status)
 
-        # Convert audio data (first channel) to 16-bit PCM format
-        pcm = (indata[:, 0] * 32767).astype(np.int16) 
-        
-        # Put the audio data into the queue
-        self.audio_queue.put(pcm) 
+        # Recorded at the device's rate, before resampling (replay runs the same resampler)
+        samples = indata[:, 0]
+        if self.recorder is not None:
+            self.recorder.write(samples)
+
+        # Resample to the pipeline's rate if the device runs at another one (into a preallocated buffer)
+        if self.resampler is not None:
+            samples = self.resampler.process(samples)
+
+        # Convert audio data (first channel) to 16-bit PCM straight into the ring buffer
+        # (no allocation, no lock; samples that don't fit are counted as overflow)
+        self.audio_queue.write_float(samples)
 
     def start(self):
         if self.stream is None: 
+            # Open the device at its native rate: many (e.g. BlackHole, USB interfaces) only run at 44.1/48 kHz
+            device_rate = self.device_rate
+            if device_rate is None:
+                device_rate = int(sd.query_devices(self.device_id, 'input')['default_samplerate'])
+            blocksize = round(480 * device_rate / self.sample_rate)     # 30ms blocks at either rate
+            if device_rate != self.sample_rate:
+                self.resampler = PolyphaseResampler(device_rate, self.sample_rate, max_block_size=blocksize)
+                print(f"[AUDIO] Device runs at {device_rate} Hz, resampling to {self.sample_rate} Hz")
+            else:
+                self.resampler = None
+
+            if self.record_path is not None and self.recorder is None:
+                self.recorder = AudioRecorder(self.record_path, device_rate, blocksize)
+
             self.stream = sd.InputStream(
                 callback=self.callback, 
                 dtype="float32", 
-                samplerate=self.sample_rate, 
+                samplerate=device_rate, 
                 channels=1, 
                 device=self.device_id, 
-                blocksize=480
+                blocksize=blocksize
             )
             self.stream.start()
 
+    def get_stats(self):
+        """Dropped audio: per-policy dropped/spilled seconds, ring underflows and PortAudio input overflows."""
+        stats = self.audio_queue.get_stats()
+        stats['input_overflows'] = self.input_overflows
+        return stats
+
     def stop(self):
         if self.stream is not None:
             self.stream.stop()
             self.stream.close()
             self.stream = None
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
 
     def pause(self):
         # .active is a flag in sd.InputStream
@@ -0,0 +1,96 @@
+import numpy as np
+import whisper
+from whisper.audio import N_FFT, HOP_LENGTH, N_FRAMES, N_SAMPLES
+
+class IncrementalLogMel:
+    """
+    Whisper log-mel features computed while a segment is still being recorded.
+
+    Whisper's own front end (log_mel_spectrogram(audio, padding=N_SAMPLES), as called by
+    transcribe()) runs the STFT over the whole segment after it has ended. Every STFT frame
+    only depends on 400 samples around it though, so all frames whose window lies inside the
+    audio received so far can be computed as speech arrives. At the end of the segment only
+    the last couple of frames (whose windows reach into the zero padding) and Whisper's
+    per-segment normalisation are left to do, and the result matches log_mel_spectrogram.
+
+    The extractor keeps no audio of its own: update() and finalize() are given the open
+    segment so far (e.g. SegmentBuffer.peek()), which only ever grows between resets.
+    """
+
+    def __init__(self, n_mels=80, batch_frames=10):
+        self.n_mels = n_mels
+        self.batch_frames = batch_frames    # Compute in batches (10 frames = 100 ms) to amortise the numpy calls
+
+        # Periodic Hann window, same as torch.hann_window(N_FFT)
+        self.window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(N_FFT) / N_FFT)).astype(np.float32)
+        self.filters = whisper.audio.mel_filters("cpu", n_mels).numpy()
+
+        # Raw log10 mel frames, room for one 30 s window plus its edge frames
+        self.max_frames = N_FRAMES + N_FFT // HOP_LENGTH + 1
+        self.log_mel = np.empty((n_mels, self.max_frames), dtype=np.float32)
+        self.frames_done = 0
+
+    def reset(self):
+        """Start a new segment."""
+        self.frames_done = 0
+
+    def update(self, audio):
+        """Compute the frames that the audio received so far fully covers."""
+        # Frame t is centred on sample t * HOP_LENGTH, so it needs samples up to t * HOP_LENGTH + N_FFT // 2
+        ready = min((len(audio) - N_FFT // 2) // HOP_LENGTH + 1, self.max_frames)
+        if ready - self.frames_done >= self.batch_frames:
+            self._compute(audio, self.frames_done, ready)
+            self.frames_done = ready
+
+    def finalize(self, audio):
+        """
+        Finish the features for a segment of len(audio) samples, padded to Whisper's 30 s window
+        the same way transcribe() does. Returns an (n_mels, N_FRAMES) float32 array, or None
+        if the segment is longer than one window (decode the audio instead).
+        Frames computed from samples after len(audio) (e.g. the audio after a forced split
+        point) are recomputed with zero padding, as if the segment had ended there.
+        """
+        length = len(audio)
+        if length > N_SAMPLES:
+            return None
+        # Frames whose window lies completely inside the segment are final
+        valid = max(0, min(self.frames_done, (length - N_FFT // 2) // HOP_LENGTH + 1))
+
+        # Frames whose window still touches the audio; anything after them is pure padding
+        touched = (length + N_FFT // 2 - 1) // HOP_LENGTH + 1
+        if touched > valid:
+            self._compute(audio, valid, touched)
+        self.frames_done = valid
+
+        # Whisper drops the last STFT frame, which leaves length // HOP_LENGTH frames of content
+        content_frames = length // HOP_LENGTH
+        log_spec = self.log_mel[:, :touched]
+        floor = max(log_spec.max() if touched > 0 else -10.0, -10.0) - 8.0
+
+        features = np.zeros((self.n_mels, N_FRAMES), dtype=np.float32)
+        np.maximum(self.log_mel[:, :content_frames], floor, out=features[:, :content_frames])
+        features[:, :content_frames] += 4.0
+        features[:, :content_frames] /= 4.0
+        return features
+
+    def _compute(self, audio, start, end):
+        # STFT frames [start, end) of the centred, reflect-padded signal, padded with zeros after the audio
+        half = N_FFT // 2
+        first = start * HOP_LENGTH - half
+        last = (end - 1) * HOP_LENGTH + half
+        chunk = np.zeros(last - first, dtype=np.float32)
+
+        lo = max(first, 0)
+        hi = min(last, len(audio))
+        if hi > lo:
+            chunk[lo - first:hi - first] = audio[lo:hi]
+        if first < 0:
+            # Reflect padding at the start: padded[i] = audio[half - i]
+            count = min(-first, len(audio) - 1)
+            chunk[-first - count:-first] = audio[count:0:-1]
+
+        frames = np.lib.stride_tricks.sliding_window_view(chunk, N_FFT)[::HOP_LENGTH]
+        spectrum = np.fft.rfft(frames * self.window, axis=-1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        mel = self.filters @ power.T.astype(np.float32)
+        np.log10(np.maximum(mel, 1e-10), out=self.log_mel[:, start:end])
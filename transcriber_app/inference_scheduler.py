@@ -0,0 +1,349 @@
+import threading
+import time
+from collections import deque
+import numpy as np
+from .asr_backends import ASRBackend
+
+# Job priorities: final segments always go before background decodes (partial results, second pass)
+FINAL = 0
+BACKGROUND = 1
+
+class InferenceJob:
+    """One decode request from a client (session): the segment, the backend and the decode options."""
+
+    def __init__(self, client_id, backend, audio_float, features=None, options=None, priority=FINAL,
+                 deadline=None, sample_rate=16000):
+        self.client_id = client_id
+        self.backend = backend
+        self.audio_float = audio_float
+        self.features = features
+        self.options = options or {}
+        self.priority = priority
+        self.deadline = deadline            # perf_counter() by which the job should have started (None = no deadline)
+        self.duration = len(audio_float) / sample_rate
+
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.finished = None
+        self.batch_size = 1                 # Jobs decoded in the same batch as this one
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    @property
+    def wait_seconds(self):
+        """Time spent queued before a worker picked the job up."""
+        return (self.started or time.perf_counter()) - self.submitted
+
+    @property
+    def decode_seconds(self):
+        """This job's share of its batch's decode time."""
+        if self.finished is None:
+            return None
+        return (self.finished - self.started) / self.batch_size
+
+    def wait(self, timeout=None):
+        """Block until the job is decoded; returns the result or raises the decode's exception."""
+        if not self.done.wait(timeout):
+            raise TimeoutError("Inference job did not finish in time")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class _Client:
+    """Scheduler-side state of one client: its queues, its fair-share clock and its statistics."""
+
+    def __init__(self, client_id, weight, stats_window):
+        self.client_id = client_id
+        self.weight = weight
+        self.queues = {FINAL: deque(), BACKGROUND: deque()}
+        self.virtual_time = 0.0             # Audio seconds served / weight
+        self.jobs = 0
+        self.audio_seconds = 0.0
+        self.decode_seconds = 0.0
+        self.waits = deque(maxlen=stats_window)
+
+    def pending(self):
+        return sum(len(jobs) for jobs in self.queues.values())
+
+
+class InferenceScheduler:
+    """
+    Shares the inference workers between every session on the node, instead of each session
+    running its own blocking decodes and all of them fighting over the CPU cores.
+
+    Sessions (clients) submit segments and wait for the result. Each worker takes the next job
+    by weighted fair queueing over audio time: the client that has been served the least audio
+    per unit of weight goes next, so a talkative room can't starve a quiet one, and a client
+    that was idle doesn't bank credit for it. A final segment that has waited max_wait_s is
+    overdue and goes first (earliest deadline first). Background jobs (partial results, second
+    pass) only run while no final segment is waiting anywhere.
+
+    Batching: when the backend supports it (WhisperBackend.transcribe_batch), the worker takes
+    up to max_batch_size queued jobs for the same backend and decode options, from any client,
+    and decodes them in one padded encoder/decoder pass. If the batched decode raises, its jobs
+    are decoded again one by one, so only the job that fails on its own gets the error.
+
+    get_stats() reports throughput (audio seconds decoded per wall second, batch sizes,
+    utilisation) and, per client, queue wait times, to size hosts.
+    """
+
+    def __init__(self, num_workers=1, max_batch_size=4, max_wait_s=2.0, sample_rate=16000, stats_window=200):
+        self.num_workers = max(1, num_workers)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max_wait_s
+        self.sample_rate = sample_rate
+        self.stats_window = stats_window
+
+        self.clients = {}
+        self.backend_locks = {}     # Locks of backends that aren't ASRBackends (which carry their own)
+        self.condition = threading.Condition()
+        self.workers = []
+        self.stopping = False
+
+        # Statistics
+        self.started_at = None
+        self.jobs = 0
+        self.batches = 0
+        self.audio_seconds = 0.0
+        self.busy_seconds = 0.0
+
+    def register(self, client_id, weight=1.0):
+        """Add a client (or change its weight); a client with weight 2 gets twice the inference time."""
+        with self.condition:
+            client = self.clients.get(client_id)
+            if client is None:
+                self.clients[client_id] = _Client(client_id, weight, self.stats_window)
+            else:
+                client.weight = weight
+
+    def unregister(self, client_id):
+        """Forget a client; jobs it still had queued fail with a RuntimeError."""
+        with self.condition:
+            client = self.clients.pop(client_id, None)
+        if client is not None:
+            for jobs in client.queues.values():
+                for job in jobs:
+                    self._finish(job, error=RuntimeError(f"Client '{client_id}' left the scheduler"))
+
+    def submit(self, client_id, backend, audio_float, features=None, priority=FINAL, **options):
+        """Queue a decode and return its InferenceJob (call job.wait() for the result)."""
+        now = time.perf_counter()
+        deadline = now + self.max_wait_s if priority == FINAL and self.max_wait_s is not None else None
+        job = InferenceJob(client_id, backend, audio_float, features, options, priority, deadline, self.sample_rate)
+
+        with self.condition:
+            self._start_workers()
+            client = self.clients.get(client_id)
+            if client is None:
+                client = self.clients[client_id] = _Client(client_id, 1.0, self.stats_window)
+
+            # A client coming back from idle starts level with the busy ones, not ahead of them
+            if client.pending() == 0:
+                active = [other.virtual_time for other in self.clients.values() if other.pending() > 0]
+                if active:
+                    client.virtual_time = max(client.virtual_time, min(active))
+
+            client.queues[priority].append(job)
+            self.condition.notify()
+        return job
+
+    def stop(self):
+        """Stop the workers once the queued jobs are done."""
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+        self.stopping = False
+
+    def _start_workers(self):
+        # Called with the condition held
+        if self.workers:
+            return
+        self.started_at = time.perf_counter()
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._worker, name=f"inference-scheduler-{i}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def _worker(self):
+        while True:
+            with self.condition:
+                batch = self._next_batch()
+                while batch is None:
+                    if self.stopping:
+                        return
+                    self.condition.wait()
+                    batch = self._next_batch()
+            self._run_batch(batch)
+
+    def _next_batch(self):
+        """Pick the next job (and jobs to batch with it); called with the condition held."""
+        for priority in (FINAL, BACKGROUND):
+            waiting = [client for client in self.clients.values() if client.queues[priority]]
+            if not waiting:
+                continue
+
+            # Overdue jobs first, then the client furthest behind its fair share
+            now = time.perf_counter()
+            overdue = [client for client in waiting if client.queues[priority][0].deadline is not None
+                       and client.queues[priority][0].deadline <= now]
+            if overdue:
+                client = min(overdue, key=lambda client: client.queues[priority][0].deadline)
+            else:
+                client = min(waiting, key=lambda client: client.virtual_time)
+
+            job = client.queues[priority].popleft()
+            batch = [job]
+            self._charge(client, job)
+            if self.max_batch_size > 1 and self._batchable(job):
+                self._fill_batch(batch, priority)
+            return batch
+        return None
+
+    def _fill_batch(self, batch, priority):
+        """Add queued jobs that can share the first job's decode, fairest clients first."""
+        first = batch[0]
+        for client in sorted(self.clients.values(), key=lambda client: client.virtual_time):
+            queue = client.queues[priority]
+            while queue and len(batch) < self.max_batch_size:
+                job = queue[0]
+                if job.backend is not first.backend or job.options != first.options or not self._batchable(job):
+                    break
+                batch.append(queue.popleft())
+                self._charge(client, job)
+            if len(batch) >= self.max_batch_size:
+                break
+
+    def _batchable(self, job):
+        # Batches decode one 30 s window per segment
+        return getattr(job.backend, 'supports_batching', False) and job.duration <= 30.0
+
+    def _charge(self, client, job):
+        client.virtual_time += job.duration / client.weight
+        job.started = time.perf_counter()
+        client.waits.append(job.wait_seconds)
+
+    def _run_batch(self, batch):
+        started = time.perf_counter()
+        if len(batch) == 1:
+            results, errors = self._decode_each(batch)
+        else:
+            try:
+                first = batch[0]
+                with self._lock(first.backend):
+                    results = first.backend.transcribe_batch([job.audio_float for job in batch],
+                                                             [job.features for job in batch],
+                                                             language="en", **first.options)
+                errors = [None] * len(batch)
+            except Exception as e:
+                # One bad segment mustn't fail the other sessions' segments: decode them one by one,
+                # so only the job that raises again fails
+                print(f"[SCHEDULER] Batch of {len(batch)} failed ({e}), decoding its jobs one by one")
+                results, errors = self._decode_each(batch)
+        elapsed = time.perf_counter() - started
+
+        with self.condition:
+            self.jobs += len(batch)
+            self.batches += 1
+            self.busy_seconds += elapsed
+            for job in batch:
+                self.audio_seconds += job.duration
+                client = self.clients.get(job.client_id)
+                if client is not None:
+                    client.jobs += 1
+                    client.audio_seconds += job.duration
+                    client.decode_seconds += elapsed / len(batch)
+
+        for job, result, error in zip(batch, results, errors):
+            job.batch_size = len(batch)
+            self._finish(job, result, error)
+
+    def _decode_each(self, batch):
+        """Decode the jobs one at a time; returns (results, errors), each error only failing its own job."""
+        results, errors = [], []
+        for job in batch:
+            try:
+                results.append(self._decode(job))
+                errors.append(None)
+            except Exception as e:
+                results.append(None)
+                errors.append(e)
+        return results, errors
+
+    def _decode(self, job):
+        backend = job.backend
+        if job.features is not None and backend.feature_mels == job.features.shape[0]:
+            decode = lambda: backend.transcribe_features(job.features, job.audio_float, language="en", **job.options)
+        else:
+            decode = lambda: backend.transcribe(job.audio_float, language="en", **job.options)
+        with self._lock(backend):
+            return decode()
+
+    def _lock(self, backend):
+        # Backends that aren't thread-safe are serialised across workers (and anything else using them)
+        if getattr(backend, 'thread_safe', False):
+            return _NO_LOCK
+        if isinstance(backend, ASRBackend):
+            return backend.decode_lock
+        with self.condition:
+            return self.backend_locks.setdefault(backend, threading.Lock())
+
+    def _finish(self, job, result=None, error=None):
+        job.finished = time.perf_counter()
+        if job.started is None:
+            job.started = job.finished
+        job.result = result
+        job.error = error
+        job.done.set()
+
+    def get_client_stats(self, client_id):
+        """Queue wait times and inference time of one client (None if it isn't registered)."""
+        with self.condition:
+            client = self.clients.get(client_id)
+            if client is None:
+                return None
+            return self._client_stats(client)
+
+    def _client_stats(self, client):
+        waits = np.array(client.waits) if client.waits else np.zeros(1)
+        return {
+            'weight': client.weight,
+            'pending': client.pending(),
+            'jobs': client.jobs,
+            'audio_seconds': client.audio_seconds,
+            'decode_seconds': client.decode_seconds,
+            'mean_wait_s': float(waits.mean()),
+            'p95_wait_s': float(np.percentile(waits, 95)),
+            'max_wait_s': float(waits.max())
+        }
+
+    def get_stats(self):
+        """Scheduler throughput and utilisation, plus every client's stats."""
+        with self.condition:
+            uptime = time.perf_counter() - self.started_at if self.started_at is not None else 0.0
+            return {
+                'workers': self.num_workers,
+                'jobs': self.jobs,
+                'batches': self.batches,
+                'mean_batch_size': self.jobs / self.batches if self.batches else 0.0,
+                'pending': sum(client.pending() for client in self.clients.values()),
+                'audio_seconds': self.audio_seconds,
+                'audio_seconds_per_second': self.audio_seconds / uptime if uptime > 0 else 0.0,
+                'jobs_per_second': self.jobs / uptime if uptime > 0 else 0.0,
+                'utilisation': self.busy_seconds / (uptime * self.num_workers) if uptime > 0 else 0.0,
+                'clients': {client_id: self._client_stats(client) for client_id, client in self.clients.items()}
+            }
+
+
+class _NoLock:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NO_LOCK = _NoLock()
@@ -1,10 +1,16 @@
 from .audio_stream import AudioStream
+from .audio_replay import VirtualAudioStream
 from .transcriber import Transcriber
 from .track_metrics import MetricsTracker
 from .track_insider_metrics import TrackInsiderMetrics
 from .adaptive_controller import AdaptiveController
+from .model_registry import ModelRegistry
+from .inference_scheduler import InferenceScheduler
+from .session_events import SessionEvents
+from .segmenters import create_segmenter, segmenter_from_config
 import threading
 import time
+import uuid
 
 SAMPLE_RATE = 16000
 CHUNK_SEC = 1.5
@@ -17,174 +23,729 @@ VAD_AGGRESSIVENESS = 3      # 0-3, 0=more speech, 3=more silence
 FRAME_DURATION_MS = 20      # 10, 20, or 30ms
 MAX_SILENCE_FRAMES = 10      # Number of consecutive silence frames to end a speech segment
 
+# Segmentation: "adaptive-vad", "vad", "fixed" or "fixed-overlap" (the fixed ones cut CHUNK_SEC windows)
+SEGMENTER = "adaptive-vad"
+
+# Audio capture buffer: hard memory bound per stream, and what to do when the backlog passes the limit
+# - "block", "drop-oldest", "drop-silence-first" (VAD decides) or "spill-to-disk"
+AUDIO_BUFFER_SECONDS = 10
+AUDIO_MAX_BACKLOG_SECONDS = 5
+AUDIO_OVERFLOW_POLICY = "drop-silence-first"
+
+# Finished segments allowed to wait for inference; past that the segmenter stops reading, so the
+# backlog builds up in the capture buffer above (where the overflow policy applies) and memory per
+# stream stays under AUDIO_BUFFER_SECONDS + MAX_PENDING_SEGMENTS * MAX_SEGMENT_SECONDS of audio
+MAX_PENDING_SEGMENTS = 4
+
+# Rate the input device is opened at: None for its native rate (resampled to SAMPLE_RATE), or a fixed rate
+AUDIO_DEVICE_RATE = None
+
+# Save each microphone session's audio blocks here, for replay with VirtualAudioStream (None disables)
+RECORD_SESSION_PATH = None
+
+# Inference stage configuration
+# - backends that aren't thread-safe (openai-whisper) decode one segment at a time whatever this is set to
+INFERENCE_WORKERS = 1
+
+# Shared inference scheduler: every session's decodes go through one set of workers, which share the
+# inference time fairly across sessions and batch segments that arrive together (None/False: each
+# session decodes on its own threads)
+INFERENCE_SCHEDULER = True
+SCHEDULER_WORKERS = 1               # Decodes run in parallel (only helps thread-safe backends)
+SCHEDULER_MAX_BATCH = 4             # Segments decoded in one batch, where the backend supports it
+SCHEDULER_MAX_WAIT_SECONDS = 2.0    # A final segment queued this long goes before fair-share order
+
+# Partial results: re-decode the open segment every N seconds of speech (None disables, e.g. 1.0 to opt in)
+# - each partial is a full decode of the open segment, competing with final segments for the model
+PARTIAL_RESULTS_INTERVAL = None
+
+# Continuous speech is force-split before it outgrows Whisper's 30s window (None disables)
+MAX_SEGMENT_SECONDS = 25.0
+SPLIT_OVERLAP_SECONDS = 0.5     # Audio repeated at the start of the next segment after a forced split
+
+# VAD engine: "webrtc" (webrtcvad, one call per frame) or "numpy" (vectorised, classifies whole blocks;
+# only cheaper than webrtcvad when audio arrives in large blocks, e.g. file replay)
+VAD_ENGINE = "webrtc"
+
+# Compute log-mel features while speech arrives, so only the model runs after end-of-speech
+INCREMENTAL_FEATURES = True
+
+# ASR engine: "whisper" (openai-whisper), "whisper-int8" (openai-whisper with int8 linear layers, CPU),
+# "faster-whisper" (CTranslate2, int8 on CPU) or "onnx" (ONNX Runtime)
+ASR_BACKEND = "whisper"
+MODEL_SIZE = "small"
+DEVICE = "cpu"
+
+# Two-pass transcription: live captions come from the fast LIVE_MODEL_SIZE model, and every segment
+# is re-decoded in the background with MODEL_SIZE, replacing its text in the stored transcript
+TWO_PASS = False
+LIVE_MODEL_SIZE = "base"
+
+# Load shedding: while inference can't keep up, step down to greedy decoding without temperature
+# fallback, then a smaller model, and back up once the backlog clears (needs adaptive control)
+LOAD_SHEDDING = True
+LOAD_SHEDDING_MODEL_SIZE = "base"   # Model used by the 'smaller_model' mode
+
+# Loaded models stay warm between sessions
+MODEL_IDLE_TIMEOUT = 30 * 60    # Seconds an unused model is kept loaded (None = forever)
+MODEL_MEMORY_LIMIT_MB = None    # Cap on memory used by loaded models (None = no cap)
+
+model_registry = ModelRegistry(
+    idle_timeout=MODEL_IDLE_TIMEOUT,
+    max_memory_bytes=MODEL_MEMORY_LIMIT_MB * 1024 * 1024 if MODEL_MEMORY_LIMIT_MB else None
+)
+
+inference_scheduler = InferenceScheduler(
+    num_workers=SCHEDULER_WORKERS,
+    max_batch_size=SCHEDULER_MAX_BATCH,
+    max_wait_s=SCHEDULER_MAX_WAIT_SECONDS,
+    sample_rate=SAMPLE_RATE
+) if INFERENCE_SCHEDULER else None
+
 BLACKHOLE_ID = 3 # Redirects output to microphone
 MIC_INPUT = None
 device_id = MIC_INPUT   # or MIC_INPUT
 
-audio_stream = None
-transcriber = None
-metrics = None
-track_insider_metrics = None  # Optional insider metrics for adaptive chunking
-adaptive_controller = None    # Adaptive controller for parameter tuning
-transcription_thread = None
-start_time = None
-metrics_collector = None  # For end-to-end latency measurement
-
-# Start the full pipeline: audio, transcription, metrics
-def start_transcription_pipeline(device_id=MIC_INPUT, enable_insider_metrics=True, enable_adaptive_control=True, metrics_collector=None):
-    global audio_stream, transcriber, metrics, track_insider_metrics, adaptive_controller, transcription_thread, start_time
-
-    # Clear previous data if there exists
-    if metrics is not None: 
-        if hasattr(metrics, 'accumulated'):
-            metrics.accumulated.clear()
-        if hasattr(metrics, 'all_audio_chunks'):
-            metrics.all_audio_chunks.clear()
-    if track_insider_metrics is not None:
-        track_insider_metrics.reset()
-    if adaptive_controller is not None:
-        adaptive_controller.reset()
-    
-    transcriber = None
-    metrics = None 
-    track_insider_metrics = None
-    adaptive_controller = None
-    transcription_thread = None
-    metrics_collector = metrics_collector
-    
-    # Create all objects
-    if audio_stream is None:
-        audio_stream = AudioStream(SAMPLE_RATE, device_id)
-    if transcriber is None:
-        transcriber = Transcriber("small", "cpu")
-    if metrics is None:
-        metrics = MetricsTracker(SAMPLE_RATE)
-    if enable_insider_metrics and track_insider_metrics is None:
-        track_insider_metrics = TrackInsiderMetrics()
-    if enable_adaptive_control and adaptive_controller is None:
-        adaptive_controller = AdaptiveController()
-
-    def run_transcription():
-        if audio_stream is not None:
-            audio_stream.start()
-            if transcriber is not None:
-                # Get current parameters from adaptive controller (or use defaults)
-                if adaptive_controller is not None:
-                    aggressiveness, frame_duration_ms, max_silence_frames = adaptive_controller.get_current_parameters()
-                else:
-                    aggressiveness, frame_duration_ms, max_silence_frames = VAD_AGGRESSIVENESS, FRAME_DURATION_MS, MAX_SILENCE_FRAMES
-                
-                transcriber.transcribe_stream(
-                    audio_stream.audio_queue, 
-                    on_transcription, 
-                    on_audio_chunk, 
-                    track_insider_metrics,
-                    aggressiveness=aggressiveness,
-                    frame_duration_ms=frame_duration_ms,
-                    max_silence_frames=max_silence_frames,
-                    metrics_collector=metrics_collector
-                )
-
-    # Safeguard to ensure exactly one background thread is active 
-    if transcription_thread is None or not transcription_thread.is_alive():
-        # Start a separate transcription thread 
-        # - the transcription can now run without blocking the main thread (or program)
-        transcription_thread = threading.Thread(target=run_transcription, daemon=True)
-        transcription_thread.start()
-
-# Stop the pipeline (implement as needed)
-def stop_transcription_pipeline():
-    global audio_stream, transcriber, metrics, track_insider_metrics, adaptive_controller, transcription_thread
-    # You may need to add stop/cleanup logic to your classes
-    if audio_stream is not None:
-        audio_stream.stop()
-        
-        # Signals the transcription loop to exit
-        audio_stream.audio_queue.put(None)
-
-    if transcription_thread is not None:
-        transcription_thread.join(timeout=2.0)  # Wait up to 2 seconds for thread to finish
-        transcription_thread = None
-
-    # Clean up stream handle
-    audio_stream = None
-    
-    # Clear global references to help with garbage collection
-    transcriber = None
-    track_insider_metrics = None
-    adaptive_controller = None
-    
-    # Note: We don't clear metrics here to preserve the transcript data
-    # The metrics object will be cleaned up when the pipeline is restarted
-    
-    print("[CLEANUP] Transcription pipeline stopped and resources cleaned up")
-
-def pause_transcription_pipeline():
-    global audio_stream
-    if audio_stream is not None: 
-        audio_stream.pause()
-
-def resume_transcription_pipeline():
-    global audio_stream, transcription_thread
-    if audio_stream is not None: 
-        audio_stream.resume()
-
-# Get the latest transcript
-def get_current_transcript():
-    global metrics
-    if metrics is not None and hasattr(metrics, 'accumulated') and metrics.accumulated:
-        # Return only the most recent transcription
-        # - [-1] for the last tuple in the list (latest transcription)
-        # - [0] for the first element of the tuple (the transcription text)
-        return metrics.accumulated[-1][0]
-    # Return an empty string if no transcription is available
-    return ""
-
-# Get the latest metrics
-def get_current_metrics():
-    global metrics
-    if metrics is None:
-        return {'wpm': 0, 'volume': 0, 'pitch': 0}
+# Sessions: each recording has its own stream, pipeline, metrics and controller (see SessionManager)
+DEFAULT_SESSION_ID = "default"  # Session used by the module-level functions and routes without a session id
+MAX_SESSIONS = None             # Cap on concurrent sessions (None = no cap)
+SESSION_IDLE_TIMEOUT = 60 * 60  # Seconds a stopped, unused session keeps its transcript (None = forever)
+
+# Model warm-up (run in the background at server start)
+WARM_UP_SEGMENT_SECONDS = (1.0, 5.0, 15.0)
+warmup_thread = None
+warmup_error = None
+
+def start_model_warmup():
+    """Load and warm the configured model in a background thread (no-op if already running)."""
+    global warmup_thread
+    if warmup_thread is None or not warmup_thread.is_alive():
+        warmup_thread = threading.Thread(target=_warm_up_model, daemon=True)
+        warmup_thread.start()
+    return warmup_thread
+
+def _session_model_sizes():
+    """Model sizes a session needs: the live model first, then the second-pass model (two-pass mode)"""
+    return [LIVE_MODEL_SIZE, MODEL_SIZE] if TWO_PASS else [MODEL_SIZE]
+
+def _warm_up_model():
+    global warmup_error
+    try:
+        warmup_error = None
+        for model_size in _session_model_sizes():
+            backend = model_registry.acquire(model_size, DEVICE, ASR_BACKEND)
+            try:
+                if not backend.is_warm:
+                    start = time.time()
+                    backend.warm_up(WARM_UP_SEGMENT_SECONDS, SAMPLE_RATE, features=INCREMENTAL_FEATURES)
+                    print(f"[WARM-UP] Model '{model_size}' warmed up in {time.time() - start:.1f}s")
+            finally:
+                model_registry.release(backend)
+    except Exception as e:
+        warmup_error = e
+        print(f"[WARM-UP] Error warming up model: {e}")
+
+def get_model_readiness():
+    """Whether the configured model(s) are loaded and warmed up"""
+    backends = [model_registry.peek(model_size, DEVICE, ASR_BACKEND) for model_size in _session_model_sizes()]
+    loaded = all(backend is not None for backend in backends)
+    warm = loaded and all(backend.is_warm for backend in backends)
     return {
-        'wpm': float(metrics.current_wpm),
-        'volume': float(metrics.current_volume),
-        'pitch': float(metrics.current_pitch)
+        'ready': warm,
+        'loaded': loaded,
+        'warm': warm,
+        'warming_up': warmup_thread is not None and warmup_thread.is_alive(),
+        'error': str(warmup_error) if warmup_error is not None else None
     }
 
-def get_final_transcript():
-    global metrics
-    if metrics is not None and hasattr(metrics, 'accumulated'):
-        return ' '.join(text for text, ts in metrics.accumulated).strip()
-    return ""
+def wait_until_ready(timeout=None):
+    """
+    Block until the model is warm (starting the warm-up if nothing is running, e.g. after
+    the registry evicted an idle model). Returns False if it isn't ready within timeout.
+    """
+    if get_model_readiness()['ready']:
+        return True
+    start_model_warmup().join(timeout)
+    return get_model_readiness()['ready']
+
+def _create_segmenter():
+    if SEGMENTER in ("fixed", "fixed-overlap"):
+        return create_segmenter(SEGMENTER, chunk_s=CHUNK_SEC, sample_rate=SAMPLE_RATE)
+    return create_segmenter(SEGMENTER)
+
+class Session:
+    """
+    One recording (e.g. one lecture room): its own audio stream, transcriber pipeline, metrics,
+    insider metrics and adaptive controller. Models aren't per session: every session acquires
+    them from model_registry, so concurrent sessions share one loaded model (decodes on a model
+    that isn't thread-safe are serialised by its backend's lock). With INFERENCE_SCHEDULER, the
+    decodes of every session go through inference_scheduler, which shares inference time between
+    them in proportion to their weight.
+    """
+
+    def __init__(self, session_id, weight=1.0):
+        self.session_id = session_id
+        self.weight = weight                # Share of the inference time relative to other sessions
+        self.created_at = time.time()
+        self.last_used = self.created_at    # Last lookup through the SessionManager
+
+        self.audio_stream = None
+        self.transcriber = None
+        self.metrics = None
+        self.track_insider_metrics = None   # Optional insider metrics for adaptive chunking
+        self.adaptive_controller = None     # Adaptive controller for parameter tuning
+        self.transcription_thread = None
+        self.metrics_collector = None       # For end-to-end latency measurement
+
+        # Text of the segment that is still being spoken (partial results)
+        self.live_committed_text = ""       # Stable across consecutive partial decodes
+        self.live_partial_text = ""         # May still change
+
+        # Accurate model of the second pass (two-pass mode only)
+        self.refine_backend = None
+
+        # Smaller model acquired by load shedding (None while decoding with the session's own model)
+        self.shedding_backend = None
+        self.decode_mode_lock = threading.Lock()
+
+        # Pushes transcript and metrics updates to subscribers (the /events stream) as they happen
+        self.events = SessionEvents()
+
+    # Start the full pipeline: audio, transcription, metrics
+    def start(self, device_id=MIC_INPUT, enable_insider_metrics=True, enable_adaptive_control=True, metrics_collector=None):
+        create_audio_stream = lambda: AudioStream(SAMPLE_RATE, device_id, buffer_seconds=AUDIO_BUFFER_SECONDS,
+                                                  overflow_policy=AUDIO_OVERFLOW_POLICY, 
+                                                  max_backlog_seconds=AUDIO_MAX_BACKLOG_SECONDS,
+                                                  record_path=RECORD_SESSION_PATH, device_rate=AUDIO_DEVICE_RATE)
+        self._start_pipeline(create_audio_stream, enable_insider_metrics, enable_adaptive_control, metrics_collector)
 
-def get_average_metrics():
-    global metrics
+    def start_with_virtual_audio(self, audio_file_path, metrics_collector=None, real_time_simulation=True, 
+                                 config=None, speed=None, enable_insider_metrics=True):
+        """
+        Run the pipeline on a file, AudioRecorder recording or iterable of audio blocks instead of the microphone.
+        Replays at speed x real time: 1.0 by default, None (as fast as transcription goes) when
+        real_time_simulation is False. config is a test_framework TEST_CONFIGS entry with its
+        'model_type': it picks the segmenter and VAD settings, and only 'adaptive' runs the
+        adaptive controller. The transcription thread ends once the whole file has been transcribed.
+        """
+        if speed is None and real_time_simulation:
+            speed = 1.0
+        config = config or {'model_type': 'adaptive'}
+        model_type = config.get('model_type', 'adaptive')
 
-    # If we haven't initialized MetricsTracker yet, just zero‐fill.
-    if metrics is None:
+        vad_parameters = None
+        if model_type in ('vad', 'adaptive'):
+            vad_parameters = (
+                config.get('aggressiveness', config.get('starting_aggressiveness', VAD_AGGRESSIVENESS)),
+                config.get('frame_duration_ms', FRAME_DURATION_MS),
+                config.get('max_silence_frames', MAX_SILENCE_FRAMES)
+            )
+
+        create_audio_stream = lambda: VirtualAudioStream(SAMPLE_RATE, audio_file_path, speed=speed, 
+                                                         buffer_seconds=AUDIO_BUFFER_SECONDS)
+        self._start_pipeline(create_audio_stream, enable_insider_metrics, model_type == 'adaptive', metrics_collector,
+                             segmenter=segmenter_from_config(config), vad_parameters=vad_parameters)
+
+    def _start_pipeline(self, create_audio_stream, enable_insider_metrics, enable_adaptive_control, metrics_collector, 
+                        segmenter=None, vad_parameters=None):
+        # Clear previous data if there exists
+        if self.metrics is not None: 
+            if hasattr(self.metrics, 'accumulated'):
+                self.metrics.accumulated.clear()
+            if hasattr(self.metrics, 'all_audio_chunks'):
+                self.metrics.all_audio_chunks.clear()
+        if self.track_insider_metrics is not None:
+            self.track_insider_metrics.reset()
+        if self.adaptive_controller is not None:
+            self.adaptive_controller.reset()
+        self._release_session_models()
+        
+        self.transcriber = None
+        self.metrics = None 
+        self.track_insider_metrics = None
+        self.adaptive_controller = None
+        self.transcription_thread = None
+        self.metrics_collector = metrics_collector
+        self.live_committed_text = ""
+        self.live_partial_text = ""
+        
+        # Create all objects
+        if self.audio_stream is None:
+            self.audio_stream = create_audio_stream()
+        if self.transcriber is None:
+            # The registry only loads the model the first time, later sessions (and concurrent ones) reuse it
+            live_model_size = LIVE_MODEL_SIZE if TWO_PASS else MODEL_SIZE
+            backend = model_registry.acquire(live_model_size, DEVICE, ASR_BACKEND)
+            if inference_scheduler is not None:
+                inference_scheduler.register(self.session_id, self.weight)
+            self.transcriber = Transcriber(live_model_size, DEVICE, num_workers=INFERENCE_WORKERS, backend=backend,
+                                           sample_rate=SAMPLE_RATE, scheduler=inference_scheduler,
+                                           client_id=self.session_id)
+            if TWO_PASS and self.refine_backend is None:
+                self.refine_backend = model_registry.acquire(MODEL_SIZE, DEVICE, ASR_BACKEND)
+        if self.metrics is None:
+            self.metrics = MetricsTracker(SAMPLE_RATE)
+        if enable_insider_metrics and self.track_insider_metrics is None:
+            self.track_insider_metrics = TrackInsiderMetrics()
+        if enable_adaptive_control and self.adaptive_controller is None:
+            self.adaptive_controller = AdaptiveController()
+            if vad_parameters is not None:
+                # The controller adapts from the configured starting point
+                with self.adaptive_controller.lock:
+                    (self.adaptive_controller.current_aggressiveness, self.adaptive_controller.current_frame_duration_ms,
+                     self.adaptive_controller.current_max_silence_frames) = vad_parameters
+        if segmenter is None:
+            segmenter = _create_segmenter()
+
+        # Second-pass results go to this run's transcript only, even if they finish after it ended
+        session_metrics = self.metrics
+        def on_refined(segment_index, text):
+            if session_metrics.replace_transcription(segment_index, text):
+                print(f"[TWO-PASS] Segment {segment_index} refined: {text}")
+
+        audio_stream, transcriber, adaptive_controller = self.audio_stream, self.transcriber, self.adaptive_controller
+        def run_transcription():
+            if audio_stream is not None:
+                audio_stream.start()
+                if transcriber is not None:
+                    # Get current parameters from adaptive controller (or the session's, or the defaults)
+                    if adaptive_controller is not None:
+                        aggressiveness, frame_duration_ms, max_silence_frames = adaptive_controller.get_current_parameters()
+                    elif vad_parameters is not None:
+                        aggressiveness, frame_duration_ms, max_silence_frames = vad_parameters
+                    else:
+                        aggressiveness, frame_duration_ms, max_silence_frames = VAD_AGGRESSIVENESS, FRAME_DURATION_MS, MAX_SILENCE_FRAMES
+                    
+                    transcriber.transcribe_stream(
+                        audio_stream.audio_queue, 
+                        self.on_transcription, 
+                        self.on_audio_chunk, 
+                        self.track_insider_metrics,
+                        aggressiveness=aggressiveness,
+                        frame_duration_ms=frame_duration_ms,
+                        max_silence_frames=max_silence_frames,
+                        metrics_collector=self.metrics_collector,
+                        on_partial=self.on_partial_transcription,
+                        partial_interval_s=PARTIAL_RESULTS_INTERVAL,
+                        max_segment_s=MAX_SEGMENT_SECONDS,
+                        split_overlap_s=SPLIT_OVERLAP_SECONDS,
+                        incremental_features=INCREMENTAL_FEATURES,
+                        vad_engine=VAD_ENGINE,
+                        segmenter=segmenter,
+                        max_pending_segments=MAX_PENDING_SEGMENTS,
+                        refine_backend=self.refine_backend,
+                        on_refined=on_refined
+                    )
+
+        # Safeguard to ensure exactly one background thread is active per session
+        if self.transcription_thread is None or not self.transcription_thread.is_alive():
+            # Start a separate transcription thread 
+            # - the transcription can now run without blocking the main thread (or program)
+            self.transcription_thread = threading.Thread(target=run_transcription, daemon=True,
+                                                         name=f"transcription-{self.session_id}")
+            self.transcription_thread.start()
+            self.events.publish('status', self.get_status())
+
+    def stop(self):
+        if self.audio_stream is not None:
+            self.audio_stream.stop()
+            
+            # Signals the transcription loop to exit
+            self.audio_stream.audio_queue.put(None)
+
+        if self.transcription_thread is not None:
+            self.transcription_thread.join(timeout=2.0)  # Wait up to 2 seconds for thread to finish
+            self.transcription_thread = None
+
+        # Clean up stream handle
+        self.audio_stream = None
+        
+        # Clear references to help with garbage collection
+        # - the model itself stays loaded in the registry for the next session
+        self._release_session_models()
+        self.transcriber = None
+        self.track_insider_metrics = None
+        self.adaptive_controller = None
+        
+        # Note: We don't clear metrics here to preserve the transcript data
+        # The metrics object will be cleaned up when the pipeline is restarted
+        
+        self.events.publish('status', self.get_status())
+        print(f"[CLEANUP] Session '{self.session_id}' stopped and resources cleaned up")
+
+    def pause(self):
+        if self.audio_stream is not None: 
+            self.audio_stream.pause()
+
+    def resume(self):
+        if self.audio_stream is not None: 
+            self.audio_stream.resume()
+
+    def is_running(self):
+        return self.transcription_thread is not None and self.transcription_thread.is_alive()
+
+    def _update_load_shedding(self):
+        """Report the inference backlog to the adaptive controller and apply decode mode changes."""
+        if not LOAD_SHEDDING or self.adaptive_controller is None or self.transcriber is None:
+            return
+        load = self.transcriber.get_load()
+        mode = self.adaptive_controller.update_load(load['pending_segments'], load['rtf'])
+        if mode is not None:
+            # Loading the smaller model can take a while, don't hold up transcript delivery for it
+            threading.Thread(target=self._apply_decode_mode, args=(self.transcriber, mode), daemon=True).start()
+
+    def _apply_decode_mode(self, target, mode):
+        with self.decode_mode_lock:
+            backend = None
+            if mode == 'smaller_model':
+                try:
+                    backend = model_registry.acquire(LOAD_SHEDDING_MODEL_SIZE, DEVICE, ASR_BACKEND)
+                except Exception as e:
+                    print(f"[LOAD SHEDDING] Could not load '{LOAD_SHEDDING_MODEL_SIZE}' model: {e}")
+                    return
+
+            # The session may have ended, or a newer switch happened, while the model was loading
+            adaptive_controller = self.adaptive_controller
+            if target is not self.transcriber or adaptive_controller is None or adaptive_controller.get_decode_mode() != mode:
+                if backend is not None:
+                    model_registry.release(backend)
+                return
+
+            target.set_decode_mode(mode, backend)
+            if self.shedding_backend is not None:
+                model_registry.release(self.shedding_backend)
+            self.shedding_backend = backend
+
+    def _release_session_models(self):
+        if self.transcriber is not None:
+            model_registry.release(self.transcriber.backend)
+        if self.refine_backend is not None:
+            model_registry.release(self.refine_backend)
+            self.refine_backend = None
+        self._release_shedding_backend()
+
+    def _release_shedding_backend(self):
+        with self.decode_mode_lock:
+            if self.shedding_backend is not None:
+                model_registry.release(self.shedding_backend)
+                self.shedding_backend = None
+
+    # Get the latest transcript
+    def get_current_transcript(self):
+        metrics = self.metrics
+        if metrics is not None and hasattr(metrics, 'accumulated') and metrics.accumulated:
+            # Return only the most recent transcription
+            # - [-1] for the last tuple in the list (latest transcription)
+            # - [0] for the first element of the tuple (the transcription text)
+            return metrics.accumulated[-1][0]
+        # Return an empty string if no transcription is available
+        return ""
+
+    # Get the latest transcript plus the text of the segment still being spoken
+    def get_live_transcript(self):
         return {
-            'average_wpm':     0.0,
-            'average_volume':  0.0,
-            'average_pitch':   0.0
+            'transcript': self.get_current_transcript(),
+            'committed': self.live_committed_text,
+            'partial': self.live_partial_text
         }
 
-    # Recompute the averages
-    metrics.track_wpm_average()
-    metrics.track_volume_average()
-    metrics.track_overall_pitch()
+    # Get the latest metrics
+    def get_current_metrics(self):
+        metrics = self.metrics
+        if metrics is None:
+            return {'wpm': 0, 'volume': 0, 'pitch': 0}
+        return {
+            'wpm': float(metrics.current_wpm),
+            'volume': float(metrics.current_volume),
+            'pitch': float(metrics.current_pitch)
+        }
 
-    return {
-        'average_wpm':     float(metrics.average_wpm),
-        'average_volume':  float(metrics.average_volume),
-        'average_pitch':   float(metrics.average_pitch)
-    }
+    def get_final_transcript(self):
+        metrics = self.metrics
+        if metrics is not None and hasattr(metrics, 'accumulated'):
+            return ' '.join(text for text, ts in metrics.accumulated).strip()
+        return ""
+
+    def get_average_metrics(self):
+        metrics = self.metrics
+
+        # If we haven't initialized MetricsTracker yet, just zero‐fill.
+        if metrics is None:
+            return {
+                'average_wpm':     0.0,
+                'average_volume':  0.0,
+                'average_pitch':   0.0
+            }
 
-def get_adaptive_controller_status():
-    """Get the current status of the adaptive controller"""
-    global adaptive_controller
-    if adaptive_controller is None:
+        # Recompute the averages
+        metrics.track_wpm_average()
+        metrics.track_volume_average()
+        metrics.track_overall_pitch()
+
+        return {
+            'average_wpm':     float(metrics.average_wpm),
+            'average_volume':  float(metrics.average_volume),
+            'average_pitch':   float(metrics.average_pitch)
+        }
+
+    def get_adaptive_controller_status(self):
+        """Get the current status of the adaptive controller"""
+        if self.adaptive_controller is None:
+            return None
+        return self.adaptive_controller.get_status()
+
+    def get_pipeline_queue_depths(self):
+        """Get the backlog at each stage of the transcription pipeline"""
+        if self.transcriber is None:
+            return None
+        return self.transcriber.get_queue_depths()
+
+    def get_audio_stream_stats(self):
+        """Get the audio dropped between the microphone and the transcriber"""
+        if self.audio_stream is None:
+            return None
+        return self.audio_stream.get_stats()
+
+    def get_inference_stats(self):
+        """Get this session's queue wait times and inference time in the shared scheduler"""
+        if inference_scheduler is None:
+            return None
+        return inference_scheduler.get_client_stats(self.session_id)
+
+    def get_status(self):
+        return {
+            'session_id': self.session_id,
+            'running': self.is_running(),
+            'created_at': self.created_at,
+            'weight': self.weight
+        }
+
+    def on_partial_transcription(self, committed_text, partial_text):
+        self.live_committed_text = committed_text
+        self.live_partial_text = partial_text
+        self.events.publish('transcript', self.get_live_transcript())
+
+    def on_transcription(self, text, segment_duration):
+        metrics = self.metrics
+        adaptive_controller = self.adaptive_controller
+        track_insider_metrics = self.track_insider_metrics
+
+        # The final text replaces the partial results of this segment
+        self.live_committed_text = ""
+        self.live_partial_text = ""
+
+        if metrics is not None:
+            metrics.add_transcription(text, segment_duration)
+            metrics.track_wpm()
+            print(f"\n[{self.session_id}] Transcription: {text}\n") 
+
+            # Push the new text, then the metrics: on_audio_chunk has just updated volume and pitch
+            # for this segment, so one metrics update per segment carries both
+            self.events.publish('transcript', self.get_live_transcript())
+            self.events.publish('metrics', self.get_current_metrics())
+
+            # Record when text appears on screen for end-to-end latency
+            if self.metrics_collector is not None:
+                self.metrics_collector.record_chunk_display()
+
+            # Print UI metrics summary after WPM is updated
+            metrics.print_ui_metrics_summary()
+            
+            # Print summary (aligned with UI metrics timing)
+            if track_insider_metrics is not None:
+                track_insider_metrics.print_summary()
+            
+            # Check if adaptive controller should adjust parameters
+            if adaptive_controller is not None and track_insider_metrics is not None:
+                # Get current metrics
+                current_metrics = {
+                    'wpm': metrics.current_wpm,
+                    'volume': metrics.current_volume,
+                    'pitch': metrics.current_pitch,
+                    'chunk_duration': metrics.current_chunk_duration
+                }
+                
+                insider_metrics = {
+                    'silence_ratio': track_insider_metrics.get_silence_ratio(),
+                    'confidence': track_insider_metrics.get_confidence()
+                }
+                
+                # Check if parameters should be adjusted
+                if adaptive_controller.should_adjust_parameters(current_metrics, insider_metrics):
+                    print(f"[ADAPTIVE] Metrics suggest parameter adjustment needed")
+                    print(f"[ADAPTIVE] Current metrics: WPM={current_metrics['wpm']:.1f}, "
+                          f"Confidence={insider_metrics['confidence']:.3f}, "
+                          f"Silence Ratio={insider_metrics['silence_ratio']:.3f}")
+                    
+                    # Calculate new parameters
+                    new_parameters = adaptive_controller.calculate_parameter_adjustments(current_metrics, insider_metrics)
+                    
+                    # Update parameters in adaptive controller
+                    if adaptive_controller.update_parameters(new_parameters):
+                        print(f"[ADAPTIVE] Parameters updated successfully")
+                        
+                        # Send parameter updates to transcriber
+                        if self.transcriber is not None:
+                            self.transcriber.update_parameters(
+                                new_parameters['aggressiveness'],
+                                new_parameters['frame_duration_ms'],
+                                new_parameters['max_silence_frames']
+                            )
+
+        # Shed (or restore) decode quality depending on whether inference keeps up
+        self._update_load_shedding()
+
+    def on_audio_chunk(self, audio_float, segment_duration):
+        metrics = self.metrics
+        if metrics is not None:
+            # print("Audio chunk received, length:", len(audio_float)) DEBUGGING STATEMENT
+            metrics.add_audio_chunk(audio_float, segment_duration)
+            metrics.track_volume()
+            metrics.track_pitch()
+            # Note: UI metrics summary is printed in on_transcription to avoid duplicate output
+
+
+class SessionManager:
+    """
+    Creates, looks up and removes Sessions by id, so one server process can run many
+    recordings at once (one per lecture room) on the same loaded models.
+    """
+
+    def __init__(self, max_sessions=None, idle_timeout=None):
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.max_sessions = max_sessions    # Cap on concurrent sessions (None = no cap)
+        self.idle_timeout = idle_timeout    # Seconds a stopped session is kept for its transcript (None = forever)
+
+    def create_session(self, session_id=None, weight=1.0):
+        """Create a new session (with a random id unless one is given)."""
+        with self.lock:
+            self._remove_idle_sessions()
+            session_id = session_id or uuid.uuid4().hex
+            if session_id in self.sessions:
+                raise ValueError(f"Session '{session_id}' already exists")
+            if self.max_sessions is not None and len(self.sessions) >= self.max_sessions:
+                raise RuntimeError(f"Too many sessions (limit {self.max_sessions})")
+            session = Session(session_id, weight)
+            self.sessions[session_id] = session
+            return session
+
+    def get_session(self, session_id):
+        """The session with this id, or None."""
+        with self.lock:
+            session = self.sessions.get(session_id)
+        if session is not None:
+            session.last_used = time.time()
+        return session
+
+    def get_or_create_session(self, session_id):
+        with self.lock:
+            if session_id in self.sessions:
+                return self.sessions[session_id]
+        try:
+            return self.create_session(session_id)
+        except ValueError:
+            # Created by another request in the meantime
+            return self.get_session(session_id)
+
+    def remove_session(self, session_id):
+        """Stop the session (if it is running) and forget it; returns False if there was none."""
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.stop()
+        if inference_scheduler is not None:
+            inference_scheduler.unregister(session_id)
+        return True
+
+    def list_sessions(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+        return [session.get_status() for session in sessions]
+
+    def stop_all(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+        for session in sessions:
+            session.stop()
+
+    def _remove_idle_sessions(self):
+        # Stopped sessions nobody has looked at for idle_timeout only hold a finished transcript
+        if self.idle_timeout is None:
+            return
+        cutoff = time.time() - self.idle_timeout
+        for session_id, session in list(self.sessions.items()):
+            if not session.is_running() and session.last_used < cutoff:
+                del self.sessions[session_id]
+                if inference_scheduler is not None:
+                    inference_scheduler.unregister(session_id)
+
+
+session_manager = SessionManager(max_sessions=MAX_SESSIONS, idle_timeout=SESSION_IDLE_TIMEOUT)
+
+# Module-level API (single-recording scripts, the test framework and the routes without a session id)
+# - each call acts on one session, DEFAULT_SESSION_ID unless another is given
+
+def _session(session_id):
+    # An unknown session reads as a fresh one: empty transcript, zero metrics
+    return session_manager.get_session(session_id) or Session(session_id)
+
+def start_transcription_pipeline(device_id=MIC_INPUT, enable_insider_metrics=True, enable_adaptive_control=True, 
+                                 metrics_collector=None, session_id=DEFAULT_SESSION_ID):
+    session_manager.get_or_create_session(session_id).start(device_id, enable_insider_metrics, enable_adaptive_control, 
+                                                           metrics_collector)
+
+def start_transcription_pipeline_with_virtual_audio(audio_file_path, metrics_collector=None, real_time_simulation=True, 
+                                                    config=None, speed=None, enable_insider_metrics=True,
+                                                    session_id=DEFAULT_SESSION_ID):
+    session_manager.get_or_create_session(session_id).start_with_virtual_audio(
+        audio_file_path, metrics_collector, real_time_simulation, config, speed, enable_insider_metrics)
+
+def stop_transcription_pipeline(session_id=DEFAULT_SESSION_ID):
+    _session(session_id).stop()
+
+def pause_transcription_pipeline(session_id=DEFAULT_SESSION_ID):
+    _session(session_id).pause()
+
+def resume_transcription_pipeline(session_id=DEFAULT_SESSION_ID):
+    _session(session_id).resume()
+
+def is_transcription_running(session_id=DEFAULT_SESSION_ID):
+    return _session(session_id).is_running()
+
+def get_current_transcript(session_id=DEFAULT_SESSION_ID):
+    return _session(session_id).get_current_transcript()
+
+def get_live_transcript(session_id=DEFAULT_SESSION_ID):
+    return _session(session_id).get_live_transcript()
+
+def get_current_metrics(session_id=DEFAULT_SESSION_ID):
+    return _session(session_id).get_current_metrics()
+
+def get_final_transcript(session_id=DEFAULT_SESSION_ID):
+    return _session(session_id).get_final_transcript()
+
+def get_average_metrics(session_id=DEFAULT_SESSION_ID):
+    return _session(session_id).get_average_metrics()
+
+def get_adaptive_controller_status(session_id=DEFAULT_SESSION_ID):
+    return _session(session_id).get_adaptive_controller_status()
+
+def get_pipeline_queue_depths(session_id=DEFAULT_SESSION_ID):
+    return _session(session_id).get_pipeline_queue_depths()
+
+def get_audio_stream_stats(session_id=DEFAULT_SESSION_ID):
+    return _session(session_id).get_audio_stream_stats()
+
+def get_inference_stats(session_id=DEFAULT_SESSION_ID):
+    return _session(session_id).get_inference_stats()
+
+def get_scheduler_stats():
+    """Throughput and utilisation of the shared inference scheduler (None when it is disabled)"""
+    if inference_scheduler is None:
         return None
-    return adaptive_controller.get_status()
+    return inference_scheduler.get_stats()
 
 def main():
     # For manual testing: start the pipeline, print status, etc.
@@ -198,69 +759,5 @@ def main():
         stop_transcription_pipeline()
         print("Stopped.")
 
-def on_transcription(text, segment_duration):
-    global metrics, adaptive_controller, track_insider_metrics, metrics_collector
-    if metrics is not None:
-        metrics.add_transcription(text, segment_duration)
-        metrics.track_wpm()
-        print(f"\nTranscription: {text}\n") 
-
-        # Record when text appears on screen for end-to-end latency
-        if metrics_collector is not None:
-            metrics_collector.record_chunk_display()
-
-        # Print UI metrics summary after WPM is updated
-        metrics.print_ui_metrics_summary()
-        
-        # Print summary (aligned with UI metrics timing)
-        if track_insider_metrics is not None:
-            track_insider_metrics.print_summary()
-        
-        # Check if adaptive controller should adjust parameters
-        if adaptive_controller is not None and track_insider_metrics is not None:
-            # Get current metrics
-            current_metrics = {
-                'wpm': metrics.current_wpm,
-                'volume': metrics.current_volume,
-                'pitch': metrics.current_pitch,
-                'chunk_duration': metrics.current_chunk_duration
-            }
-            
-            insider_metrics = {
-                'silence_ratio': track_insider_metrics.get_silence_ratio(),
-                'confidence': track_insider_metrics.get_confidence()
-            }
-            
-            # Check if parameters should be adjusted
-            if adaptive_controller.should_adjust_parameters(current_metrics, insider_metrics):
-                print(f"[ADAPTIVE] Metrics suggest parameter adjustment needed")
-                print(f"[ADAPTIVE] Current metrics: WPM={current_metrics['wpm']:.1f}, "
-                      f"Confidence={insider_metrics['confidence']:.3f}, "
-                      f"Silence Ratio={insider_metrics['silence_ratio']:.3f}")
-                
-                # Calculate new parameters
-                new_parameters = adaptive_controller.calculate_parameter_adjustments(current_metrics, insider_metrics)
-                
-                # Update parameters in adaptive controller
-                if adaptive_controller.update_parameters(new_parameters):
-                    print(f"[ADAPTIVE] Parameters updated successfully")
-                    
-                    # Send parameter updates to transcriber
-                    if transcriber is not None:
-                        transcriber.update_parameters(
-                            new_parameters['aggressiveness'],
-                            new_parameters['frame_duration_ms'],
-                            new_parameters['max_silence_frames']
-                        )
-
-def on_audio_chunk(audio_float, segment_duration):
-    global metrics
-    if metrics is not None:
-        # print("Audio chunk received, length:", len(audio_float)) DEBUGGING STATEMENT
-        metrics.add_audio_chunk(audio_float, segment_duration)
-        metrics.track_volume()
-        metrics.track_pitch()
-        # Note: UI metrics summary is printed in on_transcription to avoid duplicate output
-
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,197 @@
+import threading
+import time
+from .asr_backends import create_backend
+
+class ModelEntry:
+    """One loaded backend plus its bookkeeping."""
+    def __init__(self, key):
+        self.key = key                      # (model_size, device, backend)
+        self.backend = None
+        self.ready = threading.Event()      # Set once loading has finished (or failed)
+        self.error = None
+        self.users = 0                      # Pipelines currently holding the model
+        self.last_used = time.time()
+        self.size_bytes = 0
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded ASR backends, keyed by (model size, device, backend).
+    Each model is loaded once and handed to every pipeline that asks for it, so pressing
+    Start again doesn't reload the checkpoint from disk.
+
+    - idle_timeout: seconds an unused model is kept warm before being evicted (None = forever)
+    - max_memory_bytes: cap on the total size of loaded models; least recently used idle
+      models are evicted to make room (None = no cap)
+
+    Sizes come from each backend's memory_bytes(): PyTorch weights for whisper, the model
+    files on disk for faster-whisper and ONNX (an estimate: runtime buffers aren't counted,
+    and int8 faster-whisper loads about half its float16 file). A backend that can't tell
+    counts as 0 towards the cap, with a warning when it is loaded.
+    """
+
+    def __init__(self, idle_timeout=None, max_memory_bytes=None, loader=create_backend):
+        self.idle_timeout = idle_timeout
+        self.max_memory_bytes = max_memory_bytes
+        self.loader = loader
+
+        self.entries = {}                   # key -> ModelEntry
+        self.lock = threading.Lock()
+
+        # Statistics
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+        # Background eviction of idle models
+        self._stop_reaper = threading.Event()
+        self._reaper_thread = None
+        if self.idle_timeout is not None:
+            self._reaper_thread = threading.Thread(target=self._reap_idle_models, daemon=True)
+            self._reaper_thread.start()
+
+    def acquire(self, model_size, device, backend="whisper", **backend_options):
+        """Get a loaded backend, loading it on first use. Call release() when done with it."""
+        key = (model_size, device, backend)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            is_loader = entry is None
+            if is_loader:
+                entry = ModelEntry(key)
+                self.entries[key] = entry
+            else:
+                self.hits += 1
+            entry.users += 1
+            entry.last_used = time.time()
+
+        if is_loader:
+            # Load outside the lock so other models stay available meanwhile
+            try:
+                print(f"[MODEL REGISTRY] Loading {backend} model '{model_size}' on {device}")
+                entry.backend = self.loader(backend, model_size, device, **backend_options)
+                entry.size_bytes = self._estimate_size(entry.backend)
+                with self.lock:
+                    self.loads += 1
+                    self._enforce_memory_cap(keep=key)
+            except Exception as e:
+                entry.error = e
+                with self.lock:
+                    self.entries.pop(key, None)
+            finally:
+                entry.ready.set()
+        else:
+            # Another pipeline may still be loading it
+            entry.ready.wait()
+
+        if entry.error is not None:
+            raise entry.error
+        return entry.backend
+
+    def peek(self, model_size, device, backend="whisper"):
+        """The loaded backend for this key, or None. Doesn't load or count as a use."""
+        with self.lock:
+            entry = self.entries.get((model_size, device, backend))
+            if entry is None or not entry.ready.is_set():
+                return None
+            return entry.backend
+
+    def release(self, backend):
+        """Hand a backend back; it stays loaded (warm) until evicted."""
+        with self.lock:
+            for entry in self.entries.values():
+                if entry.backend is backend:
+                    entry.users = max(0, entry.users - 1)
+                    entry.last_used = time.time()
+                    return
+
+    def evict_idle(self, now=None):
+        """Evict every unused model that has been idle for longer than idle_timeout."""
+        if self.idle_timeout is None:
+            return 0
+        now = time.time() if now is None else now
+        with self.lock:
+            idle_keys = [key for key, entry in self.entries.items()
+                         if entry.users == 0 and entry.ready.is_set()
+                         and now - entry.last_used > self.idle_timeout]
+            for key in idle_keys:
+                self._evict(key)
+        return len(idle_keys)
+
+    def _enforce_memory_cap(self, keep=None):
+        # Caller holds self.lock
+        if self.max_memory_bytes is None:
+            return
+
+        # Least recently used idle models go first; models in use are never evicted
+        candidates = sorted(
+            (entry for key, entry in self.entries.items()
+             if key != keep and entry.users == 0 and entry.ready.is_set()),
+            key=lambda entry: entry.last_used
+        )
+        for entry in candidates:
+            if self._total_bytes() <= self.max_memory_bytes:
+                break
+            self._evict(entry.key)
+
+        if self._total_bytes() > self.max_memory_bytes:
+            print(f"[MODEL REGISTRY] Warning: loaded models use {self._total_bytes() / 1e6:.0f} MB, "
+                  f"over the {self.max_memory_bytes / 1e6:.0f} MB cap (remaining models are in use)")
+
+    def _evict(self, key):
+        # Caller holds self.lock
+        entry = self.entries.pop(key)
+        self.evictions += 1
+        print(f"[MODEL REGISTRY] Evicted {key[2]} model '{key[0]}' on {key[1]}")
+        entry.backend = None
+
+    def _total_bytes(self):
+        return sum(entry.size_bytes for entry in self.entries.values())
+
+    def _estimate_size(self, backend):
+        """Model memory the backend reports (ASRBackend.memory_bytes); 0, with a warning, if it can't tell."""
+        try:
+            size = backend.memory_bytes()
+        except Exception:
+            size = None
+        if not size:
+            print(f"[MODEL REGISTRY] Warning: size of {getattr(backend, 'name', type(backend).__name__)} model "
+                  f"unknown, it doesn't count towards the memory cap")
+            return 0
+        return size
+
+    def _reap_idle_models(self):
+        # Check a few times per timeout period
+        interval = max(1.0, self.idle_timeout / 4)
+        while not self._stop_reaper.wait(interval):
+            self.evict_idle()
+
+    def get_status(self):
+        with self.lock:
+            return {
+                'models': [
+                    {
+                        'model_size': key[0],
+                        'device': key[1],
+                        'backend': key[2],
+                        'users': entry.users,
+                        'warm': getattr(entry.backend, 'is_warm', False),
+                        'idle_seconds': time.time() - entry.last_used if entry.users == 0 else 0.0,
+                        'size_mb': entry.size_bytes / 1e6
+                    }
+                    for key, entry in self.entries.items()
+                ],
+                'total_mb': self._total_bytes() / 1e6,
+                'loads': self.loads,
+                'hits': self.hits,
+                'evictions': self.evictions
+            }
+
+    def clear(self):
+        """Drop every idle model (e.g. at shutdown or between tests)."""
+        with self.lock:
+            for key in [key for key, entry in self.entries.items() if entry.users == 0]:
+                self._evict(key)
+
+    def shutdown(self):
+        self._stop_reaper.set()
+        self.clear()
@@ -0,0 +1,110 @@
+import math
+import numpy as np
+
+class PolyphaseResampler:
+    """
+    Streaming sample rate converter for the capture path (e.g. a 44.1 or 48 kHz device to the
+    pipeline's 16 kHz). The rate ratio is reduced to up/down = output_rate/input_rate and a
+    Kaiser-windowed sinc low-pass is split into `up` phases of `taps` coefficients, so every
+    output sample costs one taps-long dot product with the input around it. The last taps-1
+    input samples are kept between calls, so consecutive blocks resample exactly as one long
+    signal, with no clicks at block boundaries.
+
+    process() works block by block without allocating: the history, gather and output buffers
+    are sized once for max_block_size input samples (larger blocks are resampled in pieces),
+    and the returned array is a view of the output buffer, valid until the next call.
+    """
+
+    def __init__(self, input_rate, output_rate, max_block_size=4096, zero_crossings=16, rolloff=0.95, beta=8.6):
+        divisor = math.gcd(int(input_rate), int(output_rate))
+        self.input_rate = int(input_rate)
+        self.output_rate = int(output_rate)
+        self.up = self.output_rate // divisor
+        self.down = self.input_rate // divisor
+        self.max_block_size = max_block_size
+
+        # Low-pass at the lower of the two Nyquist frequencies, designed at the upsampled rate
+        self.taps = int(math.ceil(2 * zero_crossings * max(self.up, self.down) / self.up))
+        length = self.taps * self.up
+        cutoff = rolloff * 0.5 / max(self.up, self.down)       # Cycles per upsampled sample
+        t = np.arange(length) - (length - 1) / 2
+        prototype = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(length, beta)
+
+        # phases[p, k] weights input i - (taps - 1) + k for an output at phase p of input i,
+        # normalised so every phase passes DC at unity gain
+        phases = prototype.reshape(self.taps, self.up).T[:, ::-1]
+        self.phases = np.ascontiguousarray(phases / phases.sum(axis=1, keepdims=True), dtype=np.float32)
+
+        # Input history followed by the current block
+        self.buffer = np.zeros(self.taps - 1 + max_block_size, dtype=np.float32)
+
+        max_outputs = self.output_size(max_block_size)
+        self.positions = np.arange(max_outputs, dtype=np.int64)
+        self.tap_offsets = np.tile(np.arange(self.taps, dtype=np.int64), (max_outputs, 1))
+        self.index = np.empty(max_outputs, dtype=np.int64)
+        self.window_index = np.empty((max_outputs, self.taps), dtype=np.int64)
+        self.phase = np.empty(max_outputs, dtype=np.int64)
+        self.gathered = np.empty((max_outputs, self.taps), dtype=np.float32)
+        self.coefficients = np.empty((max_outputs, self.taps), dtype=np.float32)
+        self.output = np.empty(max_outputs, dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        """Forget the history, to resample an unrelated stream."""
+        self.buffer[:self.taps - 1] = 0
+        self.next_output = 0        # Index of the next output sample in the whole stream
+        self.consumed = 0           # Input samples processed so far
+
+    def output_size(self, input_size):
+        """Upper bound on the output samples process() returns for input_size input samples."""
+        return input_size * self.up // self.down + 1
+
+    def process(self, block):
+        """Resample the next block of float samples; returns a float32 view valid until the next call."""
+        if len(block) <= self.max_block_size:
+            count = self._process(block, self.output)
+            return self.output[:count]
+
+        # Oversized block: resample it in pieces into an output big enough for all of them
+        output = np.empty(self.output_size(len(block)), dtype=np.float32)
+        count = 0
+        for start in range(0, len(block), self.max_block_size):
+            count += self._process(block[start:start + self.max_block_size], output[count:])
+        return output[:count]
+
+    def _process(self, block, output):
+        size = len(block)
+        history = self.taps - 1
+        self.buffer[history:history + size] = block
+
+        # Outputs n whose input position floor(n * down / up) falls in this block
+        first_input = self.consumed
+        end_output = -((-(first_input + size) * self.up) // self.down)     # ceil((first_input + size) * up / down)
+        count = end_output - self.next_output
+        if count > 0:
+            index, phase = self.index[:count], self.phase[:count]
+            np.add(self.positions[:count], self.next_output, out=index)
+            np.multiply(index, self.down, out=index)
+            np.remainder(index, self.up, out=phase)
+            np.floor_divide(index, self.up, out=index)
+            np.subtract(index, first_input, out=index)
+
+            # Buffer positions of the taps inputs ending at each output's input sample
+            # (copyto + same-shape add: broadcasting in a ufunc would allocate iterator buffers)
+            window_index = self.window_index[:count]
+            np.copyto(window_index, index[:, None])
+            np.add(window_index, self.tap_offsets[:count], out=window_index)
+
+            # mode='clip' because 'raise' buffers the output; the indices are in range anyway
+            gathered, coefficients = self.gathered[:count], self.coefficients[:count]
+            np.take(self.buffer, window_index, out=gathered, mode='clip')
+            np.take(self.phases, phase, axis=0, out=coefficients, mode='clip')
+            np.einsum('ij,ij->i', gathered, coefficients, out=output[:count])
+            self.next_output = end_output
+        else:
+            count = 0
+
+        # Keep the last taps - 1 inputs for the next block
+        self.buffer[:history] = self.buffer[size:size + history]
+        self.consumed += size
+        return count
@@ -0,0 +1,321 @@
+import numpy as np
+import webrtcvad
+from .audio_buffers import FrameRingBuffer, SegmentBuffer
+from .vad import EnergyGate, NumpyVAD
+
+# A segmenter is the first stage of Transcriber.transcribe_stream: it reads int16 blocks from
+# audio_queue until the None sentinel (or an inference worker has failed) and hands every
+# finished segment to transcriber._emit_segment, so all strategies produce the same Segment
+# objects and go through the same metrics hooks (record_chunk_start, on_audio_chunk, silence
+# ratio, confidence) and ordered delivery.
+
+class Segmenter:
+    """Base class for the strategies that cut the incoming audio into segments for the model."""
+
+    name = None
+
+    def run(self, transcriber, audio_queue, track_insider_metrics=None, metrics_collector=None):
+        """Segment audio_queue until it ends, emitting segments through transcriber._emit_segment."""
+        raise NotImplementedError
+
+
+class FixedWindowSegmenter(Segmenter):
+    """
+    Cuts the stream into fixed chunk_s windows whether anyone is speaking or not (the original
+    fixed-chunk loop). With overlap_s, each window repeats the last overlap_s of the previous
+    one, so words cut at a boundary are heard in full once; the repeated words are removed on
+    delivery as for forced splits. What is left when the stream ends is emitted as a last,
+    shorter window.
+
+    There is no VAD, so the silence ratio reported for insider metrics is the share of 20ms
+    frames an EnergyGate classifies as clearly silent.
+    """
+
+    name = "fixed"
+
+    def __init__(self, chunk_s=3.0, overlap_s=0.0, sample_rate=16000):
+        if not 0 <= overlap_s < chunk_s:
+            raise ValueError("overlap_s must be at least 0 and shorter than chunk_s")
+        self.sample_rate = sample_rate
+        self.chunk_samples = int(chunk_s * sample_rate)
+        self.overlap_samples = int(overlap_s * sample_rate)
+        self.frame_size = int(sample_rate * 20 / 1000)
+
+    def run(self, transcriber, audio_queue, track_insider_metrics=None, metrics_collector=None):
+        window = SegmentBuffer(sample_rate=self.sample_rate)
+        gate = EnergyGate() if track_insider_metrics is not None else None
+        open_overlap = 0            # Leading samples of the open window repeated from the previous one
+
+        while True:
+            pcm = audio_queue.get()
+            if pcm is None or transcriber.worker_error is not None:
+                break
+
+            written = 0
+            while written < len(pcm):
+                take = min(len(pcm) - written, self.chunk_samples - len(window))
+                window.append(pcm[written:written + take])
+                written += take
+
+                if len(window) >= self.chunk_samples:
+                    keep_from = self.chunk_samples - self.overlap_samples
+                    audio_float = window.split(self.chunk_samples, keep_from)
+                    self._emit(transcriber, audio_float, open_overlap, gate, metrics_collector)
+                    open_overlap = self.overlap_samples
+
+        # The stream ended part way through a window
+        if len(window) > open_overlap and transcriber.worker_error is None:
+            self._emit(transcriber, window.finalize(), open_overlap, gate, metrics_collector)
+
+    def _emit(self, transcriber, audio_float, overlap_samples, gate, metrics_collector):
+        silence_ratio = self._silence_ratio(audio_float[overlap_samples:], gate) if gate is not None else None
+        transcriber._emit_segment(audio_float, self.sample_rate, silence_ratio, overlap_samples, metrics_collector)
+
+    def _silence_ratio(self, audio_float, gate):
+        frame_count = len(audio_float) // self.frame_size
+        if frame_count == 0:
+            return 0.0
+        frames = audio_float[:frame_count * self.frame_size].reshape(-1, self.frame_size) * 32767.0
+        energies = np.einsum('ij,ij->i', frames, frames) / self.frame_size
+        return sum(gate.classify(energies)) / frame_count
+
+
+class OverlappingWindowSegmenter(FixedWindowSegmenter):
+    """Fixed windows that repeat the end of the previous window (0.5s by default)."""
+
+    name = "fixed-overlap"
+
+    def __init__(self, chunk_s=3.0, overlap_s=0.5, sample_rate=16000):
+        super().__init__(chunk_s, overlap_s, sample_rate)
+
+
+class VADSegmenter(Segmenter):
+    """
+    Speech segments ended by silence, with the transcriber's VAD settings (aggressiveness,
+    frame duration, max silence frames, engine, forced splits, partial results, incremental
+    features, all as passed to transcribe_stream). The settings stay fixed for the whole
+    stream: updates queued with update_parameters() are ignored.
+    """
+
+    name = "vad"
+    adaptive = False
+
+    def run(self, transcriber, audio_queue, track_insider_metrics=None, metrics_collector=None):
+        """
+        Frame the incoming audio, detect speech endpoints and emit finished segments. Never
+        calls the model, so endpoint detection latency doesn't depend on inference speed.
+        With adaptive set, parameter updates are applied at chunk boundaries.
+        """
+
+        # Configures a VAD object with configurable aggressiveness
+        sample_rate = transcriber.sample_rate
+        batch_vad = transcriber.vad_engine == "numpy"     # Classifies whole blocks instead of single frames
+        vad_aggressiveness = transcriber.current_aggressiveness
+        vad = NumpyVAD(vad_aggressiveness, sample_rate) if batch_vad else webrtcvad.Vad(vad_aggressiveness)
+        frame_size = int(sample_rate * transcriber.current_frame_duration_ms / 1000) # Samples per frame 
+
+        speech_frames = SegmentBuffer(sample_rate=sample_rate)    # float32 samples of the open speech segment
+        partial_mark = 0            # Open segment length at the last partial decode request
+        open_overlap = 0            # Leading samples of the open segment repeated from a forced split
+        silence_samples = 0         # Consecutive silence, in samples so it survives frame size changes
+        endpoint_silence_samples = int(sample_rate * transcriber.current_endpoint_silence_ms / 1000)
+        features = transcriber.feature_extractor   # Incremental log-mel of the open segment, or None
+
+        # Holds incoming audio until we have a full frame (preallocated, sized for the largest 30ms frame)
+        buffer = FrameRingBuffer(capacity=sample_rate, max_frame_size=int(sample_rate * 30 / 1000))
+
+        # Frame counting for current chunk (for insider metrics)
+        chunk_silence_frames = 0
+        chunk_total_frames = 0
+
+        while True: 
+            # print("Transcription loop running") DEBUGGING STATEMENT
+            pcm = audio_queue.get()
+
+            # If the audio_stream stops, break the thread 
+            if pcm is None: 
+                break;
+
+            # Stop segmenting if the inference stage has failed
+            if transcriber.worker_error is not None:
+                break
+
+            # Write the block into the ring, draining full frames in between if it doesn't fit at once
+            written = 0
+            while written < len(pcm):
+                written += buffer.write(pcm[written:])
+
+                # Drain full frames; starts over when the frame size changes at a chunk boundary
+                reframe = True
+                while reframe:
+                    reframe = False
+
+                    # Classify everything buffered at once (batch engine)
+                    decisions = None
+                    if batch_vad:
+                        decisions = [d for run in buffer.frame_views(frame_size) for d in vad.classify(run)]
+
+                    # Process every full frame in the buffer (views into the ring, no copies)
+                    for i, (frame, frame_bytes) in enumerate(buffer.read_frames(frame_size)):
+                        transcriber.vad_frames += 1
+                        if decisions is not None:
+                            is_speech = decisions[i]
+                        else:
+                            is_speech = vad.is_speech(frame_bytes, sample_rate)
+                            transcriber.vad_calls += 1
+                        # print("VAD decision:", is_speech) DEBUGGING STATEMENT
+
+                        # Track frames for current chunk (for insider metrics)
+                        if track_insider_metrics is not None:
+                            chunk_total_frames += 1
+                            if not is_speech:
+                                chunk_silence_frames += 1
+
+                        if is_speech: 
+                            speech_frames.append(frame)     # Converted straight into the segment buffer
+                            if features is not None:
+                                features.update(speech_frames.peek())
+
+                            # Ask for a partial decode of the open segment every partial interval
+                            if transcriber.partial_interval_samples and len(speech_frames) - partial_mark >= transcriber.partial_interval_samples:
+                                partial_mark = len(speech_frames)
+                                transcriber._request_partial(speech_frames.peek())
+
+                            # Bound per-segment latency: split long continuous speech at a quiet point
+                            if transcriber.max_segment_samples and len(speech_frames) >= transcriber.max_segment_samples:
+                                chunk_silence_ratio = None
+                                if track_insider_metrics is not None:
+                                    chunk_silence_ratio = self._silence_ratio(chunk_silence_frames, chunk_total_frames)
+                                    chunk_silence_frames = 0
+                                    chunk_total_frames = 0
+
+                                audio_float, next_overlap = self._force_split(transcriber, speech_frames, frame_size, open_overlap)
+                                print(f"[TRANSCRIBER] Segment reached {len(audio_float) / sample_rate:.1f}s, forced split")
+                                segment_features = None
+                                if features is not None:
+                                    # The next segment starts mid-way, its frames are recomputed from there
+                                    segment_features = features.finalize(audio_float)
+                                    features.reset()
+                                    features.update(speech_frames.peek())
+                                transcriber._emit_segment(audio_float, sample_rate, chunk_silence_ratio, open_overlap, 
+                                                          metrics_collector, segment_features)
+                                open_overlap = next_overlap
+                                partial_mark = len(speech_frames)
+                            # if silence_samples > 0:
+                                # print(f"[DEBUG] Resetting silence_samples from {silence_samples} to 0 (speech detected)")
+                            silence_samples = 0
+                        else : 
+                            silence_samples += frame_size
+                            # print(f"[DEBUG] Silence frame detected. silence_samples={silence_samples}")
+                            if silence_samples > endpoint_silence_samples:
+                                if len(speech_frames) > open_overlap:
+                                    # Already float32 in [-1, 1], finalizing is just a view
+                                    audio_float = speech_frames.finalize()
+
+                                    # Calculate silence ratio for this chunk (for insider tracking)
+                                    chunk_silence_ratio = None
+                                    if track_insider_metrics is not None:
+                                        chunk_silence_ratio = self._silence_ratio(chunk_silence_frames, chunk_total_frames)
+                                
+                                        # Reset frame counters for next chunk
+                                        chunk_silence_frames = 0
+                                        chunk_total_frames = 0
+
+                                    # Only the last few frames and the normalisation are left to compute
+                                    segment_features = features.finalize(audio_float) if features is not None else None
+                                    transcriber._emit_segment(audio_float, sample_rate, chunk_silence_ratio, open_overlap, 
+                                                              metrics_collector, segment_features)
+                                else:
+                                    # Only overlap audio left after a forced split, nothing new to decode
+                                    speech_frames.discard()
+                                if features is not None:
+                                    features.reset()
+
+                                silence_samples = 0
+                                partial_mark = 0
+                                open_overlap = 0
+                        
+                                # Apply any pending parameter updates at chunk boundary
+                                if self.adaptive:
+                                    transcriber._apply_parameter_updates()
+                        
+                                # Recreate VAD with new parameters if they changed
+                                if vad_aggressiveness != transcriber.current_aggressiveness:
+                                    vad_aggressiveness = transcriber.current_aggressiveness
+                                    if batch_vad:
+                                        vad.set_aggressiveness(vad_aggressiveness)     # Keeps its noise floor
+                                    else:
+                                        vad = webrtcvad.Vad(vad_aggressiveness)
+                                    print(f"[TRANSCRIBER] VAD recreated with aggressiveness {vad_aggressiveness}")
+
+                                # Endpointing waits the same time at any frame size
+                                endpoint_silence_samples = int(sample_rate * transcriber.current_endpoint_silence_ms / 1000)
+
+                                # New frame size: re-frame whatever is still buffered with it
+                                new_frame_size = int(sample_rate * transcriber.current_frame_duration_ms / 1000)
+                                if new_frame_size != frame_size:
+                                    print(f"[TRANSCRIBER] Frame size changed to {transcriber.current_frame_duration_ms}ms, "
+                                          f"re-framing {len(buffer)} buffered samples")
+                                    frame_size = new_frame_size
+                                    reframe = True
+                                    break
+
+    def _silence_ratio(self, silence_frames, total_frames):
+        return silence_frames / total_frames if total_frames > 0 else 0.0
+
+    def _force_split(self, transcriber, speech_frames, frame_size, open_overlap):
+        """
+        Split the open segment at the lowest-energy frame of its last second.
+        Returns (first_half, overlap): the next segment keeps the last split_overlap_samples
+        of the first half, so words cut at the split point are heard in full by one of them.
+        """
+        audio = speech_frames.peek()
+        search = min(len(audio) - open_overlap, transcriber.sample_rate) // frame_size * frame_size
+        tail_start = len(audio) - search
+
+        # Energy per frame over the last second, in one vectorised pass
+        frames = audio[tail_start:].reshape(-1, frame_size)
+        energies = np.einsum('ij,ij->i', frames, frames)
+        split = tail_start + int(np.argmin(energies)) * frame_size + frame_size // 2
+
+        keep_from = max(open_overlap, split - transcriber.split_overlap_samples)
+        return speech_frames.split(split, keep_from), split - keep_from
+
+
+class AdaptiveVADSegmenter(VADSegmenter):
+    """VAD segmentation that applies update_parameters() (the AdaptiveController) at chunk boundaries."""
+
+    name = "adaptive-vad"
+    adaptive = True
+
+
+SEGMENTERS = {
+    FixedWindowSegmenter.name: FixedWindowSegmenter,
+    OverlappingWindowSegmenter.name: OverlappingWindowSegmenter,
+    VADSegmenter.name: VADSegmenter,
+    AdaptiveVADSegmenter.name: AdaptiveVADSegmenter
+}
+
+def create_segmenter(segmenter, **options):
+    """Instantiate the named segmenter."""
+    if segmenter not in SEGMENTERS:
+        raise ValueError(f"Unknown segmenter '{segmenter}'. Choose from: {', '.join(SEGMENTERS)}")
+    return SEGMENTERS[segmenter](**options)
+
+def segmenter_from_config(config):
+    """
+    Segmenter for a test_framework TEST_CONFIGS entry ('model_type' 'fixed', 'vad' or 'adaptive';
+    fixed entries give chunk_size and optionally overlap, in seconds). The VAD settings of the
+    other entries are transcribe_stream arguments, not segmenter options.
+    """
+    model_type = config.get('model_type') or ('fixed' if 'chunk_size' in config else 'vad')
+    if model_type == 'fixed':
+        overlap_s = config.get('overlap', 0.0)
+        if overlap_s:
+            return OverlappingWindowSegmenter(chunk_s=config['chunk_size'], overlap_s=overlap_s)
+        return FixedWindowSegmenter(chunk_s=config['chunk_size'])
+    if model_type == 'adaptive':
+        return AdaptiveVADSegmenter()
+    if model_type == 'vad':
+        return VADSegmenter()
+    raise ValueError(f"Unknown model type '{model_type}'. Choose from: fixed, vad, adaptive")
@@ -0,0 +1,59 @@
+import json
+import queue
+import threading
+
+class SessionEvents:
+    """
+    Fans a session's updates (new transcript text, new metrics, start/stop) out to every open
+    subscriber, e.g. the browser tabs streaming /events. Each subscriber has its own bounded
+    queue: publishing never blocks the transcription pipeline, and a subscriber that stops
+    reading only loses its own oldest updates (a newer one supersedes them anyway).
+    """
+
+    def __init__(self, max_pending=100):
+        self.max_pending = max_pending
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+        # Statistics
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self):
+        """A new queue that receives (event, data) tuples from now on."""
+        subscriber = queue.Queue(maxsize=self.max_pending)
+        with self.lock:
+            self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+
+    def publish(self, event, data):
+        with self.lock:
+            subscribers = list(self.subscribers)
+            self.published += 1
+        for subscriber in subscribers:
+            while True:
+                try:
+                    subscriber.put_nowait((event, data))
+                    break
+                except queue.Full:
+                    # Drop the oldest update for this subscriber and try again
+                    try:
+                        subscriber.get_nowait()
+                        with self.lock:
+                            self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def subscriber_count(self):
+        with self.lock:
+            return len(self.subscribers)
+
+
+def format_sse(event, data):
+    """One Server-Sent Events message: a named event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -45,6 +45,14 @@ class MetricsTracker:
             self.accumulated.append((str(text).strip(), duration))
         self.track_chunk_duration(duration)
 
+    def replace_transcription(self, index, text):
+        # Swap in a more accurate text for an earlier transcription (two-pass mode), keeping its duration
+        with self.accumulated_lock:
+            if 0 <= index < len(self.accumulated):
+                self.accumulated[index] = (str(text).strip(), self.accumulated[index][1])
+                return True
+            return False
+
     # ------------------- Audio Tracking -------------------
     def add_audio_chunk(self, audio_float, duration):
         with self.audio_chunks_lock:
@@ -1,23 +1,146 @@
 import whisper
 import numpy as np
-import webrtcvad 
 import queue
+import threading
+import string
+import time
+from collections import deque
+from .asr_backends import ASRBackend, create_backend
+from .features import IncrementalLogMel
+from .inference_scheduler import FINAL, BACKGROUND
+from .segmenters import AdaptiveVADSegmenter
 
 MODEL_SIZE = "small"
 DEVICE = "cpu"
 
+def _normalise_word(word):
+    """Lower-case and strip punctuation, for comparing words across decodes."""
+    return word.lower().strip(string.punctuation)
+
+class Segment:
+    """A finalized speech segment, passed from the VAD stage to the inference stage."""
+    def __init__(self, index, audio_float, duration, silence_ratio=None, overlap_samples=0, features=None):
+        self.index = index                  # Position in the stream, used to keep output order
+        self.audio_float = audio_float      # float32 samples in [-1, 1]
+        self.duration = duration            # True audio duration in seconds (excluding overlap)
+        self.silence_ratio = silence_ratio  # Silence ratio of the chunk (insider metrics only)
+        self.overlap_samples = overlap_samples  # Leading samples repeated from the previous (force-split) segment
+        self.features = features            # Precomputed log-mel features, or None to decode the audio
+
+class PartialJob:
+    """A snapshot of the open segment to decode for partial results."""
+    def __init__(self, segment_index, audio_float):
+        self.segment_index = segment_index  # Index the open segment will get when finalized
+        self.audio_float = audio_float      # View of the open segment so far
+
+class LocalAgreement:
+    """
+    Stabilises partial results of an open segment (local agreement between consecutive decodes).
+    Words on which two consecutive partial hypotheses agree, from the start, are committed
+    and never retracted; the rest of the latest hypothesis is unstable partial text.
+    """
+    def __init__(self):
+        self.committed_words = []
+        self.previous_words = []
+
+    def reset(self):
+        self.committed_words = []
+        self.previous_words = []
+
+    def update(self, text):
+        """Add a new hypothesis; returns (committed_text, partial_text)."""
+        words = text.split()
+
+        # Longest common prefix with the previous hypothesis
+        agreed = 0
+        limit = min(len(words), len(self.previous_words))
+        while agreed < limit and _normalise_word(words[agreed]) == _normalise_word(self.previous_words[agreed]):
+            agreed += 1
+
+        # The committed prefix only ever grows
+        if agreed > len(self.committed_words):
+            self.committed_words = words[:agreed]
+        self.previous_words = words
+
+        partial_words = words[len(self.committed_words):]
+        return " ".join(self.committed_words), " ".join(partial_words)
+
 class Transcriber: 
     # Constructor to initialize the audio stream
     # - self is always the first argument in a method in a class
-    def __init__(self, model_size, device):
-        self.model = whisper.load_model(model_size, device=device)
+    # - num_workers sets how many inference threads consume finished segments
+    # - backend selects the ASR engine ("whisper", "whisper-int8", "faster-whisper" or "onnx"), see asr_backends.py,
+    #   or is an already loaded ASRBackend (e.g. from the ModelRegistry)
+    # - sample_rate is the rate of the audio queue, as produced by AudioStream
+    # - scheduler is an InferenceScheduler shared with other sessions: decodes are submitted to it as
+    #   client_id instead of running on this Transcriber's worker threads
+    def __init__(self, model_size, device, num_workers=1, backend="whisper", sample_rate=16000,
+                 scheduler=None, client_id=None, **backend_options):
+        if isinstance(backend, ASRBackend):
+            self.backend = backend
+        else:
+            self.backend = create_backend(backend, model_size, device, **backend_options)
+        self.model = self.backend.model     # Underlying engine model (e.g. the whisper model)
         self.device = device
+        self.num_workers = max(1, num_workers)
+        self.sample_rate = sample_rate      # Whisper models expect 16 kHz
+
+        # Pipeline state (VAD stage -> segment_queue -> inference workers -> ordered delivery)
+        self.audio_queue = None
+        self.segment_queue = queue.Queue()
+        self.completed_segments = {}
+        self.next_segment_index = 0
+        self.next_delivery_index = 0
+        self.delivery_lock = threading.Lock()
+        self.worker_error = None
+
+        # Engines that can't decode from several threads at once (e.g. PyTorch whisper, which
+        # installs kv-cache hooks on the shared model) are serialised with a lock. ASRBackends carry
+        # their own, so sessions sharing a model through the ModelRegistry are serialised together
+        self.backend_locks = {}     # Locks of other objects used as backends (load shedding / two-pass use other models)
+        self.model_lock = self._backend_lock(self.backend)
+
+        # Shared inference scheduler (optional): fair share of the node's inference time across sessions
+        self.scheduler = scheduler
+        self.client_id = client_id if client_id is not None else id(self)
+
+        # Load shedding: decode settings (and optionally a smaller backend) used instead of the
+        # defaults while inference can't keep up, see set_decode_mode()
+        self.decode_mode = 'full'
+        self.decode_options = dict(self.backend.full_decode_options) if isinstance(self.backend, ASRBackend) else {}
+        self.decode_backend = self.backend
+        self.recent_rtf = deque(maxlen=5)   # Decode time / audio duration of the last few segments
+
+        # Partial results state (optional, see transcribe_stream)
+        self.partial_queue = queue.Queue(maxsize=1)
+        self.partial_interval_samples = None
+        self.agreement = LocalAgreement()
+
+        # Forced splitting of long segments (optional, see transcribe_stream)
+        self.max_segment_samples = None
+        self.split_overlap_samples = 0
+        self.last_delivered_text = ""
+
+        # Incremental log-mel features (optional, see transcribe_stream)
+        self.feature_extractor = None
+
+        # VAD engine (see transcribe_stream)
+        self.vad_engine = "webrtc"
+        self.vad_frames = 0                 # Frames classified
+        self.vad_calls = 0                  # Frames that needed webrtcvad
+
+        # Two-pass transcription (optional, see transcribe_stream)
+        self.refine_backend = None
+        self.refine_queue = queue.Queue()
+        self.last_refined_text = ""
         
         # Parameter queue for adaptive updates
         self.parameter_queue = queue.Queue()
         self.current_aggressiveness = 3
         self.current_frame_duration_ms = 20
         self.current_max_silence_frames = 10
+        self.silence_frame_unit_ms = 20         # Frame length max_silence_frames is counted in
+        self.current_endpoint_silence_ms = 200  # Silence that ends a segment, whatever the frame size
 
     def update_parameters(self, aggressiveness, frame_duration_ms, max_silence_frames):
         """
@@ -34,6 +157,37 @@ class Transcriber:
         except queue.Full:
             print(f"[TRANSCRIBER] Warning: Parameter queue full, update dropped")
 
+    def set_decode_mode(self, mode, backend=None):
+        """
+        Switch the decode settings used for the next segments (load shedding, see
+        AdaptiveController.update_load): 'full', 'greedy', 'no_fallback' or 'smaller_model'.
+        backend replaces the session's backend (e.g. a smaller model) until the next switch.
+        """
+        greedy = dict(self.backend.greedy_decode_options)
+        options = {
+            'full': dict(self.backend.full_decode_options),
+            'greedy': greedy,
+            'no_fallback': {**greedy, **self.backend.fast_decode_options},
+            'smaller_model': {**greedy, **self.backend.fast_decode_options}
+        }[mode]
+
+        # Swapped together, so a worker never sees the options of one mode with the backend of another
+        with self.delivery_lock:
+            self.decode_mode = mode
+            self.decode_options = options
+            self.decode_backend = backend or self.backend
+        print(f"[TRANSCRIBER] Decode mode set to '{mode}'"
+              + (f" ({self.decode_backend.model_size} model)" if backend is not None else ""))
+
+    def get_load(self):
+        """Inference backlog and recent real-time factor, for load shedding."""
+        rtfs = list(self.recent_rtf)
+        return {
+            'pending_segments': self.segment_queue.qsize(),
+            'rtf': sum(rtfs) / len(rtfs) if rtfs else 0.0,
+            'decode_mode': self.decode_mode
+        }
+
     def _apply_parameter_updates(self):
         """Apply any pending parameter updates."""
         try:
@@ -44,135 +198,364 @@ class Transcriber:
                 self.current_aggressiveness = new_params['aggressiveness']
                 self.current_frame_duration_ms = new_params['frame_duration_ms']
                 self.current_max_silence_frames = new_params['max_silence_frames']
+                self.current_endpoint_silence_ms = self.current_max_silence_frames * self.silence_frame_unit_ms
                 
                 print(f"[TRANSCRIBER] Parameters applied: Aggressiveness={self.current_aggressiveness}, "
                       f"Frame Duration={self.current_frame_duration_ms}ms, "
-                      f"Max Silence Frames={self.current_max_silence_frames}")
+                      f"Max Silence Frames={self.current_max_silence_frames} ({self.current_endpoint_silence_ms}ms)")
                 
         except queue.Empty:
             pass  # No updates to apply
 
     def transcribe_stream(self, audio_queue, on_transcription, on_audio_chunk, track_insider_metrics=None, 
-                         aggressiveness=3, frame_duration_ms=20, max_silence_frames=10, metrics_collector=None):
+                         aggressiveness=3, frame_duration_ms=20, max_silence_frames=10, metrics_collector=None,
+                         on_partial=None, partial_interval_s=None, max_segment_s=None, split_overlap_s=0.5,
+                         incremental_features=False, refine_backend=None, on_refined=None,
+                         vad_engine="webrtc", segmenter=None, max_pending_segments=None):
         """
         Transcribe audio stream with optional insider metrics tracking for adaptive chunking.
+
+        Runs as a two-stage pipeline: the calling thread only does VAD segmentation and
+        hands finished segments to the inference worker(s) through segment_queue, so a
+        slow Whisper decode never stops audio_queue from being drained.
+
+        Backpressure: with max_pending_segments set, at most that many finished segments wait
+        for inference; the segmenter then blocks, the capture ring buffer fills up and its
+        overflow policy sheds audio. Memory per stream is then bounded by the ring buffer plus
+        max_pending_segments segments of at most max_segment_s each.
+
+        Segmentation is delegated to segmenter (see segmenters.py): fixed windows, fixed windows
+        with overlap, VAD, or adaptive VAD (the default, which applies update_parameters() at
+        chunk boundaries). The VAD options below only apply to the VAD segmenters.
+
+        Endpointing: a segment ends after max_silence_frames * frame_duration_ms of silence. That
+        duration is what is kept when update_parameters() changes the frame size (applied at the
+        next chunk boundary, re-framing the audio still buffered), so max_silence_frames always
+        counts frames of the stream's initial frame_duration_ms.
+
+        Partial results: with on_partial and partial_interval_s set, the open segment is
+        re-decoded every partial_interval_s seconds of speech and on_partial(committed, partial)
+        is called with the stable (agreed) prefix and the unstable rest of the hypothesis.
+        The final text of the segment still arrives through on_transcription.
+
+        Maximum segment duration: with max_segment_s set, a segment that reaches that length
+        during continuous speech is split at the quietest frame of its last second. The next
+        segment starts split_overlap_s earlier, and the words repeated because of that overlap
+        are removed when its text is delivered.
+
+        Incremental features: with incremental_features set (and a backend that takes log-mel
+        input), the log-mel spectrogram of the open segment is computed as speech arrives, so
+        only the model itself runs once the speaker stops. Segments longer than Whisper's 30 s
+        window still decode from audio, so pair it with max_segment_s.
+
+        VAD engine: "webrtc" calls webrtcvad once per frame; "numpy" (vad.NumpyVAD) classifies
+        every buffered frame in one vectorised pass, which only pays off when audio arrives in
+        large blocks (file replay, catching up on a backlog). Both follow the aggressiveness knob.
+
+        Two-pass transcription: with refine_backend and on_refined set, the live text comes from
+        this transcriber's (fast) backend as usual, and every delivered segment is decoded again
+        with refine_backend (a larger model) on a low-priority background thread, which only
+        runs while no live segments are waiting. on_refined(segment_index, text) is called in
+        segment order with the more accurate text; segment_index counts on_transcription calls.
         """
 
         # Initialize current parameters
         self.current_aggressiveness = aggressiveness
         self.current_frame_duration_ms = frame_duration_ms
         self.current_max_silence_frames = max_silence_frames
+        self.silence_frame_unit_ms = frame_duration_ms
+        self.current_endpoint_silence_ms = max_silence_frames * frame_duration_ms
+
+        # Fresh pipeline state for this stream
+        self.audio_queue = audio_queue
+        self.segment_queue = queue.Queue(maxsize=max_pending_segments or 0)
+        self.completed_segments = {}        # Segment index -> (segment, result), waiting to be delivered in order
+        self.next_segment_index = 0         # Next segment index the segmenter will emit
+        self.next_delivery_index = 0        # Next segment index to be handed to the callbacks
+        self.worker_error = None            # First exception raised by an inference worker
+        self.last_delivered_text = ""       # For removing words repeated by split overlaps
+        self.recent_rtf.clear()
 
-        # Configures a VAD object with configurable aggressiveness
-        vad = webrtcvad.Vad(self.current_aggressiveness)
-        sample_rate = 16000         # Must match AudioStream 
-        frame_size = int(sample_rate * self.current_frame_duration_ms / 1000) # Samples per frame 
+        # Forced splitting of long segments
+        self.max_segment_samples = int(max_segment_s * self.sample_rate) if max_segment_s else None
+        self.split_overlap_samples = int(split_overlap_s * self.sample_rate)
 
-        speech_frames = []          # Store speech segments
-        silence_counter = 0         # Counts consecutive silence frames 
+        # Log-mel frames computed by the segmenter while segments are still open
+        self.feature_extractor = None
+        if incremental_features and self.backend.feature_mels:
+            self.feature_extractor = IncrementalLogMel(self.backend.feature_mels)
 
-        buffer = np.empty((0,), dtype=np.int16)     # Holds incoming audio until we have a full frame
+        if vad_engine not in ("webrtc", "numpy"):
+            raise ValueError(f"Unknown VAD engine '{vad_engine}'. Choose from: webrtc, numpy")
+        self.vad_engine = vad_engine
+        self.vad_frames = 0
+        self.vad_calls = 0
 
-        # Frame counting for current chunk (for insider metrics)
-        chunk_silence_frames = 0
-        chunk_total_frames = 0
+        # Second-pass decodes run on their own low-priority thread
+        refine_worker = None
+        self.refine_backend = None
+        if refine_backend is not None and on_refined is not None:
+            self.refine_backend = refine_backend
+            self.refine_queue = queue.Queue()
+            self.last_refined_text = ""
+            refine_worker = threading.Thread(target=self._refine_worker, args=(on_refined,),
+                                             name="refine-worker", daemon=True)
+            refine_worker.start()
 
-        while True: 
-            # print("Transcription loop running") DEBUGGING STATEMENT
-            pcm = audio_queue.get()
+        # Partial results are decoded on their own low-priority thread
+        partial_worker = None
+        self.partial_interval_samples = None
+        if on_partial is not None and partial_interval_s:
+            self.partial_interval_samples = int(partial_interval_s * self.sample_rate)
+            self.partial_queue = queue.Queue(maxsize=1)
+            self.agreement.reset()
+            partial_worker = threading.Thread(target=self._partial_worker, args=(on_partial,), 
+                                              name="partial-worker", daemon=True)
+            partial_worker.start()
 
-            # If the audio_stream stops, break the thread 
-            if pcm is None: 
-                break;
+        callbacks = (on_transcription, on_audio_chunk, track_insider_metrics, metrics_collector)
 
-            buffer = np.concatenate((buffer, pcm))        
+        # Start the inference stage
+        workers = []
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._inference_worker, args=callbacks, 
+                                      name=f"inference-worker-{i}", daemon=True)
+            worker.start()
+            workers.append(worker)
+
+        try:
+            # The segmentation stage runs on the calling thread
+            segmenter = segmenter or AdaptiveVADSegmenter()
+            segmenter.run(self, audio_queue, track_insider_metrics, metrics_collector)
+        finally:
+            # One sentinel per worker, queued after every real segment
+            for _ in workers:
+                self.segment_queue.put(None)
+            for worker in workers:
+                worker.join()
 
-            # Once buffer is long enough, process it
-            while len(buffer) >= frame_size:
-                frame = buffer[:frame_size]
-                buffer = buffer[frame_size:]
+            if partial_worker is not None:
+                self._post_partial_job(None)
+                partial_worker.join()
 
-                frame_bytes = frame.tobytes()
-                is_speech = vad.is_speech(frame_bytes, sample_rate)
-                # print("VAD decision:", is_speech) DEBUGGING STATEMENT
+            # Let the second pass finish, so the stored transcript is complete when we return
+            if refine_worker is not None:
+                self.refine_queue.put(None)
+                refine_worker.join()
 
-                # Track frames for current chunk (for insider metrics)
+        # Surface callback/model errors to the caller, as the single-threaded loop did
+        if self.worker_error is not None:
+            raise self.worker_error
+
+    def _emit_segment(self, audio_float, sample_rate, silence_ratio, overlap_samples, metrics_collector=None, 
+                      features=None):
+        """Hand a finished segment over to the inference stage."""
+        # Record when chunk processing starts
+        if metrics_collector:
+            metrics_collector.record_chunk_start()
+
+        # true audio duration in seconds (the overlap was already counted in the previous segment):
+        segment_duration = (len(audio_float) - overlap_samples) / sample_rate
+
+        self.segment_queue.put(Segment(self.next_segment_index, audio_float, segment_duration, 
+                                       silence_ratio, overlap_samples, features))
+        self.next_segment_index += 1
+
+    def _stitch_overlap(self, previous_text, text, max_words=8):
+        """Drop the words at the start of text that repeat the end of previous_text."""
+        previous_words = [_normalise_word(word) for word in previous_text.split()][-max_words:]
+        words = text.split()
+        for k in range(min(len(previous_words), len(words)), 0, -1):
+            if [_normalise_word(word) for word in words[:k]] == previous_words[-k:]:
+                return " " + " ".join(words[k:]) if len(words) > k else ""
+        return text
+
+    def _inference_worker(self, on_transcription, on_audio_chunk, track_insider_metrics=None, metrics_collector=None):
+        """Inference stage: decode queued segments until a None sentinel arrives."""
+        while True:
+            segment = self.segment_queue.get()
+            if segment is None:
+                break
+
+            # After a failure, keep draining so the segmenter never blocks on us
+            if self.worker_error is not None:
+                continue
+
+            try:
+                with self.delivery_lock:
+                    backend, options = self.decode_backend, self.decode_options
+                if self.scheduler is not None:
+                    job = self.scheduler.submit(self.client_id, backend, segment.audio_float,
+                                                features=segment.features, priority=FINAL, **options)
+                    result = job.wait()
+                    decode_seconds = job.decode_seconds     # Excludes the wait for other sessions' decodes
+                else:
+                    started = time.perf_counter()
+                    result = self._decode(segment.audio_float, features=segment.features, backend=backend, **options)
+                    decode_seconds = time.perf_counter() - started
+                if segment.duration > 0:
+                    self.recent_rtf.append(decode_seconds / segment.duration)
+                self._deliver_in_order(segment, result, on_transcription, on_audio_chunk, 
+                                       track_insider_metrics, metrics_collector)
+            except Exception as e:
+                with self.delivery_lock:
+                    if self.worker_error is None:
+                        self.worker_error = e
+                print(f"[TRANSCRIBER] Inference worker error: {e}")
+
+    def _decode(self, audio_float, features=None, backend=None, **options):
+        """Run the backend (from precomputed features if there are any), serialised if it isn't thread-safe."""
+        backend = backend or self.backend
+        if self.scheduler is not None:
+            # Partial and second-pass decodes only use inference time no final segment needs
+            return self.scheduler.submit(self.client_id, backend, audio_float, features=features,
+                                         priority=BACKGROUND, **options).wait()
+
+        if features is not None and backend.feature_mels == features.shape[0]:
+            decode = lambda: backend.transcribe_features(features, audio_float, language="en", **options)
+        else:
+            decode = lambda: backend.transcribe(audio_float, language="en", **options)
+
+        if getattr(backend, 'thread_safe', False):
+            return decode()
+        with self._backend_lock(backend):
+            return decode()
+
+    def _backend_lock(self, backend):
+        if isinstance(backend, ASRBackend):
+            return backend.decode_lock
+        return self.backend_locks.setdefault(backend, threading.Lock())
+
+    def _refine_worker(self, on_refined):
+        """Second pass: re-decode delivered segments with refine_backend while the live pipeline is idle."""
+        while True:
+            segment = self.refine_queue.get()
+            if segment is None:
+                break
+
+            # Live decodes take priority
+            while self.segment_queue.qsize() > 0 and self.worker_error is None:
+                time.sleep(0.05)
+
+            try:
+                result = self._decode(segment.audio_float, features=segment.features, backend=self.refine_backend)
+                text = result["text"]
+                if segment.overlap_samples > 0:
+                    text = self._stitch_overlap(self.last_refined_text, text)
+                self.last_refined_text = text
+                on_refined(segment.index, text)
+            except Exception as e:
+                # The live text stays in place, the session carries on
+                self.last_refined_text = ""
+                print(f"[TRANSCRIBER] Refinement error on segment {segment.index}: {e}")
+
+    def _request_partial(self, audio_float):
+        """Queue a partial decode of the open segment (the next one the segmenter will emit)."""
+        self._post_partial_job(PartialJob(self.next_segment_index, audio_float))
+
+    def _post_partial_job(self, job):
+        """Replace any partial decode that hasn't started yet; only the newest snapshot matters."""
+        try:
+            self.partial_queue.get_nowait()
+        except queue.Empty:
+            pass
+        self.partial_queue.put_nowait(job)
+
+    def _partial_worker(self, on_partial):
+        """Decode snapshots of the open segment and report committed/unstable text."""
+        current_segment = None
+        while True:
+            job = self.partial_queue.get()
+            if job is None:
+                break
+
+            # Final decodes take priority: skip partials while segments are waiting, or once
+            # the segment has been finalized
+            if self.segment_queue.qsize() > 0 or job.segment_index < self.next_segment_index:
+                continue
+
+            try:
+                result = self._decode(job.audio_float, backend=self.decode_backend, 
+                                      **self.backend.fast_decode_options)
+
+                with self.delivery_lock:
+                    # The segment may have been finalized while we decoded, its final text wins
+                    if job.segment_index < self.next_segment_index:
+                        continue
+                    if job.segment_index != current_segment:
+                        self.agreement.reset()
+                        current_segment = job.segment_index
+                    committed, partial = self.agreement.update(result["text"])
+                    on_partial(committed, partial)
+            except Exception as e:
+                # Partial results are best effort, never stop the pipeline for them
+                print(f"[TRANSCRIBER] Partial decode error: {e}")
+
+    def _deliver_in_order(self, segment, result, on_transcription, on_audio_chunk, 
+                          track_insider_metrics=None, metrics_collector=None):
+        """
+        Run the per-segment callbacks in segment order, whichever worker finished first.
+        Results that arrive early wait in completed_segments until their turn.
+        """
+        with self.delivery_lock:
+            self.completed_segments[segment.index] = (segment, result)
+
+            while self.next_delivery_index in self.completed_segments and self.worker_error is None:
+                segment, result = self.completed_segments.pop(self.next_delivery_index)
+                self.next_delivery_index += 1
+
+                # Remove words repeated because of a forced split's overlap
+                text = result["text"]
+                if segment.overlap_samples > 0:
+                    text = self._stitch_overlap(self.last_delivered_text, text)
+                self.last_delivered_text = text
+
+                if on_audio_chunk: 
+                    # Metrics only see the new audio, not the overlap they already had
+                    on_audio_chunk(segment.audio_float[segment.overlap_samples:], segment.duration)
+
+                # Calculate chunk-level metrics for insider tracking
                 if track_insider_metrics is not None:
-                    chunk_total_frames += 1
-                    if not is_speech:
-                        chunk_silence_frames += 1
-
-                if is_speech: 
-                    speech_frames.append(frame)
-                    # if silence_counter > 0:
-                        # print(f"[DEBUG] Resetting silence_counter from {silence_counter} to 0 (speech detected)")
-                    silence_counter = 0 
-                else : 
-                    silence_counter += 1
-                    # print(f"[DEBUG] Silence frame detected. silence_counter={silence_counter}")
-                    if silence_counter > self.current_max_silence_frames:
-                        if speech_frames:
-                            # Record when chunk processing starts
-                            if metrics_collector:
-                                metrics_collector.record_chunk_start()
-                            
-                            # print(f"[DEBUG] Finalizing segment. silence_counter={silence_counter}, segment_frames={len(speech_frames)}, segment_duration={len(np.concatenate(speech_frames))/sample_rate:.2f}s")
-                            segment = np.concatenate(speech_frames)
-                            audio_float = segment.astype(np.float32) / 32767.0
-                            
-                            # true audio duration in seconds:
-                            segment_duration = len(segment) / sample_rate
-
-                            if on_audio_chunk: 
-                                on_audio_chunk(audio_float, segment_duration)
-
-                            result = self.model.transcribe(
-                                audio_float, 
-                                fp16=(self.device != "cpu"), 
-                                language="en"   
-                            )
-
-                            # Calculate chunk-level metrics for insider tracking
-                            if track_insider_metrics is not None:
-                                # Calculate silence ratio for this chunk
-                                chunk_silence_ratio = chunk_silence_frames / chunk_total_frames if chunk_total_frames > 0 else 0.0
-                                track_insider_metrics.add_chunk_silence_ratio(chunk_silence_ratio)
-                                
-                                # Calculate confidence for this chunk
-                                confidence = self._extract_confidence(result)
-                                track_insider_metrics.add_confidence(confidence)
-                                
-                                # Reset frame counters for next chunk
-                                chunk_silence_frames = 0
-                                chunk_total_frames = 0
-
-                            if on_transcription: 
-                                on_transcription(result["text"], segment_duration)
-                            
-                            # Record when transcription is completed
-                            if metrics_collector:
-                                metrics_collector.record_chunk_end(result["text"])
-                      
-                            # # Print summary (aligned with UI metrics timing)
-                            # if track_insider_metrics is not None:
-                            #     track_insider_metrics.print_summary()
-
-                        speech_frames = []
-                        silence_counter = 0
-                        
-                        # Apply any pending parameter updates at chunk boundary
-                        self._apply_parameter_updates()
-                        
-                        # Recreate VAD with new parameters if they changed
-                        if hasattr(self, '_last_applied_aggressiveness') and self._last_applied_aggressiveness != self.current_aggressiveness:
-                            vad = webrtcvad.Vad(self.current_aggressiveness)
-                            self._last_applied_aggressiveness = self.current_aggressiveness
-                            print(f"[TRANSCRIBER] VAD recreated with aggressiveness {self.current_aggressiveness}")
-                        elif not hasattr(self, '_last_applied_aggressiveness'):
-                            self._last_applied_aggressiveness = self.current_aggressiveness
+                    if segment.silence_ratio is not None:
+                        track_insider_metrics.add_chunk_silence_ratio(segment.silence_ratio)
+                    
+                    # Calculate confidence for this chunk
+                    confidence = self._extract_confidence(result)
+                    track_insider_metrics.add_confidence(confidence)
+
+                if on_transcription: 
+                    on_transcription(text, segment.duration)
+                
+                # Record when transcription is completed
+                if metrics_collector:
+                    metrics_collector.record_chunk_end(text)
+
+                # Queue the segment for the accurate second pass
+                if self.refine_backend is not None:
+                    self.refine_queue.put(segment)
+
+    def get_vad_stats(self):
+        """How many frames were classified, and how many of them went through webrtcvad one by one."""
+        return {
+            'frames': self.vad_frames,
+            'vad_calls': self.vad_calls
+        }
+
+    def get_queue_depths(self):
+        """Current backlog at each pipeline stage (audio -> VAD -> inference -> delivery)."""
+        with self.delivery_lock:
+            reorder_depth = len(self.completed_segments)
+        return {
+            'audio_queue': self.audio_queue.qsize() if self.audio_queue is not None else 0,
+            'segment_queue': self.segment_queue.qsize(),
+            'awaiting_delivery': reorder_depth,
+            'segments_emitted': self.next_segment_index,
+            'segments_delivered': self.next_delivery_index,
+            'awaiting_refinement': self.refine_queue.qsize() if self.refine_backend is not None else 0
+        }
 
     def _extract_confidence(self, result):
-        """Extract confidence score from Whisper transcription result"""
+        """Extract confidence score from a transcription result (same shape for every backend)"""
         try:
             # Whisper returns segments with confidence scores
             if "segments" in result and result["segments"]:
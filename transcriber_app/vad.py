@@ -0,0 +1,166 @@
+import numpy as np
+
+class EnergyGate:
+    """
+    Energy-only silence classifier, for segmenters that don't run a VAD (see
+    segmenters.FixedWindowSegmenter): frames clearly below the background noise level count
+    as silence, everything else as sound.
+
+    The noise floor follows the quietest frames: it drops immediately to a quieter frame and
+    rises slowly (floor_rise_db per frame) when the room gets louder. A frame is gated when
+    it is within margin_db of the floor and below max_gate_db, so a noisy room can never
+    push the threshold up into speech levels.
+
+    It is not a pre-filter for webrtcvad: every frame webrtcvad skips still changes its
+    filter and noise-model state (even digital silence), so gating frames in front of it
+    changes its later decisions.
+    """
+
+    def __init__(self, margin_db=6.0, max_gate_db=-45.0, floor_rise_db=0.05):
+        self.margin_db = margin_db
+        self.max_gate_db = max_gate_db          # dBFS, frames louder than this are never silence
+        self.floor_rise_db = floor_rise_db
+        self.noise_floor_db = None
+
+    def reset(self):
+        self.noise_floor_db = None
+
+    def classify(self, energies):
+        """
+        Take mean-square energies (int16 scale) of consecutive frames; returns a list of bools,
+        True where the frame is clearly silence.
+        """
+        levels_db = 10 * np.log10(energies / (32768.0 ** 2) + 1e-12)
+
+        quietest = float(levels_db.min())
+        if self.noise_floor_db is None:
+            self.noise_floor_db = quietest
+
+        threshold = min(self.noise_floor_db + self.margin_db, self.max_gate_db)
+        silent = levels_db < threshold
+
+        # Follow the floor down at once, up slowly
+        self.noise_floor_db = min(quietest, self.noise_floor_db + self.floor_rise_db * len(levels_db))
+        return silent.tolist()
+
+
+class NumpyVAD:
+    """
+    Voice activity detection for a whole block of frames at once, as an alternative to calling
+    webrtcvad once per frame. classify() takes an (n_frames, frame_size) int16 array and returns
+    one speech/non-speech decision per frame, from vectorised features:
+
+    - speech-band (300-3400 Hz) energy against an adaptive noise floor (SNR)
+    - spectral flatness in that band: low for voiced speech, close to 1 for noise
+    - zero-crossing rate: high for hiss and other broadband noise
+    - hangover: frames shortly after speech still count as speech, like webrtcvad's
+
+    A frame is speech when its SNR is high enough and it doesn't look like noise (flat or
+    high-ZCR), or when its SNR is so high that it can't be noise. aggressiveness (0-3, as for
+    webrtcvad) sets how strict that is and how long the hangover lasts, so the AdaptiveController
+    drives both engines through the same knob.
+    """
+
+    SNR_DB = (4.0, 6.0, 9.0, 12.0)          # Minimum speech-band SNR, per aggressiveness
+    FLATNESS_MAX = (0.7, 0.6, 0.5, 0.4)     # Flatter than this looks like noise
+    ZCR_MAX = (0.5, 0.4, 0.35, 0.3)         # Sign changes per sample above which it looks like hiss
+    HANGOVER_MS = (300, 200, 150, 100)
+    STRONG_SNR_DB = 20.0                    # Speech whatever the flatness / ZCR
+    MIN_LEVEL_DB = -60.0                    # dBFS, never speech below this
+    FLOOR_RISE_DB_PER_S = 2.5
+    BAND_HZ = (300, 3400)
+
+    def __init__(self, aggressiveness=3, sample_rate=16000):
+        self.sample_rate = sample_rate
+        self.set_aggressiveness(aggressiveness)
+        self.reset()
+        self._bases = {}            # frame_size -> band DFT basis
+
+    def set_aggressiveness(self, aggressiveness):
+        if aggressiveness not in (0, 1, 2, 3):
+            raise ValueError("aggressiveness must be 0, 1, 2 or 3")
+        self.aggressiveness = aggressiveness
+
+    def reset(self):
+        self.noise_floor_db = None
+        self.samples_since_speech = None    # None = no speech yet; samples, so frame size can change
+
+    def is_speech(self, frame_bytes, sample_rate):
+        """webrtcvad-compatible single frame call (the segmenter uses classify() instead)."""
+        frame = np.frombuffer(frame_bytes, dtype=np.int16)
+        return self.classify(frame.reshape(1, -1))[0]
+
+    def classify(self, frames):
+        """Speech decision for each row of an (n_frames, frame_size) int16 array, as a list of bools."""
+        n_frames, frame_size = frames.shape
+        if n_frames == 0:
+            return []
+        a = self.aggressiveness
+
+        band_db, flatness, zcr = self._features(frames)
+
+        # Noise floor from the quietest frames: straight down, slowly up
+        quietest = float(band_db.min())
+        if self.noise_floor_db is None:
+            self.noise_floor_db = quietest
+        snr_db = band_db - self.noise_floor_db
+
+        noise_like = (flatness > self.FLATNESS_MAX[a]) | (zcr > self.ZCR_MAX[a])
+        raw = (snr_db > self.SNR_DB[a]) & ~noise_like
+        raw |= snr_db > self.STRONG_SNR_DB
+        raw &= band_db > self.MIN_LEVEL_DB
+
+        frame_seconds = frame_size / self.sample_rate
+        self.noise_floor_db = min(quietest, self.noise_floor_db + self.FLOOR_RISE_DB_PER_S * frame_seconds * n_frames)
+
+        return self._apply_hangover(raw, frame_size).tolist()
+
+    def _band_basis(self, frame_size):
+        # Windowed DFT rows for the speech-band bins only (cos then -sin), scaled to [-1, 1] input:
+        # one float32 matmul per block instead of a full FFT per frame
+        basis = self._bases.get(frame_size)
+        if basis is None:
+            n = np.arange(frame_size)
+            low = int(self.BAND_HZ[0] * frame_size / self.sample_rate)
+            high = int(self.BAND_HZ[1] * frame_size / self.sample_rate) + 1
+            angles = 2 * np.pi * np.outer(n, np.arange(low, high)) / frame_size
+            window = 0.5 - 0.5 * np.cos(2 * np.pi * n / frame_size)
+            basis = np.concatenate([np.cos(angles), -np.sin(angles)], axis=1) * (window / 32768.0)[:, None]
+            basis = basis.astype(np.float32)
+            self._bases[frame_size] = basis
+        return basis
+
+    def _features(self, frames):
+        frame_size = frames.shape[1]
+        basis = self._band_basis(frame_size)
+        n_bins = basis.shape[1] // 2
+
+        projection = frames.astype(np.float32) @ basis
+        band = projection[:, :n_bins] ** 2 + projection[:, n_bins:] ** 2 + 1e-12
+
+        # Band energy in dBFS (Hann window gain of 0.375 folded in), geometric / arithmetic mean
+        band_db = 10 * np.log10(band.sum(axis=1) * 2 / (0.375 * frame_size ** 2))
+        flatness = np.exp(np.log(band).mean(axis=1)) / band.mean(axis=1)
+
+        # Adjacent samples of opposite sign have a negative xor
+        zcr = np.count_nonzero((frames[:, 1:] ^ frames[:, :-1]) < 0, axis=1) / (frame_size - 1)
+        return band_db, flatness, zcr
+
+    def _apply_hangover(self, raw, frame_size):
+        # Speech if the last raw speech frame (this block or an earlier one) is within the hangover
+        hangover_frames = self.HANGOVER_MS[self.aggressiveness] * self.sample_rate // (1000 * frame_size)
+        index = np.arange(len(raw))
+
+        previous = -np.inf
+        if self.samples_since_speech is not None:
+            previous = -(self.samples_since_speech // frame_size)   # Index of that frame relative to this block
+        last_speech = np.maximum.accumulate(np.where(raw, index, -np.inf))
+        last_speech = np.maximum(last_speech, previous)
+        smoothed = index - last_speech <= hangover_frames
+
+        # Distance from the last speech frame to the first frame of the next block
+        if raw.any():
+            self.samples_since_speech = (len(raw) - int(index[raw][-1])) * frame_size
+        elif self.samples_since_speech is not None:
+            self.samples_since_speech += len(raw) * frame_size
+        return smoothed